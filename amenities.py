@@ -0,0 +1,145 @@
+from models import Hotel, Room, db
+from sqlalchemy import event, inspect
+from flask.cli import with_appcontext
+import click
+import json
+import re
+
+# Canonical amenity vocabulary. Each entry's position is its bit in the
+# amenity_mask columns, so entries may only ever be appended, never reordered.
+AMENITIES = [
+    ('wifi', 'Free Wi-Fi', ('wi-fi', 'free wifi', 'free wi-fi', 'wireless internet', 'internet')),
+    ('pool', 'Swimming Pool', ('swimming pool', 'outdoor pool', 'indoor pool')),
+    ('spa', 'Spa', ('spa & wellness', 'wellness centre', 'wellness center')),
+    ('gym', 'Fitness Centre', ('fitness center', 'fitness centre', 'fitness', 'health club')),
+    ('restaurant', 'Restaurant', ('restaurants', 'fine dining', 'dining')),
+    ('bar', 'Bar', ('lounge', 'bar & lounge')),
+    ('parking', 'Parking', ('free parking', 'valet parking', 'car park')),
+    ('airport_shuttle', 'Airport Shuttle', ('airport transfer', 'airport pickup')),
+    ('room_service', 'Room Service', ('24-hour room service', '24 hour room service')),
+    ('air_conditioning', 'Air Conditioning', ('ac', 'a/c', 'air conditioned')),
+    ('business_center', 'Business Centre', ('business centre', 'meeting rooms', 'conference facilities')),
+    ('concierge', 'Concierge', ('concierge service',)),
+    ('laundry', 'Laundry', ('laundry service', 'dry cleaning')),
+    ('pet_friendly', 'Pet Friendly', ('pets allowed',)),
+    ('beach_access', 'Beach Access', ('private beach', 'beachfront')),
+    ('kids_club', 'Kids Club', ("children's club", 'kids club')),
+    ('minibar', 'Minibar', ('mini bar', 'mini-bar')),
+    ('tv', 'Television', ('television', 'flat-screen tv', 'smart tv')),
+    ('safe', 'In-room Safe', ('in-room safe', 'safe deposit box')),
+    ('balcony', 'Balcony', ('private balcony', 'terrace')),
+    ('sea_view', 'Sea View', ('ocean view', 'sea views')),
+    ('bathtub', 'Bathtub', ('bath', 'jacuzzi')),
+    ('kitchenette', 'Kitchenette', ('kitchen',)),
+    ('wheelchair_accessible', 'Wheelchair Accessible', ('accessible', 'disabled access')),
+    ('breakfast', 'Breakfast Included', ('free breakfast', 'breakfast included')),
+]
+
+AMENITY_BITS = {code: 1 << position for position, (code, label, aliases) in enumerate(AMENITIES)}
+AMENITY_LABELS = {code: label for code, label, aliases in AMENITIES}
+
+def _key(name):
+    return re.sub(r'[\s_]+', ' ', name.strip().lower())
+
+_aliases = {}
+for _code, _label, _names in AMENITIES:
+    for _name in (_code, _label) + _names:
+        _aliases[_key(_name)] = _code
+
+def normalize_amenity(name):
+    """Map a free-form amenity name to its vocabulary code, or None if unknown"""
+    return _aliases.get(_key(name)) if isinstance(name, str) else None
+
+def parse_amenities(value):
+    """Parse a stored amenities value (JSON list or comma separated) into a list of names"""
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+    except (TypeError, ValueError):
+        parsed = value.split(',')
+    if isinstance(parsed, str):
+        parsed = [parsed]
+    return [name for name in parsed if isinstance(name, str) and name.strip()] if isinstance(parsed, list) else []
+
+def amenity_mask(names):
+    """Bitmask of the known amenities among the given names"""
+    mask = 0
+    for name in names:
+        code = normalize_amenity(name)
+        if code:
+            mask |= AMENITY_BITS[code]
+    return mask
+
+def amenity_codes(mask):
+    """Vocabulary codes set in a bitmask, in vocabulary order"""
+    return [code for code, bit in AMENITY_BITS.items() if mask & bit]
+
+def parse_amenity_filter(value):
+    """Parse a ?amenities=pool,spa,wifi argument into a required bitmask; unknown names raise ValueError"""
+    if not value:
+        return 0
+    names = [name for name in value.split(',') if name.strip()]
+    # Dropping an unknown name would silently widen the results
+    unknown = [name.strip() for name in names if not normalize_amenity(name)]
+    if unknown:
+        raise ValueError(f"Unknown amenities: {', '.join(unknown)}")
+    return amenity_mask(names)
+
+def has_amenities(column, mask):
+    """Filter clause requiring every bit of mask to be set in an amenity_mask column"""
+    return column.op('&')(mask) == mask
+
+def hotel_amenity_filter(mask):
+    return has_amenities(Hotel.amenity_mask, mask)
+
+def room_amenity_filter(mask):
+    """Filter clause matching hotels with at least one available room offering every amenity"""
+    return Hotel.id.in_(
+        db.select(Room.hotel_id).where(Room.is_available == True, has_amenities(Room.amenity_mask, mask))
+    )
+
+def filter_by_amenities(query, amenities='', room_amenities=''):
+    """Apply ?amenities= (hotel) and ?room_amenities= (any room) set filters to a Hotel query"""
+    hotel_mask = parse_amenity_filter(amenities)
+    room_mask = parse_amenity_filter(room_amenities)
+    if hotel_mask:
+        query = query.filter(hotel_amenity_filter(hotel_mask))
+    if room_mask:
+        query = query.filter(room_amenity_filter(room_mask))
+    return query
+
+# The JSON text stays the display source; the mask is derived once, on write
+
+def _sync_mask(mapper, connection, target):
+    if inspect(target).attrs.amenities.history.has_changes() or target.amenity_mask is None:
+        target.amenity_mask = amenity_mask(parse_amenities(target.amenities))
+
+for _model in (Hotel, Room):
+    event.listen(_model, 'before_insert', _sync_mask)
+    event.listen(_model, 'before_update', _sync_mask)
+
+def rebuild_amenity_masks(batch_size=1000):
+    """Recompute every hotel and room amenity mask from its amenities text"""
+    updated = 0
+    for model in (Hotel, Room):
+        batch = []
+        rows = db.session.execute(db.select(model.id, model.amenities).execution_options(yield_per=batch_size))
+        for row_id, amenities in rows:
+            batch.append({'id': row_id, 'amenity_mask': amenity_mask(parse_amenities(amenities))})
+            if len(batch) >= batch_size:
+                db.session.execute(db.update(model), batch)
+                updated += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(db.update(model), batch)
+            updated += len(batch)
+    db.session.commit()
+    return updated
+
+@click.command('rebuild-amenities')
+@with_appcontext
+def rebuild_amenities_command():
+    """Recompute hotel and room amenity bitmasks from their amenities text"""
+    count = rebuild_amenity_masks()
+    click.echo(f'Rebuilt amenity masks for {count} hotels and rooms.')
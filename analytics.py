@@ -0,0 +1,247 @@
+from models import Room, Booking, DailyOccupancyStats, db
+from sqlalchemy import event, inspect, func
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
+from flask.cli import with_appcontext
+from datetime import date, timedelta
+import click
+import numpy as np
+
+# Statuses whose nights count as sold room nights
+SOLD_STATUSES = ('confirmed', 'completed')
+
+REPORT_GROUPS = ('hotel', 'room_type', 'day')
+
+# Closed days the lifecycle worker keeps cached; older gaps are filled by rebuild-occupancy-stats
+DEFAULT_CACHE_DAYS = 400
+
+def expand_nights(start, end, hotel_id=None, statuses=SOLD_STATUSES):
+    """Sold room nights and room revenue per (hotel, room type) per day in [start, end).
+
+    Returns (segments, available, sold, revenue): the segment keys, a
+    rooms-available vector and two len(segments) x days arrays. Stays are
+    expanded into nights with NumPy, each night carrying an equal share of
+    the booking total. ``statuses`` selects the bookings that hold a night.
+    """
+    days = max((end - start).days, 0)
+    rooms = db.session.query(Room.id, Room.hotel_id, Room.room_type, Room.is_available)
+    if hotel_id is not None:
+        rooms = rooms.filter(Room.hotel_id == hotel_id)
+    rooms = rooms.all()
+    segments = sorted({(row_hotel, room_type) for _, row_hotel, room_type, _ in rooms})
+    index = {segment: position for position, segment in enumerate(segments)}
+    available = np.zeros(len(segments), dtype=np.int64)
+    room_segment = np.full(max((row[0] for row in rooms), default=0) + 1, -1, dtype=np.int64)
+    for room_id, row_hotel, room_type, is_available in rooms:
+        room_segment[room_id] = index[(row_hotel, room_type)]
+        available[room_segment[room_id]] += 1 if is_available else 0
+
+    sold = np.zeros((len(segments), days), dtype=np.int64)
+    revenue = np.zeros((len(segments), days))
+    if not rooms or not days:
+        return segments, available, sold, revenue
+
+    # Columnar fetch: dates as ISO text parse into datetime64 in bulk, far faster than date objects
+    query = db.select(Booking.room_id, db.cast(Booking.check_in_date, db.String),
+                      db.cast(Booking.check_out_date, db.String), Booking.total_amount).where(
+        Booking.status.in_(statuses),
+        Booking.check_in_date < end,
+        Booking.check_out_date > start
+    )
+    if hotel_id is not None:
+        query = query.where(Booking.room_id.in_([row[0] for row in rooms]))
+    columns = list(zip(*db.session.execute(query).all()))
+    if not columns:
+        return segments, available, sold, revenue
+
+    segment = room_segment[np.array(columns[0], dtype=np.int64)]
+    origin = np.datetime64(start, 'D')
+    first = (np.array(columns[1], dtype='datetime64[D]') - origin).astype(np.int64)
+    last = (np.array(columns[2], dtype='datetime64[D]') - origin).astype(np.int64)
+    nightly = np.array(columns[3], dtype=float) / np.maximum(last - first, 1)
+
+    # One element per night inside the window: repeat each stay, then add 0..n-1 offsets
+    first = np.maximum(first, 0)
+    counts = np.minimum(last, days) - first
+    stay = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cells = segment[stay] * days + first[stay] + offsets
+
+    size = len(segments) * days
+    sold = np.bincount(cells, minlength=size).reshape(len(segments), days)
+    revenue = np.bincount(cells, weights=nightly[stay], minlength=size).reshape(len(segments), days)
+    return segments, available, sold, revenue
+
+def cached_days(start, end):
+    """Days in [start, end) already in the closed-day cache"""
+    return {day for (day,) in db.session.query(DailyOccupancyStats.day).filter(
+        DailyOccupancyStats.day >= start, DailyOccupancyStats.day < end).distinct()}
+
+def cache_closed_days(start, end):
+    """Store per-segment figures for closed days in [start, end) that are not cached yet.
+
+    Writes, so it runs from the booking lifecycle worker and the CLI against
+    the primary, never from report requests that may be reading a replica.
+    Every segment gets a row, zero counts included, so a quiet day is cached too.
+    """
+    end = min(end, date.today())
+    if start >= end:
+        return 0
+    cached = cached_days(start, end)
+    missing = [start + timedelta(days=offset) for offset in range((end - start).days)
+               if start + timedelta(days=offset) not in cached]
+    if not missing:
+        return 0
+
+    # Expand the span covering every missing day once, then keep only the missing columns
+    span_start = missing[0]
+    segments, available, sold, revenue = expand_nights(span_start, missing[-1] + timedelta(days=1))
+    rows = []
+    for day in missing:
+        offset = (day - span_start).days
+        for position, (hotel_id, room_type) in enumerate(segments):
+            rows.append({'day': day, 'hotel_id': hotel_id, 'room_type': room_type,
+                         'rooms_available': int(available[position]), 'rooms_sold': int(sold[position, offset]),
+                         'room_revenue': float(revenue[position, offset])})
+    if not rows:
+        return 0
+    try:
+        db.session.execute(db.insert(DailyOccupancyStats), rows)
+        db.session.commit()
+    except IntegrityError:
+        # Another worker cached the same days concurrently
+        db.session.rollback()
+    return len(missing)
+
+def cache_recent_days(days=None):
+    """Cache the closed days of the last OCCUPANCY_CACHE_DAYS days; run by the lifecycle worker"""
+    days = days or current_app.config.get('OCCUPANCY_CACHE_DAYS', DEFAULT_CACHE_DAYS)
+    return cache_closed_days(date.today() - timedelta(days=days), date.today())
+
+def _metrics(available, sold, revenue):
+    available, sold, revenue = int(available), int(sold), float(revenue)
+    return {
+        'rooms_available': available,
+        'rooms_sold': sold,
+        'room_revenue': round(revenue, 2),
+        'occupancy': sold / available if available else 0.0,
+        'adr': round(revenue / sold, 2) if sold else 0.0,
+        'revpar': round(revenue / available, 2) if available else 0.0,
+    }
+
+def occupancy_report(start, end, hotel_id=None, by='hotel'):
+    """Occupancy, ADR and RevPAR for the nights in [start, end), grouped by hotel, room_type or day.
+
+    Closed days come from the per-day cache; days it does not hold yet, today
+    and future nights are expanded live, so on-the-books figures stay current.
+    Only reads, so it is safe on a replica.
+    """
+    if by not in REPORT_GROUPS:
+        raise ValueError(f'by must be one of {", ".join(REPORT_GROUPS)}')
+    totals = {}
+
+    def add(key, available, sold, revenue):
+        entry = totals.setdefault(key, [0, 0, 0.0])
+        entry[0] += available
+        entry[1] += sold
+        entry[2] += revenue
+
+    def add_live(days):
+        segments, available, sold, revenue = expand_nights(days[0], days[-1] + timedelta(days=1), hotel_id)
+        offsets = [(day - days[0]).days for day in days]
+        if by == 'day':
+            available_total = available.sum()
+            for day, offset in zip(days, offsets):
+                add((day,), available_total, sold[:, offset].sum(), revenue[:, offset].sum())
+        else:
+            sold_by_segment, revenue_by_segment = sold[:, offsets].sum(axis=1), revenue[:, offsets].sum(axis=1)
+            for position, (segment_hotel, room_type) in enumerate(segments):
+                key = (segment_hotel,) if by == 'hotel' else (segment_hotel, room_type)
+                add(key, available[position] * len(days), sold_by_segment[position], revenue_by_segment[position])
+
+    today = date.today()
+    closed_end = min(end, today)
+    if start < closed_end:
+        stats = DailyOccupancyStats
+        keys = {'hotel': (stats.hotel_id,), 'room_type': (stats.hotel_id, stats.room_type), 'day': (stats.day,)}[by]
+        query = db.session.query(*keys, func.sum(stats.rooms_available), func.sum(stats.rooms_sold),
+                                 func.sum(stats.room_revenue)).filter(stats.day >= start, stats.day < closed_end)
+        if hotel_id is not None:
+            query = query.filter(stats.hotel_id == hotel_id)
+        for row in query.group_by(*keys):
+            add(tuple(row[:-3]), row[-3] or 0, row[-2] or 0, row[-1] or 0)
+
+        cached = cached_days(start, closed_end)
+        missing = [start + timedelta(days=offset) for offset in range((closed_end - start).days)
+                   if start + timedelta(days=offset) not in cached]
+        if missing:
+            add_live(missing)
+
+    live_start = max(start, today)
+    if live_start < end:
+        add_live([live_start + timedelta(days=offset) for offset in range((end - live_start).days)])
+
+    report = []
+    for key, (available, sold, revenue) in sorted(totals.items()):
+        if by == 'day':
+            row = {'day': key[0].isoformat() if isinstance(key[0], date) else key[0]}
+        elif by == 'room_type':
+            row = {'hotel_id': key[0], 'room_type': key[1]}
+        else:
+            row = {'hotel_id': key[0]}
+        row.update(_metrics(available, sold, revenue))
+        report.append(row)
+    return report
+
+def report_summary(report):
+    """Totals across every row of a report"""
+    return _metrics(sum(row['rooms_available'] for row in report), sum(row['rooms_sold'] for row in report),
+                    sum(row['room_revenue'] for row in report))
+
+# Changes to bookings touching closed days drop those days from the cache,
+# inside the same flush, so the next report recomputes them
+
+def _drop_cached_days(connection, check_in, check_out):
+    end = min(check_out, date.today())
+    if check_in is not None and check_in < end:
+        table = DailyOccupancyStats.__table__
+        connection.execute(table.delete().where(table.c.day >= check_in, table.c.day < end))
+
+def _previous(state, key):
+    history = state.attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(state.object, key)
+
+@event.listens_for(Booking, 'after_insert')
+def _booking_inserted(mapper, connection, booking):
+    if booking.status in SOLD_STATUSES:
+        _drop_cached_days(connection, booking.check_in_date, booking.check_out_date)
+
+@event.listens_for(Booking, 'after_update')
+def _booking_updated(mapper, connection, booking):
+    state = inspect(booking)
+    keys = ('status', 'total_amount', 'check_in_date', 'check_out_date', 'room_id')
+    if not any(state.attrs[key].history.has_changes() for key in keys):
+        return
+    _drop_cached_days(connection, _previous(state, 'check_in_date'), _previous(state, 'check_out_date'))
+    _drop_cached_days(connection, booking.check_in_date, booking.check_out_date)
+
+@event.listens_for(Booking, 'after_delete')
+def _booking_deleted(mapper, connection, booking):
+    _drop_cached_days(connection, booking.check_in_date, booking.check_out_date)
+
+def rebuild_occupancy_stats(start=None, end=None):
+    """Clear the closed-day cache and recompute it for [start, end), by default all booking history"""
+    if start is None:
+        start = db.session.query(func.min(Booking.check_in_date)).scalar() or date.today()
+    end = min(end or date.today(), date.today())
+    db.session.execute(db.delete(DailyOccupancyStats))
+    db.session.commit()
+    return cache_closed_days(start, end)
+
+@click.command('rebuild-occupancy-stats')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), help='first day to cache (default: first stay)')
+@with_appcontext
+def rebuild_occupancy_stats_command(start):
+    """Recompute the cached per-day occupancy figures behind the admin occupancy report"""
+    count = rebuild_occupancy_stats(start.date() if start else None)
+    click.echo(f'Cached occupancy figures for {count} days.')
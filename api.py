@@ -0,0 +1,444 @@
+from flask import Blueprint, request, current_app, url_for
+from flask_login import current_user
+from models import Hotel, Room, Booking, Review, RateRule, db
+from availability import available_rooms, has_free_room, parse_stay
+from reservations import create_booking, create_group_booking, RoomUnavailableError, MAX_GROUP_ROOMS
+from pricing import quote_totals
+from hotel_search import ranked_matches, city_filter
+from pagination import keyset_paginate, per_page_arg, InvalidCursor
+from amenities import amenity_codes, filter_by_amenities
+from inventory import inventory_calendar
+from geo import parse_near, nearby_page
+from page_cache import page_cache
+from werkzeug.http import parse_etags, parse_date
+from datetime import date, timedelta, timezone
+import hashlib
+import json
+
+api_v1 = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+MAX_BULK_HOTELS = 500
+MAX_CALENDAR_NIGHTS = 366
+
+# Serialization, validation and validators below are shared with the async
+# endpoints in asgi.py, so both servers answer alike
+
+# Compact serialization: short keys, no whitespace, None values dropped
+
+def _compact(data):
+    return {key: value for key, value in data.items() if value is not None}
+
+def serialize_hotel(hotel, detail=False):
+    data = {
+        'id': hotel.id,
+        'name': hotel.name,
+        'city': hotel.city,
+        'country': hotel.country,
+        'stars': hotel.star_rating,
+        'rating': round(hotel.average_rating, 2) if hotel.rating_count else None,
+        'reviews': hotel.rating_count,
+        'amenities': amenity_codes(hotel.amenity_mask or 0) or None,
+        'lat': hotel.latitude,
+        'lon': hotel.longitude,
+    }
+    if detail:
+        data.update({
+            'description': hotel.description,
+            'address': hotel.address,
+            'state': hotel.state,
+            'zip': hotel.zip_code,
+            'phone': hotel.phone,
+            'email': hotel.email,
+            'website': hotel.website,
+        })
+    return _compact(data)
+
+def serialize_room(room):
+    return _compact({
+        'id': room.id,
+        'number': room.room_number,
+        'type': room.room_type,
+        'max_guests': room.max_occupancy,
+        'price': room.price_per_night,
+        'amenities': amenity_codes(room.amenity_mask or 0) or None,
+    })
+
+def serialize_booking(booking):
+    return _compact({
+        'id': booking.id,
+        'room_id': booking.room_id,
+        'check_in': booking.check_in_date.isoformat(),
+        'check_out': booking.check_out_date.isoformat(),
+        'guests': booking.num_guests,
+        'total': booking.total_amount,
+        'status': booking.status,
+        'payment_status': booking.payment_status,
+    })
+
+def json_body(data, status=200):
+    return '' if status == 304 else json.dumps(data, separators=(',', ':'))
+
+def hotel_detail_data(hotel, rooms, reviews):
+    data = serialize_hotel(hotel, detail=True)
+    data['rating_histogram'] = hotel.rating_histogram
+    data['rooms'] = [serialize_room(room) for room in rooms]
+    data['recent_reviews'] = [
+        {'rating': review.rating, 'title': review.title, 'comment': review.comment,
+         'created_at': review.created_at.isoformat()}
+        for review in reviews
+    ]
+    return data
+
+def availability_data(check_in, check_out, guests, hotel_ids, rooms, quotes):
+    """Per-hotel free rooms and stay totals; rooms come ordered by hotel and price"""
+    rooms_by_hotel = {}
+    for room in rooms:
+        rooms_by_hotel.setdefault(room.hotel_id, []).append(room)
+    return {
+        'check_in': check_in.isoformat(),
+        'check_out': check_out.isoformat(),
+        'guests': guests,
+        'hotels': {
+            str(hotel_id): {
+                'free_rooms': len(rooms_by_hotel.get(hotel_id, [])),
+                'from_price': min((room.price_per_night for room in rooms_by_hotel.get(hotel_id, [])), default=None),
+                'from_total': min((quotes[room.id] for room in rooms_by_hotel.get(hotel_id, [])), default=None),
+                'rooms': [dict(serialize_room(room), total=quotes[room.id])
+                          for room in rooms_by_hotel.get(hotel_id, [])],
+            }
+            for hotel_id in hotel_ids
+        },
+    }
+
+def api_response(data, status=200, etag=None, last_modified=None):
+    body = json_body(data, status)
+    response = current_app.response_class(body, status=status, mimetype='application/json')
+    if etag:
+        response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
+def api_error(message, status):
+    return api_response({'error': message}, status)
+
+@api_v1.errorhandler(InvalidCursor)
+def invalid_cursor(error):
+    return api_error(str(error), 400)
+
+def _utc(value):
+    return value.replace(tzinfo=timezone.utc, microsecond=0) if value else None
+
+def _etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+def is_fresh(if_none_match, if_modified_since, etag, last_modified=None):
+    """Whether the client's cached copy is current, from its raw If-None-Match / If-Modified-Since headers"""
+    if if_none_match:
+        return parse_etags(if_none_match).contains(etag)
+    if last_modified and if_modified_since:
+        since = parse_date(if_modified_since)
+        return since is not None and last_modified <= since
+    return False
+
+def not_modified(etag, last_modified=None):
+    """Return a 304 response when the client's cached copy is still current, else None"""
+    if is_fresh(request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since'), etag, last_modified):
+        return api_response(None, 304, etag=etag, last_modified=last_modified)
+    return None
+
+def _stay_args(source):
+    check_in, check_out = parse_stay(source.get('check_in'), source.get('check_out'))
+    guests = source.get('guests', 1)
+    try:
+        guests = max(1, int(guests))
+    except (TypeError, ValueError):
+        guests = 1
+    return check_in, check_out, guests
+
+def availability_error(check_in, hotel_ids):
+    """The 400 message for an invalid availability request, or None"""
+    if not check_in:
+        return 'check_in and check_out must be valid YYYY-MM-DD dates with check_out after check_in'
+    if not hotel_ids:
+        return 'At least one hotel id is required'
+    if len(hotel_ids) > MAX_BULK_HOTELS:
+        return f'At most {MAX_BULK_HOTELS} hotels per request'
+    return None
+
+def parse_hotel_ids(raw_ids):
+    """Sorted distinct hotel ids, or None if any is not an integer"""
+    try:
+        return sorted({int(value) for value in raw_ids})
+    except (TypeError, ValueError):
+        return None
+
+def calendar_range(args):
+    """(start, end, error) of a calendar request; start defaults to today and end to 30 nights later"""
+    try:
+        start = date.fromisoformat(args['start']) if args.get('start') else date.today()
+        end = date.fromisoformat(args['end']) if args.get('end') else start + timedelta(days=30)
+    except ValueError:
+        return None, None, 'start and end must be YYYY-MM-DD dates'
+    if not start < end <= start + timedelta(days=MAX_CALENDAR_NIGHTS):
+        return None, None, f'end must be after start and at most {MAX_CALENDAR_NIGHTS} nights later'
+    return start, end, None
+
+def availability_version_selects(hotel_ids, check_in, check_out):
+    """Statements behind the availability validators, each returning one row"""
+    catalog = db.select(
+        db.select(db.func.max(Hotel.updated_at)).where(Hotel.id.in_(hotel_ids)).scalar_subquery(),
+        db.func.max(Room.updated_at),
+        db.func.count(Room.id)
+    ).where(Room.hotel_id.in_(hotel_ids))
+    bookings = db.select(db.func.max(Booking.updated_at), db.func.count(Booking.id)) \
+        .join(Room, Room.id == Booking.room_id).where(
+            Room.hotel_id.in_(hotel_ids),
+            Booking.check_in_date < check_out,
+            Booking.check_out_date > check_in
+        )
+    # Quotes also move with the rate rules
+    rules = db.select(db.func.max(RateRule.updated_at), db.func.count(RateRule.id))
+    return catalog, bookings, rules
+
+def availability_version(catalog, bookings, rules):
+    """(version, last_modified) from the rows of availability_version_selects"""
+    hotel_changed, room_changed, room_count = catalog
+    booking_changed, booking_count = bookings
+    rules_changed, rule_count = rules
+    last_modified = max([value for value in (hotel_changed, room_changed, booking_changed, rules_changed) if value],
+                        default=None)
+    version = (hotel_changed, room_changed, room_count, booking_changed, booking_count, rules_changed, rule_count)
+    return version, _utc(last_modified)
+
+def _availability_version(hotel_ids, check_in, check_out):
+    """Cheap validators for availability: newest hotel/room/booking change in scope"""
+    return availability_version(*(db.session.execute(statement).one()
+                                  for statement in availability_version_selects(hotel_ids, check_in, check_out)))
+
+@api_v1.route('/hotels')
+def search_hotels():
+    query = request.args.get('q', '')
+    city = request.args.get('city', '')
+    check_in, check_out, guests = _stay_args(request.args)
+    near = parse_near(request.args)
+    if request.args.get('lat') is not None and near is None:
+        return api_error('lat and lon must be valid coordinates, radius_km and nearest numbers', 400)
+
+    hotels = Hotel.query.filter_by(is_active=True)
+    if city:
+        hotels = hotels.filter(city_filter(city))
+    try:
+        hotels = filter_by_amenities(hotels, request.args.get('amenities', ''), request.args.get('room_amenities', ''))
+    except ValueError as e:
+        return api_error(str(e), 400)
+    if check_in:
+        hotels = hotels.filter(has_free_room(check_in, check_out, guests))
+
+    # Validators: the catalog tag version, bumped on every committed hotel or room change that
+    # affects listings, plus booking activity when dates are given. No validators while the page
+    # cache is off, as there is then no version shared by every worker.
+    etag = None
+    catalog_version = page_cache.version('catalog')
+    if catalog_version is not None:
+        version = [sorted(request.args.items(multi=True)), catalog_version]
+        if check_in:
+            version += db.session.query(db.func.max(Booking.updated_at), db.func.count(Booking.id)).filter(
+                Booking.check_in_date < check_out, Booking.check_out_date > check_in).one()
+        etag = _etag(*version)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+    matches = ranked_matches(query) if query else None
+    per_page = per_page_arg(request.args)
+    if near:
+        # Closest first, with each hotel's distance from the given point
+        if matches is not None:
+            hotels = hotels.join(matches, Hotel.id == matches.c.id)
+        page = nearby_page(hotels, near, request.args.get('cursor'), per_page)
+        return api_response(page.to_dict(lambda item: dict(serialize_hotel(item[0]), distance_km=round(item[1], 2))),
+                            etag=etag)
+    if matches is not None:
+        hotels = hotels.join(matches, Hotel.id == matches.c.id).add_columns(matches.c.score)
+        page = keyset_paginate(hotels, (matches.c.score, Hotel.id), request.args.get('cursor'), per_page)
+        page.items = [hotel for hotel, score in page.items]
+    else:
+        page = keyset_paginate(hotels, (Hotel.created_at, Hotel.id), request.args.get('cursor'), per_page)
+    return api_response(page.to_dict(serialize_hotel), etag=etag)
+
+@api_v1.route('/hotels/<int:hotel_id>')
+def hotel_detail(hotel_id):
+    hotel = db.session.get(Hotel, hotel_id)
+    if hotel is None or not hotel.is_active:
+        return api_error('Hotel not found', 404)
+
+    room_changed, room_count = db.session.query(db.func.max(Room.updated_at), db.func.count(Room.id)) \
+        .filter(Room.hotel_id == hotel_id).one()
+    last_modified = _utc(max([value for value in (hotel.updated_at, room_changed) if value], default=None))
+    etag = _etag(hotel_id, hotel.updated_at, room_changed, room_count)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+
+    rooms = Room.query.filter_by(hotel_id=hotel_id, is_available=True).order_by(Room.price_per_night).all()
+    reviews = Review.query.filter_by(hotel_id=hotel_id, is_verified=True) \
+        .order_by(Review.created_at.desc()).limit(10).all()
+    return api_response(hotel_detail_data(hotel, rooms, reviews), etag=etag, last_modified=last_modified)
+
+def _availability(hotel_ids):
+    source = request.args if request.method == 'GET' else request.get_json(silent=True) or {}
+    check_in, check_out, guests = _stay_args(source)
+    error = availability_error(check_in, hotel_ids)
+    if error:
+        return api_error(error, 400)
+
+    version, last_modified = _availability_version(hotel_ids, check_in, check_out)
+    etag = _etag(sorted(hotel_ids), check_in, check_out, guests, *version)
+    if request.method == 'GET':
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+
+    rooms = [room for rooms in available_rooms(check_in, check_out, guests, hotel_ids=hotel_ids).values()
+             for room in rooms]
+    quotes = quote_totals(rooms, check_in, check_out)
+    return api_response(availability_data(check_in, check_out, guests, hotel_ids, rooms, quotes),
+                        etag=etag, last_modified=last_modified)
+
+@api_v1.route('/hotels/<int:hotel_id>/availability')
+def hotel_availability(hotel_id):
+    return _availability([hotel_id])
+
+@api_v1.route('/hotels/<int:hotel_id>/calendar')
+def hotel_calendar(hotel_id):
+    """Rooms left per room type for each night in [start, end), from the inventory table"""
+    hotel = db.session.get(Hotel, hotel_id)
+    if hotel is None or not hotel.is_active:
+        return api_error('Hotel not found', 404)
+    start, end, error = calendar_range(request.args)
+    if error:
+        return api_error(error, 400)
+
+    calendar = inventory_calendar(hotel_id, start, end, request.args.get('room_type') or None)
+    return api_response({'hotel_id': hotel_id, 'start': start.isoformat(), 'end': end.isoformat(),
+                         'room_types': calendar})
+
+@api_v1.route('/availability', methods=['GET', 'POST'])
+def bulk_availability():
+    """Availability for many hotels at once: ?hotel_ids=1,2,3 or a JSON body with hotel_ids"""
+    if request.method == 'POST':
+        raw_ids = (request.get_json(silent=True) or {}).get('hotel_ids') or []
+    else:
+        raw_ids = [value for value in request.args.get('hotel_ids', '').split(',') if value]
+    hotel_ids = parse_hotel_ids(raw_ids)
+    if hotel_ids is None:
+        return api_error('hotel_ids must be integers', 400)
+    return _availability(hotel_ids)
+
+@api_v1.route('/bookings', methods=['POST'])
+def create_booking_api():
+    if not current_user.is_authenticated:
+        return api_error('Authentication required', 401)
+
+    payload = request.get_json(silent=True) or {}
+    check_in, check_out, guests = _stay_args(payload)
+    if not check_in:
+        return api_error('check_in and check_out must be valid YYYY-MM-DD dates with check_out after check_in', 400)
+    if check_in < date.today():
+        return api_error('Check-in date cannot be in the past.', 400)
+
+    room = db.session.get(Room, payload.get('room_id')) if isinstance(payload.get('room_id'), int) else None
+    # Rooms taken out of service, or in a deactivated hotel, are not bookable
+    if room is None or not room.is_available or not room.hotel.is_active:
+        return api_error('Room not found', 404)
+    if guests > room.max_occupancy:
+        return api_error(f'This room sleeps at most {room.max_occupancy} guests', 400)
+
+    try:
+        booking = create_booking(
+            user_id=current_user.id,
+            room_id=room.id,
+            check_in=check_in,
+            check_out=check_out,
+            num_guests=guests,
+            special_requests=payload.get('special_requests')
+        )
+    except RoomUnavailableError:
+        return api_error('This room is no longer available for the selected dates.', 409)
+
+    response = api_response(serialize_booking(booking), 201, etag=_etag(booking.id, booking.updated_at),
+                            last_modified=_utc(booking.updated_at))
+    response.headers['Location'] = url_for('api_v1.booking_detail', booking_id=booking.id)
+    return response
+
+@api_v1.route('/bookings/group', methods=['POST'])
+def create_group_booking_api():
+    """Hold a block of rooms for one stay, all or none: room_ids, or hotel_id + room_type + rooms"""
+    if not current_user.is_authenticated:
+        return api_error('Authentication required', 401)
+
+    payload = request.get_json(silent=True) or {}
+    check_in, check_out, guests = _stay_args(payload)
+    if not check_in:
+        return api_error('check_in and check_out must be valid YYYY-MM-DD dates with check_out after check_in', 400)
+    if check_in < date.today():
+        return api_error('Check-in date cannot be in the past.', 400)
+
+    room_ids = payload.get('room_ids')
+    if room_ids is not None:
+        if not isinstance(room_ids, list) or not all(isinstance(room_id, int) for room_id in room_ids):
+            return api_error('room_ids must be a list of integers', 400)
+        if not 0 < len(set(room_ids)) <= MAX_GROUP_ROOMS:
+            return api_error(f'A group booking holds between 1 and {MAX_GROUP_ROOMS} rooms', 400)
+        rooms = Room.query.join(Hotel).filter(Room.id.in_(room_ids), Hotel.is_active == True).all()
+        if len(rooms) < len(set(room_ids)):
+            return api_error('Room not found', 404)
+        too_small = [room.id for room in rooms if guests > room.max_occupancy]
+        if too_small:
+            return api_error(f'Rooms {sorted(too_small)} sleep fewer than {guests} guests', 400)
+        options = {'room_ids': room_ids}
+    else:
+        count = payload.get('rooms')
+        if not isinstance(count, int) or not 0 < count <= MAX_GROUP_ROOMS:
+            return api_error(f'rooms must be a number of rooms between 1 and {MAX_GROUP_ROOMS}', 400)
+        hotel = db.session.get(Hotel, payload.get('hotel_id')) if isinstance(payload.get('hotel_id'), int) else None
+        if hotel is None or not hotel.is_active:
+            return api_error('Hotel not found', 404)
+        if not payload.get('room_type'):
+            return api_error('room_type is required with hotel_id', 400)
+        options = {'hotel_id': hotel.id, 'room_type': payload['room_type'], 'count': count}
+
+    try:
+        bookings = create_group_booking(
+            user_id=current_user.id,
+            check_in=check_in,
+            check_out=check_out,
+            guests_per_room=guests,
+            special_requests=payload.get('special_requests'),
+            **options
+        )
+    except RoomUnavailableError as e:
+        return api_error(str(e), 409)
+
+    return api_response({
+        'check_in': check_in.isoformat(),
+        'check_out': check_out.isoformat(),
+        'total': round(sum(booking.total_amount for booking in bookings), 2),
+        'bookings': [serialize_booking(booking) for booking in bookings],
+    }, 201)
+
+@api_v1.route('/bookings/<int:booking_id>')
+def booking_detail(booking_id):
+    if not current_user.is_authenticated:
+        return api_error('Authentication required', 401)
+    booking = db.session.get(Booking, booking_id)
+    if booking is None or (booking.user_id != current_user.id and not current_user.is_admin):
+        return api_error('Booking not found', 404)
+
+    etag = _etag(booking.id, booking.updated_at)
+    last_modified = _utc(booking.updated_at)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+    return api_response(serialize_booking(booking), etag=etag, last_modified=last_modified)
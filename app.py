@@ -13,6 +13,13 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 database_url = os.environ.get('DATABASE_URL', 'sqlite:///hotel_management.db')
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['DASHBOARD_STATS_TTL'] = int(os.environ.get('DASHBOARD_STATS_TTL', 60))
+
+# Optional read replica for catalog pages and reports (see db_routing.py)
+from db_routing import reads_from_replica
+if os.environ.get('REPLICA_DATABASE_URL'):
+    app.config['SQLALCHEMY_BINDS'] = {'replica': os.environ['REPLICA_DATABASE_URL']}
+app.config['REPLICA_STICKY_SECONDS'] = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
 
 # PostgreSQL specific configurations
 if database_url.startswith('postgresql'):
@@ -27,6 +34,57 @@ if database_url.startswith('postgresql'):
 from models import db
 db.init_app(app)
 
+# Schema migrations (flask db upgrade), kept next to this file
+from flask_migrate import Migrate
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'))
+
+# Per-view SQL statement budgets (see query_budget.py)
+from query_budget import init_query_budgets
+init_query_budgets(app)
+
+# Request latency and SQL instrumentation, reported at /admin/perf
+from perf_metrics import init_perf_metrics
+app.config['PERF_SAMPLE_RATE'] = float(os.environ.get('PERF_SAMPLE_RATE', 1.0))
+app.config['PERF_SLOW_QUERY_MS'] = float(os.environ.get('PERF_SLOW_QUERY_MS', 100))
+init_perf_metrics(app)
+
+# The in-process cache backends only invalidate within their own process: with several
+# workers the others keep serving stale entries until they expire. Outside development the
+# caches default to the shared Redis backend when REDIS_URL is set, and are off otherwise.
+development = app.debug or __name__ == '__main__'
+shared_cache_backend = 'memory' if development else ('redis' if os.environ.get('REDIS_URL') else 'null')
+
+# Page cache for public catalog pages, optionally backed by Redis
+from page_cache import page_cache, cached_page, catalog_tags
+app.config['PAGE_CACHE_BACKEND'] = os.environ.get('PAGE_CACHE_BACKEND', shared_cache_backend)
+app.config['PAGE_CACHE_TIMEOUT'] = int(os.environ.get('PAGE_CACHE_TIMEOUT', 300))
+app.config['REDIS_URL'] = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+page_cache.init_app(app)
+
+# Password hashing in a bounded worker pool (see password_hashing.py)
+from password_hashing import password_hasher
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+if os.environ.get('PASSWORD_HASH_WORKERS'):
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ['PASSWORD_HASH_WORKERS'])
+app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 10))
+password_hasher.init_app(app)
+
+# Booking lifecycle worker settings (see booking_lifecycle.py)
+app.config['BOOKING_HOLD_MINUTES'] = int(os.environ.get('BOOKING_HOLD_MINUTES', 24 * 60))
+app.config['BOOKING_LIFECYCLE_BATCH'] = int(os.environ.get('BOOKING_LIFECYCLE_BATCH', 500))
+
+# Short-lived cache of users resolved for current_user, optionally shared through Redis
+from user_cache import user_cache
+app.config['USER_CACHE_BACKEND'] = os.environ.get('USER_CACHE_BACKEND', shared_cache_backend)
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+user_cache.init_app(app)
+
+# In-process spatial index for "hotels near me" searches (memory, or database to use the geohash column)
+from geo import geo_index
+app.config['GEO_INDEX_BACKEND'] = os.environ.get('GEO_INDEX_BACKEND', 'memory')
+app.config['GEO_INDEX_TTL'] = int(os.environ.get('GEO_INDEX_TTL', 300))
+geo_index.init_app(app)
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'auth.login'
@@ -35,18 +93,46 @@ login_manager.login_message_category = 'info'
 # Import models and routes
 from models import User, Hotel, Room, Booking, Review
 from routes import auth_bp, hotel_bp, booking_bp, admin_bp
+from api import api_v1
 
 # Register blueprints
 app.register_blueprint(auth_bp)
 app.register_blueprint(hotel_bp)
 app.register_blueprint(booking_bp)
 app.register_blueprint(admin_bp)
+app.register_blueprint(api_v1)
+
+# CLI commands
+from hotel_search import rebuild_search_index_command
+from ratings import rebuild_ratings_command
+from dashboard_stats import rebuild_daily_stats_command
+from analytics import rebuild_occupancy_stats_command
+from exports import export_bookings_command, export_reviews_command
+from booking_lifecycle import booking_lifecycle_command
+from inventory import rebuild_inventory_command
+from amenities import rebuild_amenities_command, amenity_codes, AMENITY_LABELS
+from geo import rebuild_geohashes_command
+app.cli.add_command(rebuild_search_index_command)
+app.cli.add_command(rebuild_ratings_command)
+app.cli.add_command(rebuild_daily_stats_command)
+app.cli.add_command(rebuild_occupancy_stats_command)
+app.cli.add_command(export_bookings_command)
+app.cli.add_command(export_reviews_command)
+app.cli.add_command(booking_lifecycle_command)
+app.cli.add_command(rebuild_inventory_command)
+app.cli.add_command(rebuild_amenities_command)
+app.cli.add_command(rebuild_geohashes_command)
+
+# Templates render amenities from the stored bitmask instead of parsing JSON per request
+app.jinja_env.filters['amenity_labels'] = lambda mask: [AMENITY_LABELS[code] for code in amenity_codes(mask or 0)]
 
 @login_manager.user_loader
 def load_user(user_id):
-    return db.session.get(User, int(user_id))
+    return user_cache.load(int(user_id))
 
 @app.route('/')
+@cached_page(catalog_tags)
+@reads_from_replica
 def index():
     featured_hotels = Hotel.query.filter_by(is_featured=True).limit(6).all()
     return render_template('index.html', featured_hotels=featured_hotels)
@@ -0,0 +1,218 @@
+from app import app as flask_app
+from models import Hotel, Room, Review
+from api import (json_body, is_fresh, hotel_detail_data, availability_data, availability_error, parse_hotel_ids,
+                 calendar_range, availability_version_selects, availability_version, _etag, _utc, _stay_args)
+from db_routing import REPLICA_BIND, pinned_to_primary
+from availability import free_room_criteria
+from pricing import active_rules_select, occupancy_selects, occupancy_from_rows, quote_totals
+from inventory import calendar_selects, build_calendar
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route, Mount
+from a2wsgi import WSGIMiddleware
+from werkzeug.http import http_date
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import wraps
+import asyncio
+import os
+
+# ASGI entry point: `uvicorn asgi:application`. The read-heavy catalog and
+# availability endpoints of the JSON API are served here on an async engine,
+# running each request's independent queries concurrently on separate
+# connections; every other route falls through to the Flask app. Responses,
+# ETags, validators and validation come from the helpers in api.py, and reads
+# go to the replica when one is configured, as they do in db_routing.py.
+
+def async_database_url(url):
+    """The async-driver form of a database URL: aiosqlite for SQLite, asyncpg for PostgreSQL"""
+    scheme, rest = url.split(':', 1)
+    if scheme == 'sqlite':
+        return 'sqlite+aiosqlite:' + rest
+    if scheme in ('postgres', 'postgresql', 'postgresql+psycopg2'):
+        return 'postgresql+asyncpg:' + rest
+    return url
+
+def _engine_options(url):
+    if url.startswith('sqlite'):
+        return {}
+    # Concurrent sub-queries hold one connection each, so size the pool for requests x fan-out
+    return {'pool_pre_ping': True, 'pool_recycle': 300,
+            'pool_size': int(os.environ.get('ASYNC_POOL_SIZE', 20)),
+            'max_overflow': int(os.environ.get('ASYNC_MAX_OVERFLOW', 20))}
+
+def _sessionmaker(url):
+    engine = create_async_engine(async_database_url(url), **_engine_options(url))
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+engine, Session = _sessionmaker(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+_replica_url = (flask_app.config.get('SQLALCHEMY_BINDS') or {}).get(REPLICA_BIND)
+replica_engine, ReplicaSession = _sessionmaker(_replica_url) if _replica_url else (None, None)
+
+# The session factory of the current request; copied into every gathered task
+_request_session = ContextVar('request_session', default=Session)
+
+def reads_from_replica(endpoint):
+    """Serve this endpoint's queries from the replica, unless the client has just written"""
+    @wraps(endpoint)
+    async def wrapped(request):
+        if ReplicaSession is None:
+            return await endpoint(request)
+        cookie = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+        token = _request_session.set(Session if pinned_to_primary(flask_app, cookie) else ReplicaSession)
+        try:
+            return await endpoint(request)
+        finally:
+            _request_session.reset(token)
+    return wrapped
+
+# Each helper runs one statement in its own session, so several can be gathered
+
+async def _all(statement):
+    async with _request_session.get()() as session:
+        return (await session.execute(statement)).all()
+
+async def _one(statement):
+    async with _request_session.get()() as session:
+        return (await session.execute(statement)).one()
+
+async def _scalars(statement):
+    async with _request_session.get()() as session:
+        return (await session.scalars(statement)).all()
+
+async def _first(statement):
+    async with _request_session.get()() as session:
+        return (await session.scalars(statement)).first()
+
+def json_response(data, status=200, etag=None, last_modified=None):
+    headers = {}
+    if etag:
+        headers['ETag'] = f'"{etag}"'
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified)
+    return Response(json_body(data, status), status_code=status, media_type='application/json', headers=headers)
+
+def json_error(message, status):
+    return json_response({'error': message}, status)
+
+def _is_conditional(request):
+    return 'if-none-match' in request.headers or 'if-modified-since' in request.headers
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 response when the client's cached copy is still current, else None"""
+    if is_fresh(request.headers.get('if-none-match'), request.headers.get('if-modified-since'), etag, last_modified):
+        return json_response(None, 304, etag=etag, last_modified=last_modified)
+    return None
+
+@reads_from_replica
+async def hotel_detail(request):
+    hotel_id = request.path_params['hotel_id']
+    hotel, (room_changed, room_count), rooms, reviews = await asyncio.gather(
+        _first(select(Hotel).where(Hotel.id == hotel_id)),
+        _one(select(func.max(Room.updated_at), func.count(Room.id)).where(Room.hotel_id == hotel_id)),
+        _scalars(select(Room).where(Room.hotel_id == hotel_id, Room.is_available == True)
+                 .order_by(Room.price_per_night)),
+        _scalars(select(Review).where(Review.hotel_id == hotel_id, Review.is_verified == True)
+                 .order_by(Review.created_at.desc()).limit(10)),
+    )
+    if hotel is None or not hotel.is_active:
+        return json_error('Hotel not found', 404)
+
+    last_modified = _utc(max([value for value in (hotel.updated_at, room_changed) if value], default=None))
+    etag = _etag(hotel_id, hotel.updated_at, room_changed, room_count)
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    return json_response(hotel_detail_data(hotel, rooms, reviews), etag=etag, last_modified=last_modified)
+
+async def _availability(request, hotel_ids):
+    check_in, check_out, guests = _stay_args(request.query_params)
+    error = availability_error(check_in, hotel_ids)
+    if error:
+        return json_error(error, 400)
+
+    versions = [_one(statement) for statement in availability_version_selects(hotel_ids, check_in, check_out)]
+    lookups = [
+        _scalars(select(Room).where(*free_room_criteria(check_in, check_out, guests), Room.hotel_id.in_(hotel_ids))
+                 .order_by(Room.hotel_id, Room.price_per_night)),
+        _scalars(active_rules_select(hotel_ids, check_in, check_out)),
+    ]
+    if _is_conditional(request):
+        # Pollers usually hold a current copy: check the validators before the heavy queries
+        version, last_modified = availability_version(*await asyncio.gather(*versions))
+        etag = _etag(sorted(hotel_ids), check_in, check_out, guests, *version)
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            for lookup in lookups:
+                lookup.close()
+            return cached
+        rooms, rules = await asyncio.gather(*lookups)
+    else:
+        *rows, rooms, rules = await asyncio.gather(*versions, *lookups)
+        version, last_modified = availability_version(*rows)
+        etag = _etag(sorted(hotel_ids), check_in, check_out, guests, *version)
+
+    occupancy = None
+    if rooms and any(rule.min_occupancy is not None for rule in rules):
+        totals, stays = occupancy_selects(hotel_ids, check_in, check_out)
+        room_counts, stays = await asyncio.gather(_all(totals), _all(stays))
+        occupancy = (hotel_ids, occupancy_from_rows(hotel_ids, check_in, check_out, room_counts, stays))
+    quotes = quote_totals(rooms, check_in, check_out, rules=rules, occupancy=occupancy)
+
+    return json_response(availability_data(check_in, check_out, guests, hotel_ids, rooms, quotes),
+                         etag=etag, last_modified=last_modified)
+
+@reads_from_replica
+async def hotel_availability(request):
+    return await _availability(request, [request.path_params['hotel_id']])
+
+@reads_from_replica
+async def bulk_availability(request):
+    """Availability for many hotels at once: ?hotel_ids=1,2,3 (JSON POSTs are served by api.py)"""
+    raw_ids = [value for value in request.query_params.get('hotel_ids', '').split(',') if value]
+    hotel_ids = parse_hotel_ids(raw_ids)
+    if hotel_ids is None:
+        return json_error('hotel_ids must be integers', 400)
+    return await _availability(request, hotel_ids)
+
+@reads_from_replica
+async def hotel_calendar(request):
+    hotel_id = request.path_params['hotel_id']
+    params = request.query_params
+    start, end, error = calendar_range(params)
+    if error:
+        # An unknown hotel is a 404 whatever the parameters, as in api.py
+        hotel = await _first(select(Hotel).where(Hotel.id == hotel_id))
+        if hotel is None or not hotel.is_active:
+            return json_error('Hotel not found', 404)
+        return json_error(error, 400)
+
+    rows, totals = calendar_selects(hotel_id, start, end, params.get('room_type') or None)
+    hotel, rows, room_counts = await asyncio.gather(
+        _first(select(Hotel).where(Hotel.id == hotel_id)), _all(rows), _all(totals))
+    if hotel is None or not hotel.is_active:
+        return json_error('Hotel not found', 404)
+    return json_response({'hotel_id': hotel_id, 'start': start.isoformat(), 'end': end.isoformat(),
+                          'room_types': build_calendar(rows, room_counts, start, end)})
+
+@asynccontextmanager
+async def lifespan(application):
+    yield
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+application = Starlette(
+    routes=[
+        Route('/api/v1/hotels/{hotel_id:int}', hotel_detail, methods=['GET']),
+        Route('/api/v1/hotels/{hotel_id:int}/availability', hotel_availability, methods=['GET']),
+        Route('/api/v1/hotels/{hotel_id:int}/calendar', hotel_calendar, methods=['GET']),
+        Route('/api/v1/availability', bulk_availability, methods=['GET']),
+        # Everything else, including writes, runs in the Flask app on a pool of worker threads
+        Mount('/', app=WSGIMiddleware(flask_app, workers=int(os.environ.get('ASGI_WSGI_WORKERS', 40)))),
+    ],
+    lifespan=lifespan,
+)
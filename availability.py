@@ -0,0 +1,76 @@
+from models import Hotel, Room, Booking, BLOCKING_STATUSES, db
+from datetime import datetime
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string, returning None if it is missing or malformed"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+def parse_stay(check_in, check_out):
+    """Return (check_in, check_out) dates for a valid stay, otherwise (None, None)"""
+    check_in = parse_date(check_in) if isinstance(check_in, str) else check_in
+    check_out = parse_date(check_out) if isinstance(check_out, str) else check_out
+    if check_in and check_out and check_out > check_in:
+        return check_in, check_out
+    return None, None
+
+def overlapping_bookings(check_in, check_out):
+    """Filter clauses matching bookings that hold a room for any night of the stay"""
+    return (
+        Booking.status.in_(BLOCKING_STATUSES),
+        Booking.check_in_date < check_out,
+        Booking.check_out_date > check_in,
+    )
+
+def free_room_criteria(check_in, check_out, guests=1):
+    """Filter clauses matching rooms free for the whole stay and party size"""
+    # One anti-join over the (room_id, check_in_date, check_out_date) index
+    # instead of one bookings query per room
+    booked = db.select(Booking.id).where(
+        Booking.room_id == Room.id,
+        *overlapping_bookings(check_in, check_out)
+    )
+    return (
+        Room.is_available == True,
+        Room.max_occupancy >= (guests or 1),
+        ~booked.exists()
+    )
+
+def _free_rooms_query(check_in, check_out, guests=1, hotel_ids=None):
+    query = Room.query.filter(*free_room_criteria(check_in, check_out, guests))
+    if hotel_ids is not None:
+        query = query.filter(Room.hotel_id.in_(list(hotel_ids)))
+    return query
+
+def available_rooms(check_in, check_out, guests=1, hotel_ids=None):
+    """Return {hotel_id: [Room, ...]} of rooms free for the whole stay"""
+    rooms_by_hotel = {}
+    if hotel_ids is not None and not hotel_ids:
+        return rooms_by_hotel
+
+    rooms = _free_rooms_query(check_in, check_out, guests, hotel_ids) \
+        .order_by(Room.hotel_id, Room.price_per_night).all()
+    for room in rooms:
+        rooms_by_hotel.setdefault(room.hotel_id, []).append(room)
+    return rooms_by_hotel
+
+def has_free_room(check_in, check_out, guests=1):
+    """Filter clause matching hotels with at least one room free for the whole stay"""
+    # Correlated per hotel, so each candidate probes its own rooms by index
+    # instead of the whole room table being filtered up front
+    free_room = _free_rooms_query(check_in, check_out, guests).filter(Room.hotel_id == Hotel.id)
+    return free_room.exists()
+
+def is_room_available(room_id, check_in, check_out, exclude_booking_id=None):
+    """Check whether a single room has no blocking booking overlapping the stay"""
+    query = db.session.query(Booking.id).filter(
+        Booking.room_id == room_id,
+        *overlapping_bookings(check_in, check_out)
+    )
+    if exclude_booking_id is not None:
+        query = query.filter(Booking.id != exclude_booking_id)
+    return not db.session.query(query.exists()).scalar()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Amenity filter benchmark for the Hotel Management System
+Compares filtering hotels by an amenity set through the stored bitmask against
+loading and parsing every hotel's amenities JSON in Python.
+
+Usage: python -m benchmarks.amenity_filter [--hotels 100000] [--repeat 10]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+FILTERS = ['wifi', 'pool,spa', 'pool,spa,wifi', 'beach_access,kids_club,spa,gym']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Amenity bitmask vs JSON parsing benchmark')
+    parser.add_argument('--hotels', type=int, default=100000, help='number of synthetic hotels')
+    parser.add_argument('--repeat', type=int, default=10, help='timed runs per filter')
+    parser.add_argument('--database-url', help='database to run against (defaults to a temporary SQLite file)')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'amenities.db')
+
+    from app import app, db
+    from models import Hotel
+    from amenities import AMENITIES, amenity_mask, normalize_amenity, parse_amenities, parse_amenity_filter, \
+        hotel_amenity_filter
+
+    labels = [label for code, label, aliases in AMENITIES]
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        batch = []
+        for i in range(args.hotels):
+            names = rng.sample(labels, rng.randint(3, 12))
+            batch.append({
+                'name': f'Hotel {i}', 'description': 'Synthetic hotel', 'address': f'{i} Main Road',
+                'city': 'Mumbai', 'state': 'Maharashtra', 'country': 'India', 'zip_code': '400001',
+                'phone': '+91 22 0000 0000', 'email': f'hotel{i}@luxuryhotels.com', 'is_active': True,
+                'amenities': json.dumps(names), 'amenity_mask': amenity_mask(names),
+            })
+            if len(batch) == 5000:
+                db.session.execute(db.insert(Hotel), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(Hotel), batch)
+        db.session.commit()
+
+        print(f"{'filter':<34} {'json parse ms':>14} {'bitmask ms':>11} {'hits':>7} {'speedup':>8}")
+        for value in FILTERS:
+            required = set(value.split(','))
+
+            def parse_all():
+                rows = db.session.execute(db.select(Hotel.id, Hotel.amenities).where(Hotel.is_active == True))
+                return [row_id for row_id, amenities in rows
+                        if required <= {normalize_amenity(name) for name in parse_amenities(amenities)}]
+
+            def bitmask():
+                return db.session.execute(db.select(Hotel.id).where(
+                    Hotel.is_active == True, hotel_amenity_filter(parse_amenity_filter(value)))).scalars().all()
+
+            parse_ms, parsed = timed(parse_all, args.repeat)
+            mask_ms, masked = timed(bitmask, args.repeat)
+            assert sorted(parsed) == sorted(masked)
+            print(f'{value:<34} {parse_ms:>14.1f} {mask_ms:>11.1f} {len(masked):>7} {parse_ms / mask_ms:>7.1f}x')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
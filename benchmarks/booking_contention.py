@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Booking contention benchmark for the Hotel Management System
+Many threads race to book a small pool of rooms and the result is checked
+for double-bookings. With --group-size each attempt books a block of rooms
+at once, and every block must have been stored whole or not at all.
+
+Usage: python -m benchmarks.booking_contention [--threads 16] [--attempts 200] [--group-size 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Concurrent booking contention benchmark')
+    parser.add_argument('--threads', type=int, default=16, help='number of concurrent booking threads')
+    parser.add_argument('--attempts', type=int, default=200, help='booking attempts per thread')
+    parser.add_argument('--rooms', type=int, default=10, help='number of rooms competed for')
+    parser.add_argument('--days', type=int, default=60, help='width of the check-in date window')
+    parser.add_argument('--group-size', type=int, default=1, help='rooms per attempt, booked as one group')
+    parser.add_argument('--database-url', help='database to run against (defaults to a temporary SQLite file)')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'contention.db')
+
+    from app import app, db
+    from models import User, Hotel, Room, Booking, BLOCKING_STATUSES
+    from reservations import create_booking, create_group_booking, RoomUnavailableError
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        hotel = Hotel(name='Contention Hotel', description='Benchmark hotel', address='1 Bench Street',
+                      city='Mumbai', state='Maharashtra', country='India', zip_code='400001',
+                      phone='+91 22 0000 0000', email='bench@luxuryhotels.com')
+        db.session.add(hotel)
+        db.session.flush()
+        room_ids = []
+        for i in range(args.rooms):
+            room = Room(hotel_id=hotel.id, room_number=f'B{i:03d}', room_type='Deluxe Room',
+                        max_occupancy=2, price_per_night=15000)
+            db.session.add(room)
+            db.session.flush()
+            room_ids.append(room.id)
+        user_ids = []
+        for i in range(args.threads):
+            user = User(username=f'bench{i}', email=f'bench{i}@example.com', first_name='Bench',
+                        last_name='User', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            user_ids.append(user.id)
+        db.session.commit()
+
+    results = {'booked': 0, 'conflicts': 0}
+    results_lock = threading.Lock()
+    start_barrier = threading.Barrier(args.threads)
+
+    def worker(index):
+        rng = random.Random(args.seed + index)
+        booked = conflicts = 0
+        with app.app_context():
+            start_barrier.wait()
+            for _ in range(args.attempts):
+                check_in = date.today() + timedelta(days=rng.randint(1, args.days))
+                check_out = check_in + timedelta(days=rng.randint(1, 4))
+                try:
+                    if args.group_size > 1:
+                        create_group_booking(user_ids[index], check_in, check_out,
+                                             room_ids=rng.sample(room_ids, args.group_size))
+                    else:
+                        create_booking(user_ids[index], rng.choice(room_ids), check_in, check_out,
+                                       num_guests=1, total_amount=15000)
+                    booked += 1
+                except RoomUnavailableError:
+                    conflicts += 1
+            db.session.remove()
+        with results_lock:
+            results['booked'] += booked
+            results['conflicts'] += conflicts
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        first = db.aliased(Booking)
+        second = db.aliased(Booking)
+        overlaps = db.session.query(db.func.count()).select_from(first).join(
+            second,
+            db.and_(
+                first.room_id == second.room_id,
+                first.id < second.id,
+                first.check_in_date < second.check_out_date,
+                first.check_out_date > second.check_in_date
+            )
+        ).filter(first.status.in_(BLOCKING_STATUSES), second.status.in_(BLOCKING_STATUSES)).scalar()
+        stored = db.session.query(db.func.count(Booking.id)).scalar()
+        database = db.engine.url.render_as_string(hide_password=True)
+
+    attempts = args.threads * args.attempts
+    print(f"Database:           {database}")
+    print(f"Threads x attempts: {args.threads} x {args.attempts} ({attempts} total)")
+    print(f"Successful:         {results['booked']}")
+    print(f"Rejected overlaps:  {results['conflicts']}")
+    print(f"Elapsed:            {elapsed:.2f}s")
+    print(f"Bookings/sec:       {results['booked'] / elapsed:.1f}")
+    print(f"Attempts/sec:       {attempts / elapsed:.1f}")
+    print(f"Double-bookings:    {overlaps}")
+    # Each successful attempt stores group_size bookings and each rejected one stores none
+    partial = stored != results['booked'] * args.group_size
+    if args.group_size > 1:
+        print(f"Bookings stored:    {stored} ({'PARTIAL GROUPS' if partial else 'whole groups only'})")
+    return 1 if overlaps or partial else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Proximity search benchmark for the Hotel Management System
+Loads a large synthetic catalog clustered around Indian cities and times
+radius and nearest-hotel lookups three ways: a scan of every hotel's
+coordinates (no spatial index), geohash range scans over the indexed column,
+and the in-memory grid index. Exits 1 if any method returns different hotels.
+
+Usage: python -m benchmarks.geo_search [--hotels 100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# (label, radius km, nearest); nearest lookups search up to geo.MAX_RADIUS_KM
+LOOKUPS = [('radius 2 km', 2, None), ('radius 10 km', 10, None), ('radius 50 km', 50, None),
+           ('nearest 20', None, 20)]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Scan vs geohash vs in-memory grid proximity search benchmark')
+    parser.add_argument('--hotels', type=int, default=100000, help='number of synthetic hotels')
+    parser.add_argument('--repeat', type=int, default=20, help='timed lookups per method, from random points')
+    parser.add_argument('--database-url', help='database to run against (defaults to a temporary SQLite file)')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+def scan_within(latitude, longitude, radius_km):
+    """Every active hotel's coordinates, filtered in numpy: the cost without a spatial index"""
+    from models import Hotel, db
+    from geo import GeoIndex
+    rows = db.session.execute(db.select(Hotel.id, Hotel.latitude, Hotel.longitude).where(
+        Hotel.is_active == True, Hotel.latitude.isnot(None))).all()
+    ids, latitudes, longitudes = zip(*rows)
+    return GeoIndex(ids, latitudes, longitudes, cell_degrees=360).within(latitude, longitude, radius_km)
+
+def lookup(within, point, radius, nearest):
+    from geo import nearest_first, MAX_RADIUS_KM
+    if nearest is None:
+        return within(*point, radius)[0].tolist()
+    results = []
+    for hotel_id, distance in nearest_first(within, *point, MAX_RADIUS_KM):
+        results.append(hotel_id)
+        if len(results) == nearest:
+            break
+    return results
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'geo.db')
+
+    from app import app, db
+    from models import Hotel
+    from dataset_generator import CITIES, CITY_SPREAD
+    from geo import encode_geohash, geo_index, database_within
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        started = time.perf_counter()
+        batch = []
+        for i in range(args.hotels):
+            city, state, zip_code, latitude, longitude = rng.choice(CITIES)
+            # Most hotels cluster in cities, the rest are spread across the country
+            if rng.random() < 0.8:
+                latitude, longitude = rng.gauss(latitude, CITY_SPREAD), rng.gauss(longitude, CITY_SPREAD)
+            else:
+                latitude, longitude = rng.uniform(8, 32), rng.uniform(70, 89)
+            batch.append({
+                'name': f'Hotel {i}, {city}', 'description': 'A synthetic hotel.',
+                'address': f'{i} Main Road', 'city': city, 'state': state, 'country': 'India',
+                'zip_code': zip_code, 'phone': '+91 22 0000 0000', 'email': f'hotel{i}@luxuryhotels.com',
+                'star_rating': rng.randint(3, 5), 'is_active': True, 'is_featured': False,
+                'latitude': latitude, 'longitude': longitude, 'geohash': encode_geohash(latitude, longitude),
+            })
+            if len(batch) == 5000:
+                db.session.execute(db.insert(Hotel), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(Hotel), batch)
+        db.session.commit()
+        print(f'Loaded {args.hotels} hotels in {time.perf_counter() - started:.1f}s')
+
+        started = time.perf_counter()
+        geo_index.invalidate()
+        geo_index.index()
+        print(f'Built the in-memory grid in {(time.perf_counter() - started) * 1000:.0f}ms')
+        print()
+
+        methods = [('scan', scan_within), ('geohash', database_within), ('memory', geo_index.within)]
+        print(f"{'lookup':<14} {'hits':>6} " + ' '.join(f'{name + " ms":>11}' for name, _ in methods)
+              + f" {'vs scan':>8}")
+        mismatches = 0
+        for label, radius, nearest in LOOKUPS:
+            points = [(city[3] + rng.gauss(0, CITY_SPREAD), city[4] + rng.gauss(0, CITY_SPREAD))
+                      for city in rng.choices(CITIES, k=args.repeat)]
+            timings = {name: [] for name, _ in methods}
+            hits = []
+            for point in points:
+                results = {}
+                for name, within in methods:
+                    started = time.perf_counter()
+                    results[name] = lookup(within, point, radius, nearest)
+                    timings[name].append((time.perf_counter() - started) * 1000)
+                mismatches += any(result != results['scan'] for result in results.values())
+                hits.append(len(results['scan']))
+            medians = {name: statistics.median(values) for name, values in timings.items()}
+            print(f'{label:<14} {statistics.median(hits):>6.0f} '
+                  + ' '.join(f'{medians[name]:>11.2f}' for name, _ in methods)
+                  + f" {medians['scan'] / medians['memory']:>7.1f}x")
+
+    print(f'\n{mismatches} lookups returned different hotels across methods.')
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Hotel search benchmark for the Hotel Management System
+Compares the ranked full-text search (ranked_matches) and the city filter
+(city_filter), as the listing views use them, against the old ilike scans
+over a large synthetic catalog. Only matching ids are fetched so the timings
+measure the search itself rather than ORM materialization.
+
+Usage: python -m benchmarks.hotel_search [--hotels 100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+CITIES = ['Mumbai', 'Udaipur', 'Hyderabad', 'Bangalore', 'Chennai', 'Delhi', 'Jaipur', 'Goa',
+          'Kolkata', 'Kochi', 'Agra', 'Shimla', 'Pune', 'Varanasi', 'Mysore', 'Darjeeling']
+NAME_WORDS = ['Grand', 'Palace', 'Royal', 'Heights', 'Oceanview', 'Garden', 'Lakeview', 'Heritage',
+              'Residency', 'Retreat', 'Towers', 'Regency', 'Plaza', 'Court', 'Manor', 'Villa']
+DESCRIPTION_WORDS = ['luxury', 'heritage', 'sea', 'views', 'spa', 'pool', 'business', 'romantic',
+                     'gardens', 'rooftop', 'dining', 'historic', 'modern', 'suites', 'lake', 'beach']
+QUERIES = ['palace', 'mumbai', 'royal heritage', 'lakeview udaipur', 'rooftop spa', 'regancy']
+CITY_QUERIES = ['mumbai', 'udai', 'darjeeling']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Full-text vs ilike hotel search benchmark')
+    parser.add_argument('--hotels', type=int, default=100000, help='number of synthetic hotels')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per query')
+    parser.add_argument('--database-url', help='database to run against (defaults to a temporary SQLite file)')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+def ilike_search(query):
+    from models import Hotel, db
+    return Hotel.query.filter_by(is_active=True).filter(
+        db.or_(
+            Hotel.name.ilike(f'%{query}%'),
+            Hotel.city.ilike(f'%{query}%'),
+            Hotel.description.ilike(f'%{query}%')
+        )
+    ).with_entities(Hotel.id).all()
+
+def fulltext_search(query):
+    from models import Hotel
+    from hotel_search import ranked_matches
+    matches = ranked_matches(query)
+    return Hotel.query.filter_by(is_active=True).join(matches, Hotel.id == matches.c.id) \
+        .order_by(matches.c.score.desc(), Hotel.id).with_entities(Hotel.id).all()
+
+def ilike_city(city):
+    from models import Hotel
+    return Hotel.query.filter_by(is_active=True).filter(Hotel.city.ilike(f'%{city}%')).with_entities(Hotel.id).all()
+
+def city_search(city):
+    from models import Hotel
+    from hotel_search import city_filter
+    return Hotel.query.filter_by(is_active=True).filter(city_filter(city)).with_entities(Hotel.id).all()
+
+def time_query(search, query, repeat):
+    from models import db
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = search(query)
+        timings.append((time.perf_counter() - started) * 1000)
+        db.session.expunge_all()
+    return statistics.median(timings), len(results)
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'search.db')
+
+    from app import app, db
+    from models import Hotel
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        started = time.perf_counter()
+        batch = []
+        for i in range(args.hotels):
+            city = rng.choice(CITIES)
+            batch.append({
+                'name': f"{' '.join(rng.sample(NAME_WORDS, 2))}, {city}",
+                'description': ' '.join(rng.choices(DESCRIPTION_WORDS, k=12)),
+                'address': f'{i} Main Road', 'city': city, 'state': 'State', 'country': 'India',
+                'zip_code': '400001', 'phone': '+91 22 0000 0000', 'email': f'hotel{i}@luxuryhotels.com',
+                'star_rating': rng.randint(3, 5), 'is_active': True, 'is_featured': False,
+            })
+            if len(batch) == 5000:
+                db.session.execute(db.insert(Hotel), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(Hotel), batch)
+        db.session.commit()
+        print(f'Loaded {args.hotels} hotels in {time.perf_counter() - started:.1f}s')
+        print()
+        print(f"{'query':<20} {'ilike ms':>10} {'hits':>6} {'fulltext ms':>12} {'hits':>6} {'speedup':>8}")
+
+        runs = [(query, ilike_search, fulltext_search, query) for query in QUERIES]
+        runs += [(f'city={city}', ilike_city, city_search, city) for city in CITY_QUERIES]
+        for label, ilike, fulltext, query in runs:
+            ilike_ms, ilike_hits = time_query(ilike, query, args.repeat)
+            fulltext_ms, fulltext_hits = time_query(fulltext, query, args.repeat)
+            print(f'{label:<20} {ilike_ms:>10.2f} {ilike_hits:>6} {fulltext_ms:>12.2f} {fulltext_hits:>6} '
+                  f'{ilike_ms / fulltext_ms:>7.1f}x')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the Hotel Management System
+Concurrent clients replay weighted user journeys (browsing, searching with
+dates, booking, admin review) through the WSGI app against a seeded database,
+reporting throughput and p50/p95/p99 latency per endpoint over the successful
+requests. The run fails on any error response, and with --baseline when any
+endpoint's p95 or p99 exceeds the stored value by more than --margin. The
+committed baseline (benchmarks/load_baseline.json) comes from a default run on
+SQLite; re-save it when the hardware or the defaults change.
+
+Usage: python -m benchmarks.load_test [--clients 8] [--duration 30] [--baseline benchmarks/load_baseline.json]
+       python -m benchmarks.load_test --save-baseline benchmarks/load_baseline.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+CITIES = ['Mumbai', 'Udaipur', 'Jaipur', 'Goa', 'Kochi', 'Shimla']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Concurrent HTTP load test over the WSGI app')
+    parser.add_argument('--clients', type=int, default=8, help='number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run after warm-up')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds of unrecorded warm-up traffic')
+    parser.add_argument('--hotels', type=int, default=200, help='hotels in the seeded dataset')
+    parser.add_argument('--rooms-per-hotel', type=int, default=20)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--years', type=int, default=1, help='years of seeded booking history')
+    parser.add_argument('--no-seed-data', action='store_true', help='run against the existing database as-is')
+    parser.add_argument('--baseline', help='fail if latencies regress against this baseline file')
+    parser.add_argument('--margin', type=float, default=0.25, help='allowed regression over the baseline (0.25 = 25%%)')
+    parser.add_argument('--min-tail', type=int, default=5,
+                        help='only gate a percentile with at least this many requests beyond it')
+    parser.add_argument('--save-baseline', help='write this run\'s percentiles to a baseline file')
+    parser.add_argument('--database-url', help='database to run against (defaults to a temporary SQLite file)')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.recording = False
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, seconds, ok):
+        if not self.recording:
+            return
+        with self._lock:
+            # Failed requests are counted, but kept out of the latency percentiles
+            if ok:
+                self.samples.setdefault(endpoint, []).append(seconds)
+            else:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class Client:
+    """One simulated visitor with its own cookie jar"""
+
+    def __init__(self, app, recorder, rng, hotel_count, user_count):
+        self.http = app.test_client()
+        self.recorder = recorder
+        self.rng = rng
+        self.hotel_count = hotel_count
+        self.user_count = user_count
+
+    def request(self, endpoint, method, url, **kwargs):
+        started = time.perf_counter()
+        response = self.http.open(url, method=method, **kwargs)
+        elapsed = time.perf_counter() - started
+        self.recorder.add(endpoint, elapsed, response.status_code < 400)
+        return response
+
+    def stay(self):
+        check_in = date.today() + timedelta(days=self.rng.randint(1, 150))
+        return check_in, check_in + timedelta(days=self.rng.randint(1, 5))
+
+    def browse(self):
+        self.request('hotels', 'GET', '/hotels?format=json')
+        self.request('hotels', 'GET', f'/hotels?format=json&city={self.rng.choice(CITIES)}')
+        for _ in range(2):
+            self.request('hotel_detail', 'GET', f'/hotel/{self.rng.randint(1, self.hotel_count)}')
+
+    def search(self):
+        check_in, check_out = self.stay()
+        response = self.request('search', 'GET', f'/search?format=json&q={self.rng.choice(CITIES)}'
+                                f'&check_in={check_in}&check_out={check_out}&guests=2')
+        hotels = response.get_json(silent=True) or {}
+        for hotel in (hotels.get('items') or [])[:2]:
+            self.request('hotel_detail', 'GET',
+                         f"/hotel/{hotel['id']}?check_in={check_in}&check_out={check_out}&guests=2")
+
+    def book(self):
+        user_number = self.rng.randint(1, self.user_count)
+        self.request('login', 'POST', '/login',
+                     data={'email': f'user{user_number}@example.com', 'password': 'password123'})
+        check_in, check_out = self.stay()
+        hotel_id = self.rng.randint(1, self.hotel_count)
+        response = self.request('hotel_availability', 'GET', f'/api/v1/hotels/{hotel_id}/availability'
+                                f'?check_in={check_in}&check_out={check_out}&guests=1')
+        rooms = ((response.get_json(silent=True) or {}).get('hotels') or {}).get(str(hotel_id), {}).get('rooms')
+        if rooms:
+            self.request('book_room', 'POST', f"/book/{self.rng.choice(rooms)['id']}",
+                         data={'check_in_date': check_in.isoformat(), 'check_out_date': check_out.isoformat(),
+                               'num_guests': 1})
+        self.request('my_bookings', 'GET', '/my-bookings?format=json')
+        self.request('logout', 'GET', '/logout')
+
+    def admin(self):
+        self.request('login', 'POST', '/login', data={'email': 'admin@luxuryhotels.com', 'password': 'admin123'})
+        self.request('admin_dashboard', 'GET', '/admin')
+        self.request('admin_bookings', 'GET', '/admin/bookings?format=json')
+        self.request('admin_perf', 'GET', '/admin/perf?format=json')
+        self.request('logout', 'GET', '/logout')
+
+JOURNEYS = [('browse', 50), ('search', 30), ('book', 15), ('admin', 5)]
+
+def report(recorder, elapsed):
+    rows = {}
+    print(f"{'endpoint':<20} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint in sorted(set(recorder.samples) | set(recorder.errors)):
+        samples, errors = recorder.samples.get(endpoint, []), recorder.errors.get(endpoint, 0)
+        requests = len(samples) + errors
+        if not samples:
+            print(f"{endpoint:<20} {requests:>9} {errors:>7} {requests / elapsed:>8.1f}")
+            continue
+        rows[endpoint] = {f'p{int(q * 100)}': percentile(samples, q) * 1000 for q in (0.5, 0.95, 0.99)}
+        rows[endpoint]['samples'] = len(samples)
+        print(f"{endpoint:<20} {requests:>9} {errors:>7} {requests / elapsed:>8.1f} "
+              f"{rows[endpoint]['p50']:>8.1f} {rows[endpoint]['p95']:>8.1f} {rows[endpoint]['p99']:>8.1f}")
+    overall = [sample for samples in recorder.samples.values() for sample in samples]
+    total = len(overall) + sum(recorder.errors.values())
+    if overall:
+        print(f"{'total':<20} {total:>9} {sum(recorder.errors.values()):>7} {total / elapsed:>8.1f} "
+              f"{statistics.median(overall) * 1000:>8.1f}")
+    return rows
+
+def check_baseline(rows, baseline, margin, min_tail):
+    """Endpoints whose p95/p99 regressed beyond the margin, as printable messages"""
+    failures = []
+    for endpoint, limits in sorted(baseline.items()):
+        if endpoint not in rows:
+            continue
+        samples = min(rows[endpoint]['samples'], limits.get('samples', 0))
+        for key, q in (('p95', 0.95), ('p99', 0.99)):
+            # A percentile with only a couple of requests beyond it is their maximum: noise, not a signal
+            if samples * (1 - q) < min_tail:
+                continue
+            allowed = limits[key] * (1 + margin)
+            if rows[endpoint][key] > allowed:
+                failures.append(f'{endpoint} {key} {rows[endpoint][key]:.1f}ms > {allowed:.1f}ms '
+                                f'(baseline {limits[key]:.1f}ms + {margin:.0%})')
+    return failures
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load.db')
+
+    from app import app, db
+    from models import Hotel, User
+    from benchmarks.page_templates import install_page_templates
+
+    # Clients post forms directly rather than scraping tokens from rendered pages
+    app.config['WTF_CSRF_ENABLED'] = False
+    install_page_templates(app)
+
+    if not args.no_seed_data:
+        from dataset_generator import generate_dataset
+        generate_dataset(hotels=args.hotels, rooms_per_hotel=args.rooms_per_hotel, users=args.users,
+                         years=args.years, reviews_per_hotel=10, seed=args.seed)
+    with app.app_context():
+        hotel_count = db.session.query(db.func.max(Hotel.id)).scalar() or 1
+        user_count = max(1, db.session.query(db.func.count(User.id)).scalar() - 1)
+
+    recorder = Recorder()
+    stop = threading.Event()
+    names = [name for name, weight in JOURNEYS]
+    weights = [weight for name, weight in JOURNEYS]
+
+    def worker(index):
+        rng = random.Random(args.seed + index)
+        client = Client(app, recorder, rng, hotel_count, user_count)
+        while not stop.is_set():
+            getattr(client, rng.choices(names, weights)[0])()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    time.sleep(args.duration)
+    recorder.recording = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f'Clients: {args.clients}, duration: {elapsed:.1f}s')
+    rows = report(recorder, elapsed)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as handle:
+            json.dump(rows, handle, indent=2, sort_keys=True)
+        print(f'Baseline written to {args.save_baseline}')
+    failed = False
+    for endpoint, errors in sorted(recorder.errors.items()):
+        print(f'ERRORS: {endpoint} failed {errors} requests')
+        failed = True
+    if args.baseline:
+        with open(args.baseline) as handle:
+            failures = check_baseline(rows, json.load(handle), args.margin, args.min_tail)
+        for failure in failures:
+            print(f'REGRESSION: {failure}')
+        failed = failed or bool(failures)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark for the Hotel Management System
+Floods auth.login with concurrent sign-ins while a probe client keeps
+requesting a cheap catalog route, and reports login throughput next to the
+probe's latency before and during the storm.
+
+Run it once with the bounded hashing pool and once with PASSWORD_HASH_WORKERS=0
+(hashing inline in every request thread) to compare.
+
+Usage: python -m benchmarks.login_storm [--logins 16] [--duration 15] [--workers 1]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Login storm vs catalog latency benchmark')
+    parser.add_argument('--logins', type=int, default=16, help='concurrent clients signing in')
+    parser.add_argument('--duration', type=float, default=15, help='seconds of storm')
+    parser.add_argument('--workers', type=int, help='PASSWORD_HASH_WORKERS (0 hashes inline in each request)')
+    parser.add_argument('--method', help='PASSWORD_HASH_METHOD for the seeded users')
+    parser.add_argument('--database-url', help='database to run against (defaults to a temporary SQLite file)')
+    return parser.parse_args()
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'login.db')
+    if args.workers is not None:
+        os.environ['PASSWORD_HASH_WORKERS'] = str(args.workers)
+    if args.method:
+        os.environ['PASSWORD_HASH_METHOD'] = args.method
+
+    from app import app, db
+    from models import User, Hotel
+    from password_hashing import password_hasher
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        password_hash = password_hasher.hash('password123')
+        db.session.execute(db.insert(User), [
+            {'username': f'storm{i}', 'email': f'storm{i}@example.com', 'first_name': 'Storm', 'last_name': 'User',
+             'password_hash': password_hash} for i in range(args.logins)
+        ])
+        db.session.execute(db.insert(Hotel), [
+            {'name': f'Hotel {i}', 'description': 'Synthetic hotel', 'address': f'{i} Main Road', 'city': 'Mumbai',
+             'state': 'Maharashtra', 'country': 'India', 'zip_code': '400001', 'phone': '+91 22 0000 0000',
+             'email': f'hotel{i}@luxuryhotels.com', 'is_active': True} for i in range(50)
+        ])
+        db.session.commit()
+
+    stop = threading.Event()
+    storm = threading.Event()
+    results = {'logins': 0, 'busy': 0, 'failed': 0}
+    results_lock = threading.Lock()
+    probe = {'before': [], 'during': []}
+
+    def probe_client():
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/api/v1/hotels?per_page=5', headers={'Cache-Control': 'no-cache'})
+            probe['during' if storm.is_set() else 'before'].append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+
+    def login_client(index):
+        client = app.test_client()
+        storm.wait()
+        while not stop.is_set():
+            response = client.post('/login', data={'email': f'storm{index}@example.com', 'password': 'password123'})
+            outcome = 'logins' if response.status_code == 302 else 'busy' if response.status_code == 503 else 'failed'
+            with results_lock:
+                results[outcome] += 1
+            client.get('/logout')
+
+    threads = [threading.Thread(target=probe_client)]
+    threads += [threading.Thread(target=login_client, args=(i,)) for i in range(args.logins)]
+    for thread in threads:
+        thread.start()
+    time.sleep(3)
+    storm.set()
+    started = time.perf_counter()
+    time.sleep(args.duration)
+    stop.set()
+    elapsed = time.perf_counter() - started
+    for thread in threads:
+        thread.join()
+
+    print(f"Hash method / workers: {password_hasher.method} / {password_hasher.workers or 'inline'}")
+    print(f"Concurrent logins:     {args.logins}")
+    print(f"Logins/sec:            {results['logins'] / elapsed:.1f}  (busy {results['busy']}, failed {results['failed']})")
+    for phase in ('before', 'during'):
+        samples = probe[phase]
+        print(f"Catalog probe {phase:<7} p50 {statistics.median(samples) if samples else 0:7.1f} ms   "
+              f"p95 {percentile(samples, 0.95):7.1f} ms   p99 {percentile(samples, 0.99):7.1f} ms   ({len(samples)} requests)")
+    return 1 if results['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
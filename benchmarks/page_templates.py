@@ -0,0 +1,45 @@
+"""
+Stand-in page templates for benchmarks and tests
+The HTML templates are not part of this tree. These minimal ones let the page
+views render, and they walk the same objects and relationships the real pages
+do (booking -> room -> hotel, booking -> user), so query counts and plans stay
+representative. Real templates, when present, take precedence.
+"""
+
+from jinja2 import ChoiceLoader, DictLoader
+
+_FLASHES = '{% for category, message in get_flashed_messages(with_categories=true) %}{{ category }}: {{ message }}\n{% endfor %}'
+
+TEMPLATES = {
+    'index.html': '{% for hotel in featured_hotels %}{{ hotel.name }} {{ hotel.city }}\n{% endfor %}',
+    'about.html': 'About',
+    'contact.html': 'Contact',
+    'auth/login.html': _FLASHES + '{{ form.email.data or "" }}',
+    'auth/register.html': _FLASHES + '{{ form.email.data or "" }}',
+    'hotels/list.html': _FLASHES + '{% for hotel in hotels.items %}{{ hotel.name }} {{ hotel.city }} '
+                        '{{ hotel.average_rating }}\n{% endfor %}',
+    'hotels/detail.html': '{{ hotel.name }} {{ avg_rating }}\n{% for room in rooms %}{{ room.room_number }} '
+                          '{{ room.price_per_night }} {{ quotes.get(room.id) }}\n{% endfor %}'
+                          '{% for review in reviews %}{{ review.rating }} {{ review.title }}\n{% endfor %}',
+    'hotels/search_results.html': _FLASHES + '{% for hotel in hotels %}{{ hotel.name }} {{ hotel.city }} '
+                                  '{{ availability.get(hotel.id) }} {{ distances.get(hotel.id) }}\n{% endfor %}',
+    'booking/book.html': _FLASHES + '{{ room.hotel.name }} {{ room.room_number }} {{ form.errors }}',
+    'booking/detail.html': '{{ booking.room.hotel.name }} {{ booking.room.room_number }} {{ booking.user.username }} '
+                           '{{ booking.status }}',
+    'booking/my_bookings.html': _FLASHES + '{% for booking in bookings %}{{ booking.room.hotel.name }} '
+                                '{{ booking.room.room_number }} {{ booking.status }}\n{% endfor %}',
+    'admin/dashboard.html': '{{ stats }} {{ trend }}\n{% for booking in recent_bookings %}'
+                            '{{ booking.room.hotel.name }} {{ booking.user.username }}\n{% endfor %}',
+    'admin/hotels.html': '{% for hotel in hotels %}{{ hotel.name }} {{ hotel.city }}\n{% endfor %}',
+    'admin/bookings.html': _FLASHES + '{% for booking in bookings %}{{ booking.room.hotel.name }} '
+                           '{{ booking.user.username }} {{ booking.status }}\n{% endfor %}',
+    'admin/occupancy.html': '{{ summary }}\n{% for row in rows %}{{ row }}\n{% endfor %}',
+    'admin/perf.html': '{{ endpoints }} {{ slow_queries }} {{ page_cache }}',
+}
+
+def install_page_templates(app):
+    """Fall back to the stand-in templates for any page template the app cannot find"""
+    if not getattr(app.jinja_env.loader, 'hms_stand_ins', False):
+        loader = ChoiceLoader([app.jinja_env.loader, DictLoader(TEMPLATES)])
+        loader.hms_stand_ins = True
+        app.jinja_env.loader = loader
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Pricing benchmark for the Hotel Management System
+Quotes a stay for every room in a city result set with the vectorized pricing
+engine and with a per-room, per-night Python loop over the same rules, and
+checks that both agree to the paisa per night.
+
+Usage: python -m benchmarks.pricing_quotes [--hotels 500] [--rooms-per-hotel 40] [--nights 7]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Vectorized vs per-night loop stay pricing benchmark')
+    parser.add_argument('--hotels', type=int, default=500, help='hotels in the quoted result set')
+    parser.add_argument('--rooms-per-hotel', type=int, default=40)
+    parser.add_argument('--nights', type=int, default=7, help='length of the quoted stay')
+    parser.add_argument('--bookings', type=int, default=20000, help='existing bookings feeding occupancy rules')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per implementation')
+    parser.add_argument('--database-url', help='database to run against (defaults to a temporary SQLite file)')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+def loop_totals(rooms, check_in, check_out, rules, occupancy):
+    """Reference implementation: one Python iteration per room per night per rule"""
+    ordered = sorted(rules, key=lambda rule: (rule.nightly_rate is None, rule.priority, rule.id or 0))
+    nights = (check_out - check_in).days
+    totals = {}
+    for room in rooms:
+        total = 0.0
+        for offset in range(nights):
+            night = check_in + timedelta(days=offset)
+            rate = room.price_per_night
+            for rule in ordered:
+                if rule.min_nights and nights < rule.min_nights:
+                    continue
+                if rule.hotel_id is not None and rule.hotel_id != room.hotel_id:
+                    continue
+                if rule.room_type is not None and rule.room_type != room.room_type:
+                    continue
+                if rule.start_date is not None and night < rule.start_date:
+                    continue
+                if rule.end_date is not None and night > rule.end_date:
+                    continue
+                if rule.days_of_week is not None and not (rule.days_of_week >> night.weekday()) & 1:
+                    continue
+                if rule.min_occupancy is not None and occupancy[room.hotel_id][offset] < rule.min_occupancy:
+                    continue
+                rate = rule.nightly_rate if rule.nightly_rate is not None else rate * rule.multiplier
+            total += round(rate, 2)
+        totals[room.id] = round(total, 2)
+    return totals
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'pricing.db')
+
+    from app import app, db
+    from models import User, Hotel, Room, Booking, RateRule
+    from pricing import active_rules, hotel_occupancy, quote_totals
+
+    rng = random.Random(args.seed)
+    check_in = date.today() + timedelta(days=30)
+    check_out = check_in + timedelta(days=args.nights)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        db.session.execute(db.insert(User), [{'username': 'bench', 'email': 'bench@example.com', 'first_name': 'Bench',
+                                             'last_name': 'User', 'password_hash': 'x'}])
+        db.session.execute(db.insert(Hotel), [
+            {'name': f'Hotel {i}', 'description': 'Synthetic hotel', 'address': f'{i} Main Road', 'city': 'Mumbai',
+             'state': 'Maharashtra', 'country': 'India', 'zip_code': '400001', 'phone': '+91 22 0000 0000',
+             'email': f'hotel{i}@luxuryhotels.com', 'is_active': True}
+            for i in range(args.hotels)
+        ])
+        room_types = ['Deluxe Room', 'Executive Suite', 'Presidential Suite']
+        db.session.execute(db.insert(Room), [
+            {'hotel_id': hotel_id, 'room_number': f'{number:03d}', 'room_type': room_types[number % 3],
+             'max_occupancy': 2, 'price_per_night': rng.randint(8000, 40000), 'is_available': True}
+            for hotel_id in range(1, args.hotels + 1) for number in range(args.rooms_per_hotel)
+        ])
+        room_count = args.hotels * args.rooms_per_hotel
+        bookings = []
+        for _ in range(args.bookings):
+            start = check_in + timedelta(days=rng.randint(-5, args.nights))
+            bookings.append({'user_id': 1, 'room_id': rng.randint(1, room_count), 'check_in_date': start,
+                             'check_out_date': start + timedelta(days=rng.randint(1, 5)), 'num_guests': 1,
+                             'total_amount': 0, 'status': 'confirmed'})
+        db.session.execute(db.insert(Booking), bookings)
+        db.session.add_all([
+            RateRule(name='Weekend nights', days_of_week=0b0110000, multiplier=1.2),
+            RateRule(name='Season', start_date=check_in + timedelta(days=2), end_date=check_in + timedelta(days=4),
+                     multiplier=1.35, priority=1),
+            RateRule(name='Week-long stay', min_nights=7, multiplier=0.9, priority=2),
+            RateRule(name='High occupancy', min_occupancy=0.3, multiplier=1.15, priority=3),
+            RateRule(name='Suite calendar', room_type='Presidential Suite', start_date=check_in,
+                     end_date=check_in + timedelta(days=1), nightly_rate=85000),
+            RateRule(name='Hotel 1 promotion', hotel_id=1, multiplier=0.8, priority=4),
+        ])
+        db.session.commit()
+
+        rooms = Room.query.join(Hotel).filter(Hotel.city == 'Mumbai').all()
+        hotel_ids = sorted({room.hotel_id for room in rooms})
+
+        def vectorized():
+            return quote_totals(rooms, check_in, check_out)
+
+        def loop():
+            rules = active_rules(hotel_ids, check_in, check_out)
+            occupancy = dict(zip(hotel_ids, hotel_occupancy(hotel_ids, check_in, check_out).tolist()))
+            return loop_totals(rooms, check_in, check_out, rules, occupancy)
+
+        vector_ms, vector_totals = timed(vectorized, args.repeat)
+        loop_ms, reference_totals = timed(loop, args.repeat)
+        # NumPy and Python may round a half-paisa nightly rate in opposite directions
+        tolerance = 0.01 * args.nights + 1e-6
+        mismatches = sum(1 for room_id, total in vector_totals.items()
+                         if abs(total - reference_totals[room_id]) > tolerance)
+
+    print(f'Rooms quoted:      {len(rooms)} x {args.nights} nights')
+    print(f'Per-night loop:    {loop_ms:.1f} ms')
+    print(f'Vectorized:        {vector_ms:.1f} ms')
+    print(f'Speedup:           {loop_ms / vector_ms:.1f}x')
+    print(f'Mismatched totals: {mismatches}')
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
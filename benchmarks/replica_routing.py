@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Read/write routing check for the Hotel Management System
+Runs the app against two SQLite files standing in for a primary and a read
+replica (replication is simulated by copying the primary), replays catalog
+reads, bookings, confirmations and reports, and counts the statements each
+database served. Exits 1 when a request is routed to the wrong one, including
+reads inside the read-your-writes window after a booking.
+
+Usage: python -m benchmarks.replica_routing [--sticky-seconds 2]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Check primary/replica routing with two SQLite databases')
+    parser.add_argument('--sticky-seconds', type=int, default=2, help='REPLICA_STICKY_SECONDS for the run')
+    parser.add_argument('--hotels', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    directory = tempfile.mkdtemp()
+    primary_path, replica_path = os.path.join(directory, 'primary.db'), os.path.join(directory, 'replica.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + primary_path
+    os.environ['REPLICA_DATABASE_URL'] = 'sqlite:///' + replica_path
+    os.environ['REPLICA_STICKY_SECONDS'] = str(args.sticky_seconds)
+    os.environ['PAGE_CACHE_BACKEND'] = 'null'
+    os.environ['USER_CACHE_BACKEND'] = 'null'
+
+    from app import app, db
+    from models import Booking, Hotel, Room
+    from dataset_generator import generate_dataset
+    from sqlalchemy import event
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    generate_dataset(hotels=args.hotels, rooms_per_hotel=10, users=100, years=1, reviews_per_hotel=5, seed=args.seed)
+
+    def replicate():
+        """Bring the replica up to date, as streaming replication eventually would"""
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        source, target = sqlite3.connect(primary_path), sqlite3.connect(replica_path)
+        source.backup(target)
+        source.close()
+        target.close()
+
+    replicate()
+    with app.app_context():
+        hotel = db.session.get(Hotel, 1)
+        room = Room.query.filter_by(hotel_id=hotel.id, is_available=True).order_by(Room.max_occupancy.desc()).first()
+        pending = Booking.query.filter_by(status='pending').first()
+        engines = {'primary': db.engines[None], 'replica': db.engines['replica']}
+        city = hotel.city
+
+    counts = {'primary': 0, 'replica': 0}
+    for name, engine in engines.items():
+        event.listen(engine, 'before_cursor_execute',
+                     lambda *event_args, name=name: counts.__setitem__(name, counts[name] + 1))
+
+    check_in = date.today() + timedelta(days=200)
+    stay = f'check_in={check_in}&check_out={check_in + timedelta(days=2)}'
+    guest, user, admin = app.test_client(), app.test_client(), app.test_client()
+    failures = 0
+
+    def check(label, client, method, path, expected, **kwargs):
+        nonlocal failures
+        counts.update(primary=0, replica=0)
+        status = client.open(path, method=method, **kwargs).status_code
+        if expected == 'replica':
+            ok = counts['replica'] > 0 and counts['primary'] == 0
+        elif expected == 'primary':
+            ok = counts['primary'] > 0 and counts['replica'] == 0
+        else:
+            ok = counts['primary'] > 0 and counts['replica'] > 0
+        failures += not ok
+        print(f"{label:<44} {status:>4}  primary {counts['primary']:>3}  replica {counts['replica']:>3}  "
+              f"expected {expected:<8} {'ok' if ok else 'MISROUTED'}")
+
+    check('guest: home page', guest, 'GET', '/', 'replica')
+    check('guest: hotel list', guest, 'GET', '/hotels?format=json', 'replica')
+    check('guest: hotel detail with dates', guest, 'GET', f'/hotel/{hotel.id}?{stay}', 'replica')
+    check('guest: search', guest, 'GET', f'/search?city={city}&{stay}&format=json', 'replica')
+
+    check('user: login', user, 'POST', '/login', 'primary',
+          data={'email': 'user1@example.com', 'password': 'password123'})
+    check('user: hotel detail before booking', user, 'GET', f'/hotel/{hotel.id}?{stay}', 'replica')
+    check('user: book a room', user, 'POST', f'/book/{room.id}', 'primary',
+          data={'check_in_date': str(check_in), 'check_out_date': str(check_in + timedelta(days=2)), 'num_guests': 1})
+    check('user: hotel detail right after booking', user, 'GET', f'/hotel/{hotel.id}?{stay}', 'primary')
+    check('user: my bookings', user, 'GET', '/my-bookings?format=json', 'primary')
+    check('guest: hotel detail meanwhile', guest, 'GET', f'/hotel/{hotel.id}?{stay}', 'replica')
+    time.sleep(args.sticky_seconds + 0.5)
+    check('user: hotel detail after the sticky window', user, 'GET', f'/hotel/{hotel.id}?{stay}', 'replica')
+
+    check('admin: login', admin, 'POST', '/login', 'primary',
+          data={'email': 'admin@luxuryhotels.com', 'password': 'admin123'})
+    check('admin: occupancy report filling its cache', admin, 'GET', '/admin/reports/occupancy?format=json', 'both')
+    replicate()
+    time.sleep(args.sticky_seconds + 0.5)
+    check('admin: occupancy report once replicated', admin, 'GET', '/admin/reports/occupancy?format=json', 'replica')
+    check('admin: booking export', admin, 'GET', '/admin/export/bookings?format=ndjson', 'replica')
+    check('admin: confirm booking', admin, 'GET', f'/admin/confirm-booking/{pending.id}', 'primary')
+    check('admin: booking export right after', admin, 'GET', '/admin/export/bookings?format=ndjson', 'primary')
+
+    print(f'\n{failures} misrouted requests.')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+from models import Booking, BLOCKING_STATUSES, db
+from dashboard_stats import invalidate_dashboard_stats
+from inventory import release_bookings
+from analytics import cache_recent_days
+from flask import current_app
+from flask.cli import with_appcontext
+from datetime import datetime, date, timedelta
+import click
+import time
+
+DEFAULT_HOLD_MINUTES = 24 * 60
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_INTERVAL = 300
+
+# Transitions are set-based UPDATEs over bounded id batches, each committed on
+# its own, so the booking table is never locked for longer than one batch.
+# Being bulk statements they bypass ORM events: the dashboard cache is dropped
+# explicitly (other processes pick the change up within DASHBOARD_STATS_TTL),
+# nights of expired holds go back to the room inventory in the same batch
+# transaction, and the occupancy cache is unaffected because completed nights
+# were already sold as confirmed ones, while pending and expired nights never
+# count.
+
+def _transition(criteria, new_status, batch_size):
+    """Move every booking matching criteria to new_status, batch by batch; returns the count"""
+    moved = 0
+    last_id = 0
+    while True:
+        ids = db.session.execute(
+            db.select(Booking.id).where(Booking.id > last_id, *criteria).order_by(Booking.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        # Criteria are re-checked so a booking confirmed or cancelled meanwhile is left alone
+        updated = db.session.execute(
+            db.update(Booking).where(Booking.id.in_(ids), *criteria)
+            .values(status=new_status, updated_at=datetime.utcnow())
+            .returning(Booking.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if updated and new_status not in BLOCKING_STATUSES:
+            release_bookings(db.session.connection(), updated)
+        db.session.commit()
+        moved += len(updated)
+        last_id = ids[-1]
+        if len(ids) < batch_size:
+            break
+    return moved
+
+def expire_pending_bookings(hold_minutes=None, batch_size=None, now=None):
+    """Expire unpaid pending bookings created more than the hold period ago"""
+    hold_minutes = hold_minutes or current_app.config.get('BOOKING_HOLD_MINUTES', DEFAULT_HOLD_MINUTES)
+    cutoff = (now or datetime.utcnow()) - timedelta(minutes=hold_minutes)
+    return _transition(
+        (Booking.status == 'pending', Booking.payment_status != 'paid', Booking.created_at < cutoff),
+        'expired',
+        batch_size or current_app.config.get('BOOKING_LIFECYCLE_BATCH', DEFAULT_BATCH_SIZE)
+    )
+
+def complete_past_bookings(batch_size=None, today=None):
+    """Complete confirmed bookings whose check-out date has passed"""
+    return _transition(
+        (Booking.status == 'confirmed', Booking.check_out_date <= (today or date.today())),
+        'completed',
+        batch_size or current_app.config.get('BOOKING_LIFECYCLE_BATCH', DEFAULT_BATCH_SIZE)
+    )
+
+def run_lifecycle():
+    """One pass of every booking transition, then the occupancy cache catch-up.
+
+    Returns {transition: bookings moved, 'cached_days': closed days added to the cache}.
+    """
+    result = {'expired': expire_pending_bookings(), 'completed': complete_past_bookings()}
+    if any(result.values()):
+        invalidate_dashboard_stats()
+    # The worker writes to the primary, so closed days are cached here rather than by report requests
+    result['cached_days'] = cache_recent_days()
+    return result
+
+@click.command('booking-lifecycle')
+@click.option('--once', is_flag=True, help='run a single pass and exit')
+@click.option('--interval', type=int, default=DEFAULT_INTERVAL, help='seconds between passes')
+@with_appcontext
+def booking_lifecycle_command(once, interval):
+    """Expire stale pending bookings, complete past stays and cache closed days, once or as a daemon"""
+    while True:
+        started = time.perf_counter()
+        result = run_lifecycle()
+        click.echo(f"{datetime.now():%Y-%m-%d %H:%M:%S} expired {result['expired']}, "
+                   f"completed {result['completed']} bookings, cached {result['cached_days']} closed days "
+                   f"in {time.perf_counter() - started:.2f}s")
+        db.session.remove()
+        if once:
+            break
+        time.sleep(interval)
@@ -0,0 +1,238 @@
+from models import User, Hotel, Room, Booking, DailyBookingStats, db
+from sqlalchemy import event, inspect, case, select, func
+from sqlalchemy.orm import Session, object_session
+from flask import current_app
+from flask.cli import with_appcontext
+from collections import Counter
+from datetime import datetime, date, timedelta
+import click
+import threading
+import time
+
+DEFAULT_TTL = 60
+TREND_DAYS = 90
+
+# generation moves on every change to the cached figures, so a computation that raced one is not stored
+_cache = {'stats': None, 'expires': 0.0, 'generation': 0}
+_cache_lock = threading.Lock()
+
+# Models whose row count is shown on the dashboard
+_COUNTED = {Hotel: 'total_hotels', Room: 'total_rooms', User: 'total_users', Booking: 'total_bookings'}
+
+def _compute_stats():
+    """Compute every dashboard figure in a single statement"""
+    row = db.session.execute(select(
+        select(func.count(Hotel.id)).scalar_subquery(),
+        select(func.count(Room.id)).scalar_subquery(),
+        select(func.count(User.id)).scalar_subquery(),
+        select(func.count(Booking.id)).scalar_subquery(),
+        # Filtered rather than CASE-summed so both use the status indexes
+        select(func.count(Booking.id)).where(Booking.status == 'pending').scalar_subquery(),
+        select(func.sum(Booking.total_amount)).where(Booking.status == 'confirmed').scalar_subquery(),
+    )).one()
+    total_hotels, total_rooms, total_users, total_bookings, pending, revenue = row
+    return {
+        'total_hotels': total_hotels,
+        'total_rooms': total_rooms,
+        'total_bookings': total_bookings,
+        'total_users': total_users,
+        'pending_bookings': pending or 0,
+        'revenue': revenue or 0,
+    }
+
+def get_dashboard_stats():
+    """Return the dashboard statistics, recomputing them once the cached copy expires"""
+    now = time.monotonic()
+    with _cache_lock:
+        if _cache['stats'] is not None and now < _cache['expires']:
+            return dict(_cache['stats'])
+        generation = _cache['generation']
+
+    # Computed outside the lock; a commit landing meanwhile may or may not be in the
+    # result, so it is only cached when nothing changed in between
+    stats = _compute_stats()
+    ttl = current_app.config.get('DASHBOARD_STATS_TTL', DEFAULT_TTL)
+    with _cache_lock:
+        if _cache['generation'] == generation:
+            _cache['stats'] = dict(stats)
+            _cache['expires'] = now + ttl
+    return stats
+
+def invalidate_dashboard_stats():
+    """Drop the cached statistics, e.g. after bulk updates that bypass ORM events"""
+    with _cache_lock:
+        _cache['stats'] = None
+        _cache['generation'] += 1
+
+def _apply_deltas(deltas):
+    with _cache_lock:
+        _cache['generation'] += 1
+        stats = _cache['stats']
+        if stats is None:
+            return
+        for key, delta in deltas.items():
+            stats[key] += delta
+
+def _utc_today():
+    # Rollup days are UTC days, like the created_at and updated_at timestamps
+    return datetime.utcnow().date()
+
+def booking_trend(days=TREND_DAYS):
+    """Return one rollup dict per day for the last ``days`` days, oldest first"""
+    start = _utc_today() - timedelta(days=days - 1)
+    rows = {row.day: row for row in DailyBookingStats.query.filter(DailyBookingStats.day >= start).all()}
+    trend = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day) or DailyBookingStats(day=day, bookings_created=0, bookings_confirmed=0,
+                                                 bookings_cancelled=0, confirmed_revenue=0)
+        trend.append(row.to_dict())
+    return trend
+
+def _bump_rollup(connection, day, **increments):
+    """Add increments to one day's rollup row, creating it if needed"""
+    increments = {key: value for key, value in increments.items() if value}
+    if not increments:
+        return
+    table = DailyBookingStats.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).values(day=day, **increments)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.day],
+            set_={key: table.c[key] + statement.excluded[key] for key in increments}
+        )
+        connection.execute(statement)
+        return
+
+    updated = connection.execute(
+        table.update().where(table.c.day == day).values({table.c[key]: table.c[key] + value
+                                                          for key, value in increments.items()})
+    )
+    if not updated.rowcount:
+        connection.execute(table.insert().values(day=day, **increments))
+
+def _previous(state, key):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, key)
+
+def _booking_figures(status, amount):
+    return Counter({
+        'pending_bookings': 1 if status == 'pending' else 0,
+        'revenue': (amount or 0) if status == 'confirmed' else 0,
+    })
+
+def _queue(target, deltas):
+    # Cached figures only change once the surrounding transaction commits
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('dashboard_deltas', Counter()).update(deltas)
+
+def _counted_insert(mapper, connection, target):
+    _queue(target, Counter({_COUNTED[mapper.class_]: 1}))
+
+def _counted_delete(mapper, connection, target):
+    _queue(target, Counter({_COUNTED[mapper.class_]: -1}))
+
+for _model in _COUNTED:
+    event.listen(_model, 'after_insert', _counted_insert)
+    event.listen(_model, 'after_delete', _counted_delete)
+
+def _load_old_value(target, value, oldvalue, initiator):
+    pass
+
+# Deltas need the old status and amount even when they are set on a booking expired by a commit
+for _key in ('status', 'total_amount'):
+    event.listen(getattr(Booking, _key), 'set', _load_old_value, active_history=True)
+
+@event.listens_for(Booking, 'after_insert')
+def _booking_inserted(mapper, connection, booking):
+    _queue(booking, _booking_figures(booking.status, booking.total_amount))
+    created = (booking.created_at or datetime.utcnow()).date()
+    _bump_rollup(connection, created, bookings_created=1)
+    if booking.status == 'confirmed':
+        _bump_rollup(connection, _utc_today(), bookings_confirmed=1, confirmed_revenue=booking.total_amount)
+
+@event.listens_for(Booking, 'after_update')
+def _booking_updated(mapper, connection, booking):
+    state = inspect(booking)
+    if not any(state.attrs[key].history.has_changes() for key in ('status', 'total_amount')):
+        return
+    old_status = _previous(state, 'status')
+    deltas = _booking_figures(booking.status, booking.total_amount)
+    deltas.subtract(_booking_figures(old_status, _previous(state, 'total_amount')))
+    _queue(booking, deltas)
+
+    if booking.status != old_status:
+        if booking.status == 'confirmed':
+            _bump_rollup(connection, _utc_today(), bookings_confirmed=1, confirmed_revenue=booking.total_amount)
+        elif booking.status == 'cancelled':
+            _bump_rollup(connection, _utc_today(), bookings_cancelled=1)
+
+@event.listens_for(Booking, 'after_delete')
+def _booking_deleted(mapper, connection, booking):
+    state = inspect(booking)
+    deltas = Counter()
+    deltas.subtract(_booking_figures(_previous(state, 'status'), _previous(state, 'total_amount')))
+    _queue(booking, deltas)
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    deltas = session.info.pop('dashboard_deltas', None)
+    if deltas:
+        _apply_deltas(deltas)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    session.info.pop('dashboard_deltas', None)
+
+def rebuild_daily_stats():
+    """Recompute the per-day rollup from the bookings table.
+
+    Bookings do not record when they were confirmed or cancelled, so those
+    events are attributed to the day the booking was last updated.
+    """
+    created_day = func.date(Booking.created_at)
+    updated_day = func.date(Booking.updated_at)
+    days = {}
+
+    def row_for(day):
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        return days.setdefault(day, {'day': day, 'bookings_created': 0, 'bookings_confirmed': 0,
+                                     'bookings_cancelled': 0, 'confirmed_revenue': 0})
+
+    for day, count in db.session.query(created_day, func.count(Booking.id)).group_by(created_day):
+        if day is not None:
+            row_for(day)['bookings_created'] = count
+    for day, confirmed, cancelled, revenue in db.session.query(
+        updated_day,
+        func.sum(case((Booking.status == 'confirmed', 1), else_=0)),
+        func.sum(case((Booking.status == 'cancelled', 1), else_=0)),
+        func.sum(case((Booking.status == 'confirmed', Booking.total_amount), else_=0))
+    ).group_by(updated_day):
+        if day is not None:
+            row = row_for(day)
+            row['bookings_confirmed'] = confirmed or 0
+            row['bookings_cancelled'] = cancelled or 0
+            row['confirmed_revenue'] = revenue or 0
+
+    db.session.execute(db.delete(DailyBookingStats))
+    if days:
+        db.session.execute(db.insert(DailyBookingStats), list(days.values()))
+    db.session.commit()
+    invalidate_dashboard_stats()
+    return len(days)
+
+@click.command('rebuild-daily-stats')
+@with_appcontext
+def rebuild_daily_stats_command():
+    """Recompute the per-day booking rollup used by the admin dashboard"""
+    count = rebuild_daily_stats()
+    click.echo(f'Rebuilt booking rollup for {count} days.')
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for the Hotel Management System
+Builds a production-scale dataset (hotels, rooms, users, multi-year booking
+calendars and reviews) with bulk inserts, for capacity and load testing.
+
+Usage: python dataset_generator.py --hotels 1000 --rooms-per-hotel 50 --users 20000 --years 3 --seed 42
+
+Existing data is dropped, as with sample_data.py.
+"""
+
+import argparse
+import csv
+import io
+import json
+import random
+import time
+from datetime import datetime, date, timedelta
+
+from app import app, db
+from models import User, Hotel, Room, Booking, Review
+from amenities import AMENITIES, amenity_mask
+from ratings import rebuild_ratings
+from dashboard_stats import rebuild_daily_stats
+from inventory import rebuild_inventory
+from geo import encode_geohash
+from password_hashing import password_hasher
+
+BATCH_SIZE = 10000
+
+# (city, state, zip code, latitude, longitude of the centre)
+CITIES = [
+    ('Mumbai', 'Maharashtra', '400001', 19.076, 72.877), ('Udaipur', 'Rajasthan', '313001', 24.585, 73.712),
+    ('Hyderabad', 'Telangana', '500053', 17.385, 78.487), ('Bangalore', 'Karnataka', '560001', 12.972, 77.594),
+    ('Chennai', 'Tamil Nadu', '600034', 13.083, 80.270), ('New Delhi', 'Delhi', '110001', 28.614, 77.209),
+    ('Jaipur', 'Rajasthan', '302001', 26.912, 75.787), ('Goa', 'Goa', '403001', 15.491, 73.828),
+    ('Kolkata', 'West Bengal', '700001', 22.573, 88.364), ('Kochi', 'Kerala', '682001', 9.931, 76.267),
+    ('Agra', 'Uttar Pradesh', '282001', 27.177, 78.008), ('Shimla', 'Himachal Pradesh', '171001', 31.105, 77.173),
+    ('Pune', 'Maharashtra', '411001', 18.520, 73.857), ('Varanasi', 'Uttar Pradesh', '221001', 25.318, 82.974),
+    ('Mysore', 'Karnataka', '570001', 12.296, 76.639),
+]
+# Spread of hotels around a city centre, in degrees (~8 km)
+CITY_SPREAD = 0.07
+NAME_PREFIXES = ['Grand', 'Royal', 'Imperial', 'Lakeview', 'Oceanview', 'Heritage', 'Garden', 'Palace', 'Regency']
+NAME_SUFFIXES = ['Palace', 'Resort', 'Hotel', 'Residency', 'Retreat', 'Towers', 'Manor', 'Suites', 'Court']
+ROOM_TYPES = [
+    {'type': 'Deluxe Room', 'base_price': 15000, 'max_occupancy': 2},
+    {'type': 'Executive Suite', 'base_price': 25000, 'max_occupancy': 2},
+    {'type': 'Presidential Suite', 'base_price': 50000, 'max_occupancy': 4},
+    {'type': 'Garden View Room', 'base_price': 18000, 'max_occupancy': 2},
+    {'type': 'Sea View Room', 'base_price': 22000, 'max_occupancy': 2},
+    {'type': 'Heritage Suite', 'base_price': 35000, 'max_occupancy': 3},
+]
+HOTEL_AMENITIES = [label for code, label, aliases in AMENITIES[:16]]
+ROOM_AMENITIES = [label for code, label, aliases in AMENITIES[9:]]
+REVIEW_TITLES = ['Excellent stay!', 'Perfect luxury experience', 'Outstanding service', 'Beautiful property',
+                 'Good value', 'Could be better', 'Disappointing stay']
+REVIEW_COMMENTS = ['The staff was incredibly attentive and the facilities were top-notch.',
+                   'Beautiful property with excellent service and a spacious room.',
+                   'Great location, although check-in took longer than expected.',
+                   'The room was not as clean as we hoped for the price.']
+
+class BulkWriter:
+    """Writes row batches with COPY on PostgreSQL and executemany everywhere else"""
+
+    def __init__(self, session):
+        self.session = session
+        self.dialect = session.get_bind().dialect.name
+        self.counts = {}
+        self.seconds = {}
+        if self.dialect == 'sqlite':
+            # Durability is irrelevant for a throwaway dataset; syncing every batch dominates load time
+            session.execute(db.text('PRAGMA synchronous = OFF'))
+
+    def write(self, model, rows):
+        if not rows:
+            return
+        started = time.perf_counter()
+        table = model.__table__
+        if self.dialect == 'postgresql':
+            columns = list(rows[0].keys())
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow(['' if row[column] is None else row[column] for column in columns])
+            buffer.seek(0)
+            cursor = self.session.connection().connection.cursor()
+            cursor.copy_expert(f'COPY "{table.name}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+        else:
+            self.session.execute(table.insert(), rows)
+        self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+        self.seconds[table.name] = self.seconds.get(table.name, 0.0) + time.perf_counter() - started
+
+    def fix_sequences(self, *models):
+        """Move PostgreSQL id sequences past explicitly inserted ids"""
+        if self.dialect != 'postgresql':
+            return
+        for model in models:
+            name = model.__table__.name
+            self.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('\"{name}\"', 'id'), COALESCE((SELECT MAX(id) FROM \"{name}\"), 1))"
+            ))
+
+def generate_users(writer, rng, count, now):
+    # One hash shared by every synthetic user, made with the configured parameters
+    password_hash = password_hasher.hash('password123')
+    admin_hash = password_hasher.hash('admin123')
+    batch = [{'id': 1, 'username': 'admin', 'email': 'admin@luxuryhotels.com', 'password_hash': admin_hash,
+              'first_name': 'Admin', 'last_name': 'User', 'phone': '+91 9876543210', 'is_admin': True,
+              'created_at': now}]
+    for user_id in range(2, count + 2):
+        batch.append({
+            'id': user_id, 'username': f'user{user_id - 1}', 'email': f'user{user_id - 1}@example.com',
+            'password_hash': password_hash, 'first_name': f'User{user_id - 1}', 'last_name': 'Test',
+            'phone': f'+91 9{rng.randrange(10 ** 9):09d}', 'is_admin': False,
+            'created_at': now - timedelta(days=rng.randint(0, 1500)),
+        })
+        if len(batch) >= BATCH_SIZE:
+            writer.write(User, batch)
+            batch = []
+    writer.write(User, batch)
+
+def generate_hotels(writer, rng, count, rooms_per_hotel, now):
+    """Insert hotels and rooms, returning (room_id, hotel_id, price, max_occupancy) tuples"""
+    rooms = []
+    hotel_batch, room_batch = [], []
+    room_id = 0
+    for hotel_id in range(1, count + 1):
+        city, state, zip_code, latitude, longitude = rng.choice(CITIES)
+        latitude, longitude = rng.gauss(latitude, CITY_SPREAD), rng.gauss(longitude, CITY_SPREAD)
+        names = rng.sample(HOTEL_AMENITIES, rng.randint(4, 10))
+        hotel_batch.append({
+            'id': hotel_id, 'name': f'{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_SUFFIXES)} {hotel_id}, {city}',
+            'description': f'A luxury hotel in {city} with {", ".join(names[:3]).lower()} and warm hospitality.',
+            'address': f'{rng.randint(1, 300)} Main Road', 'city': city, 'state': state, 'country': 'India',
+            'zip_code': zip_code, 'phone': f'+91 {rng.randrange(10 ** 10):010d}',
+            'email': f'hotel{hotel_id}@luxuryhotels.com', 'website': None, 'star_rating': rng.randint(3, 5),
+            'amenities': json.dumps(names), 'amenity_mask': amenity_mask(names), 'images': None,
+            'is_featured': rng.random() < 0.05, 'is_active': True, 'created_at': now, 'updated_at': now,
+            'latitude': round(latitude, 6), 'longitude': round(longitude, 6),
+            'geohash': encode_geohash(round(latitude, 6), round(longitude, 6)),
+        })
+        for number in range(rooms_per_hotel):
+            room_id += 1
+            room_type = ROOM_TYPES[number % len(ROOM_TYPES)]
+            price = room_type['base_price'] + rng.randint(-2000, 5000)
+            room_names = rng.sample(ROOM_AMENITIES, 4)
+            room_batch.append({
+                'id': room_id, 'hotel_id': hotel_id, 'room_number': f'{number // 20 + 1}{number % 20 + 1:02d}',
+                'room_type': room_type['type'], 'description': f"Luxurious {room_type['type'].lower()}.",
+                'max_occupancy': room_type['max_occupancy'], 'price_per_night': price,
+                'amenities': json.dumps(room_names), 'amenity_mask': amenity_mask(room_names), 'images': None,
+                'is_available': True, 'created_at': now, 'updated_at': now,
+            })
+            rooms.append((room_id, hotel_id, price, room_type['max_occupancy']))
+        if len(room_batch) >= BATCH_SIZE:
+            writer.write(Hotel, hotel_batch)
+            writer.write(Room, room_batch)
+            hotel_batch, room_batch = [], []
+    writer.write(Hotel, hotel_batch)
+    writer.write(Room, room_batch)
+    return rooms
+
+def generate_bookings(writer, rng, rooms, user_count, years, occupancy, now):
+    """Walk each room's calendar, placing back-to-back non-overlapping stays.
+
+    Every booking is created up to 120 days before its check-in, and never after now.
+    Returns (user_id, hotel_id, check_out) for a sample of completed stays, used for reviews.
+    """
+    today = date.today()
+    start = today - timedelta(days=365 * years)
+    horizon = today + timedelta(days=180)
+    # Mean gap between stays that yields the requested occupancy for a 3.5 night mean stay
+    mean_gap = max(0.0, 3.5 * (1 - occupancy) / occupancy)
+    completed = []
+    batch = []
+    for room_id, hotel_id, price, max_occupancy in rooms:
+        day = start + timedelta(days=rng.randint(0, 7))
+        while day < horizon:
+            nights = rng.randint(1, 6)
+            check_in, check_out = day, day + timedelta(days=nights)
+            if check_out <= today:
+                status = 'cancelled' if rng.random() < 0.08 else 'completed'
+                payment_status = 'refunded' if status == 'cancelled' else 'paid'
+            else:
+                roll = rng.random()
+                status = 'cancelled' if roll < 0.05 else 'pending' if roll < 0.25 else 'confirmed'
+                payment_status = 'paid' if status == 'confirmed' else 'pending'
+            # Stays far ahead were all booked recently
+            booked_from = min(datetime.combine(check_in - timedelta(days=120), datetime.min.time()),
+                              now - timedelta(days=1))
+            booked_until = min(datetime.combine(check_in, datetime.min.time()), now)
+            created_at = booked_from + timedelta(seconds=rng.randrange(int((booked_until - booked_from).total_seconds())))
+            user_id = rng.randint(2, user_count + 1)
+            batch.append({
+                'user_id': user_id, 'room_id': room_id, 'check_in_date': check_in, 'check_out_date': check_out,
+                'num_guests': rng.randint(1, max_occupancy), 'total_amount': price * nights, 'status': status,
+                'special_requests': None, 'payment_status': payment_status,
+                'payment_method': rng.choice(['Credit Card', 'UPI', 'Net Banking']) if payment_status != 'pending' else None,
+                'payment_reference': None, 'created_at': created_at, 'updated_at': created_at,
+            })
+            if status == 'completed' and rng.random() < 0.1:
+                completed.append((user_id, hotel_id, check_out))
+            if len(batch) >= BATCH_SIZE:
+                writer.write(Booking, batch)
+                batch = []
+            day = check_out + timedelta(days=int(rng.expovariate(1 / mean_gap)) if mean_gap else 0)
+    writer.write(Booking, batch)
+    return completed
+
+def generate_reviews(writer, rng, completed_stays, reviews_per_hotel, hotel_count, now):
+    rng.shuffle(completed_stays)
+    limit = reviews_per_hotel * hotel_count
+    batch = []
+    for user_id, hotel_id, check_out in completed_stays[:limit]:
+        rating = rng.choices([1, 2, 3, 4, 5], weights=[3, 5, 15, 40, 37])[0]
+        batch.append({
+            'user_id': user_id, 'hotel_id': hotel_id, 'rating': rating,
+            'title': REVIEW_TITLES[min(5 - rating, len(REVIEW_TITLES) - 1)], 'comment': rng.choice(REVIEW_COMMENTS),
+            'is_verified': rng.random() < 0.9,
+            # Written within two weeks of check-out, and not yet for the most recent stays
+            'created_at': min(datetime.combine(check_out, datetime.min.time()) + timedelta(days=rng.randint(0, 14)),
+                              now),
+        })
+        if len(batch) >= BATCH_SIZE:
+            writer.write(Review, batch)
+            batch = []
+    writer.write(Review, batch)
+
+def generate_dataset(hotels=100, rooms_per_hotel=30, users=5000, years=2, reviews_per_hotel=20,
+                     occupancy=0.7, seed=42, create_schema=None):
+    """Drop and regenerate the database with a synthetic dataset, returning per-table row counts and timings.
+
+    The schema is built with db.create_all unless create_schema, e.g. one
+    running the migrations, is given.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with app.app_context():
+        db.drop_all()
+        (create_schema or db.create_all)()
+        writer = BulkWriter(db.session)
+
+        generate_users(writer, rng, users, now)
+        rooms = generate_hotels(writer, rng, hotels, rooms_per_hotel, now)
+        completed = generate_bookings(writer, rng, rooms, users, years, occupancy, now)
+        generate_reviews(writer, rng, completed, reviews_per_hotel, hotels, now)
+        writer.fix_sequences(User, Hotel, Room)
+        db.session.commit()
+
+        # Bulk inserts bypass the ORM events that maintain derived tables
+        started = time.perf_counter()
+        rebuild_ratings()
+        rebuild_daily_stats()
+        rebuild_inventory()
+        writer.seconds['derived tables'] = time.perf_counter() - started
+        return writer.counts, writer.seconds
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic hotel dataset with bulk inserts')
+    parser.add_argument('--hotels', type=int, default=100)
+    parser.add_argument('--rooms-per-hotel', type=int, default=30)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=2, help='years of booking history before today')
+    parser.add_argument('--reviews-per-hotel', type=int, default=20)
+    parser.add_argument('--occupancy', type=float, default=0.7, help='target share of booked room nights')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts, seconds = generate_dataset(args.hotels, args.rooms_per_hotel, args.users, args.years,
+                                       args.reviews_per_hotel, args.occupancy, args.seed)
+    elapsed = time.perf_counter() - started
+
+    print(f"{'table':<16} {'rows':>12} {'seconds':>9} {'rows/sec':>12}")
+    for table, count in counts.items():
+        print(f'{table:<16} {count:>12,} {seconds[table]:>9.2f} {count / max(seconds[table], 1e-9):>12,.0f}')
+    print(f"{'derived tables':<16} {'':>12} {seconds['derived tables']:>9.2f}")
+    total = sum(counts.values())
+    print(f"{'total':<16} {total:>12,} {elapsed:>9.2f} {total / elapsed:>12,.0f}")
+
+if __name__ == '__main__':
+    main()
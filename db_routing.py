@@ -0,0 +1,88 @@
+from flask import g, has_request_context, session as flask_session, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from itsdangerous import BadSignature
+from collections import Counter
+from functools import wraps
+import threading
+import time
+
+REPLICA_BIND = 'replica'
+DEFAULT_STICKY_SECONDS = 10
+
+# Signed-cookie key holding the time until which this client reads from the primary
+_STICKY_KEY = '_primary_until'
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+def _count(name):
+    with _metrics_lock:
+        _metrics[name] += 1
+
+class RoutingSession(Session):
+    """Session that sends the SELECTs of replica-routed views to the replica bind.
+
+    Everything else goes to the primary: writes and flushes, reads outside
+    those views, reads after this session has written, and every read of a
+    client still inside its read-your-writes window.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            _count('replica')
+            return self._db.engines[REPLICA_BIND]
+        if clause is not None and getattr(clause, 'is_dml', False):
+            self.info['wrote'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        if clause is None or not getattr(clause, 'is_select', False):
+            return False
+        if self._flushing or self.info.get('wrote') or not has_request_context():
+            return False
+        return g.get('db_route') == REPLICA_BIND and REPLICA_BIND in self._db.engines
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _session_flushed(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _session_committed(session):
+    # The replica may lag behind this commit; keep the client on the primary meanwhile
+    if session.info.get('wrote') and has_request_context() and REPLICA_BIND in session._db.engines:
+        seconds = current_app.config.get('REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+        flask_session[_STICKY_KEY] = time.time() + seconds
+
+def reads_from_replica(view):
+    """Serve this view's queries from the replica bind, when one is configured"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if REPLICA_BIND not in (current_app.config.get('SQLALCHEMY_BINDS') or {}):
+            return view(*args, **kwargs)
+        if flask_session.get(_STICKY_KEY, 0) > time.time():
+            _count('sticky')
+            return view(*args, **kwargs)
+        # Set for the whole app context, so streamed responses keep reading the replica
+        g.db_route = REPLICA_BIND
+        return view(*args, **kwargs)
+    return wrapped
+
+def pinned_to_primary(app, cookie):
+    """Whether a client is inside its read-your-writes window, read from its raw Flask session cookie.
+
+    For servers running outside the Flask request cycle (asgi.py), which must
+    route reads the same way reads_from_replica does.
+    """
+    serializer = app.session_interface.get_signing_serializer(app)
+    if not cookie or serializer is None:
+        return False
+    try:
+        data = serializer.loads(cookie, max_age=int(app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return False
+    return data.get(_STICKY_KEY, 0) > time.time()
+
+def stats():
+    with _metrics_lock:
+        return {'replica_statements': _metrics['replica'], 'sticky_requests': _metrics['sticky']}
@@ -0,0 +1,154 @@
+from models import User, Hotel, Room, Booking, Review, db
+from flask.cli import with_appcontext
+from datetime import datetime, date, timedelta
+import click
+import csv
+import io
+import json
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+BATCH_SIZE = 1000
+
+# Export columns are labelled flat, so CSV headers and NDJSON keys match
+
+def _before_day_after(column, end):
+    # Inclusive end date for a timestamp: everything before the next midnight,
+    # including the last microsecond that datetime.max.time() would leave out
+    return column < datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+def booking_export_query(start=None, end=None, statuses=None, date_field='check_in'):
+    """Bookings joined to their guest, room and hotel; start/end bound check-in or creation date"""
+    query = db.select(
+        Booking.id.label('booking_id'),
+        Booking.status,
+        Booking.payment_status,
+        Booking.payment_method,
+        Booking.check_in_date,
+        Booking.check_out_date,
+        Booking.num_guests,
+        Booking.total_amount,
+        Booking.created_at,
+        User.id.label('user_id'),
+        User.username,
+        User.email,
+        User.first_name,
+        User.last_name,
+        Hotel.id.label('hotel_id'),
+        Hotel.name.label('hotel_name'),
+        Hotel.city.label('hotel_city'),
+        Room.id.label('room_id'),
+        Room.room_number,
+        Room.room_type,
+    ).join(User, User.id == Booking.user_id).join(Room, Room.id == Booking.room_id) \
+        .join(Hotel, Hotel.id == Room.hotel_id)
+
+    column = Booking.created_at if date_field == 'created' else Booking.check_in_date
+    if start:
+        query = query.where(column >= start)
+    if end:
+        # Inclusive end date, also for the created_at timestamp
+        query = query.where(_before_day_after(column, end) if date_field == 'created' else column <= end)
+    if statuses:
+        query = query.where(Booking.status.in_(statuses))
+    return query.order_by(Booking.id)
+
+def review_export_query(start=None, end=None, verified=None, hotel_id=None):
+    """Reviews joined to their hotel and author; start/end bound the review date"""
+    query = db.select(
+        Review.id.label('review_id'),
+        Review.rating,
+        Review.title,
+        Review.comment,
+        Review.is_verified,
+        Review.created_at,
+        Hotel.id.label('hotel_id'),
+        Hotel.name.label('hotel_name'),
+        Hotel.city.label('hotel_city'),
+        User.id.label('user_id'),
+        User.username,
+    ).join(Hotel, Hotel.id == Review.hotel_id).join(User, User.id == Review.user_id)
+
+    if start:
+        query = query.where(Review.created_at >= start)
+    if end:
+        query = query.where(_before_day_after(Review.created_at, end))
+    if verified is not None:
+        query = query.where(Review.is_verified == verified)
+    if hotel_id:
+        query = query.where(Review.hotel_id == hotel_id)
+    return query.order_by(Review.id)
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def stream_rows(query, export_format='csv', batch_size=BATCH_SIZE):
+    """Yield the query's rows as CSV or NDJSON text, one chunk per batch.
+
+    Rows come from a server-side cursor (yield_per), so memory use stays
+    constant however large the table is.
+    """
+    result = db.session.execute(query.execution_options(yield_per=batch_size, stream_results=True))
+    columns = list(result.keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == 'csv':
+        writer.writerow(columns)
+
+    for partition in result.partitions():
+        for row in partition:
+            if export_format == 'csv':
+                writer.writerow([_value(value) for value in row])
+            else:
+                buffer.write(json.dumps({column: _value(value) for column, value in zip(columns, row)},
+                                        separators=(',', ':')))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty CSV export
+        yield buffer.getvalue()
+
+def parse_statuses(value):
+    return [status.strip() for status in value.split(',') if status.strip()] if value else None
+
+def _write(query, export_format, output):
+    handle = open(output, 'w', newline='') if output else click.get_text_stream('stdout')
+    try:
+        for chunk in stream_rows(query, export_format):
+            handle.write(chunk)
+    finally:
+        if output:
+            handle.close()
+
+_date_option = click.DateTime(formats=['%Y-%m-%d'])
+
+@click.command('export-bookings')
+@click.option('--format', 'export_format', type=click.Choice(EXPORT_FORMATS), default='csv')
+@click.option('--start', type=_date_option, help='first date to include')
+@click.option('--end', type=_date_option, help='last date to include')
+@click.option('--date-field', type=click.Choice(['check_in', 'created']), default='check_in',
+              help='date the start/end bounds apply to')
+@click.option('--status', help='comma separated booking statuses')
+@click.option('--output', type=click.Path(dir_okay=False), help='file to write (default: stdout)')
+@with_appcontext
+def export_bookings_command(export_format, start, end, date_field, status, output):
+    """Stream bookings with guest, room and hotel details as CSV or NDJSON"""
+    query = booking_export_query(start.date() if start else None, end.date() if end else None,
+                                 parse_statuses(status), date_field)
+    _write(query, export_format, output)
+
+@click.command('export-reviews')
+@click.option('--format', 'export_format', type=click.Choice(EXPORT_FORMATS), default='csv')
+@click.option('--start', type=_date_option, help='first review date to include')
+@click.option('--end', type=_date_option, help='last review date to include')
+@click.option('--verified/--unverified', default=None, help='only verified or only unverified reviews')
+@click.option('--hotel-id', type=int)
+@click.option('--output', type=click.Path(dir_okay=False), help='file to write (default: stdout)')
+@with_appcontext
+def export_reviews_command(export_format, start, end, verified, hotel_id, output):
+    """Stream reviews with hotel and author details as CSV or NDJSON"""
+    query = review_export_query(start.date() if start else None, end.date() if end else None, verified, hotel_id)
+    _write(query, export_format, output)
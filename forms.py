@@ -19,17 +19,19 @@ class RegisterForm(FlaskForm):
     password2 = PasswordField('Confirm Password', validators=[DataRequired(), EqualTo('password')])
     submit = SubmitField('Register')
 
-    def validate_username(self, username):
-        from models import User
-        user = User.query.filter_by(username=username.data).first()
-        if user:
-            raise ValidationError('Username already exists. Please choose a different one.')
-
-    def validate_email(self, email):
-        from models import User
-        user = User.query.filter_by(email=email.data).first()
-        if user:
-            raise ValidationError('Email already registered. Please use a different email.')
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+        # One lookup covers both uniqueness checks
+        from models import User, db
+        taken = db.session.query(User.username, User.email).filter(
+            db.or_(User.username == self.username.data, User.email == self.email.data)
+        ).all()
+        if any(username == self.username.data for username, email in taken):
+            self.username.errors.append('Username already exists. Please choose a different one.')
+        if any(email == self.email.data for username, email in taken):
+            self.email.errors.append('Email already registered. Please use a different email.')
+        return not taken
 
 class BookingForm(FlaskForm):
     check_in_date = DateField('Check-in Date', validators=[DataRequired()])
@@ -0,0 +1,359 @@
+from models import Hotel, db
+from pagination import KeysetPage, encode_cursor, decode_cursor
+from sqlalchemy import event, inspect, column, Float, Integer
+from sqlalchemy.orm import Session, object_session
+from flask.cli import with_appcontext
+import click
+import math
+import numpy as np
+import threading
+import time
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9  # ~5 m cells stored on each hotel
+MAX_RADIUS_KM = 500
+DEFAULT_RADIUS_KM = 10
+MAX_NEAREST = 100
+
+# Database lookups cover the search circle with at most this many geohash prefixes
+MAX_COVER_CELLS = 16
+# Grid cell size of the in-memory index (~28 km north-south)
+CELL_DEGREES = 0.25
+# Most candidates checked against the SQL filters per round trip
+CANDIDATE_BATCH = 500
+DEFAULT_TTL = 300
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point: a prefix of it names every coarser cell containing the point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+def _cell_size(precision):
+    """(height, width) in degrees of a geohash cell"""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+def _bounding_box(latitude, longitude, radius_km):
+    """(min lat, max lat, min lon, max lon) around a circle; longitudes may pass +-180"""
+    angle = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angle)
+    if abs(latitude) + delta_lat >= 90 or angle >= math.pi / 2:
+        return max(latitude - delta_lat, -90.0), min(latitude + delta_lat, 90.0), -180.0, 180.0
+    delta_lon = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(latitude))))
+    return latitude - delta_lat, latitude + delta_lat, longitude - delta_lon, longitude + delta_lon
+
+def _grid_span(low, high, size, offset, count, wrap):
+    """Grid indexes from low to high, as a range (count cells around the axis)"""
+    first, last = math.floor((low + offset) / size), math.floor((high + offset) / size)
+    if wrap:
+        return range(count) if last - first + 1 >= count else range(first, last + 1)
+    return range(max(first, 0), min(last, count - 1) + 1)
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together cover the search circle"""
+    min_lat, max_lat, min_lon, max_lon = _bounding_box(latitude, longitude, radius_km)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        rows = _grid_span(min_lat, max_lat, height, 90, round(180 / height), wrap=False)
+        cols = _grid_span(min_lon, max_lon, width, 180, round(360 / width), wrap=True)
+        if len(rows) * len(cols) <= MAX_COVER_CELLS or precision == 1:
+            # Cell centres; encoding wraps longitudes past +-180 back into range
+            return sorted({encode_geohash((row + 0.5) * height - 90, ((col + 0.5) * width) % 360 - 180, precision)
+                           for row in rows for col in cols})
+
+def _next_prefix(prefix):
+    """First geohash after every hash starting with prefix, or None when nothing sorts after it"""
+    stripped = prefix.rstrip(_BASE32[-1])
+    if not stripped:
+        return None
+    return stripped[:-1] + _BASE32[_BASE32.index(stripped[-1]) + 1]
+
+def geohash_ranges(prefixes):
+    """[low, high) ranges covering the cells of prefixes, adjacent cells merged; high may be None"""
+    ranges = []
+    for prefix in sorted(prefixes):
+        # A cell starts where the last one ended, e.g. 'tsz' runs up to 'tt', where 'tt0' begins
+        if ranges and ranges[-1][1] == prefix.rstrip(_BASE32[0]):
+            ranges[-1][1] = _next_prefix(prefix)
+        else:
+            ranges.append([prefix, _next_prefix(prefix)])
+    return [tuple(bounds) for bounds in ranges]
+
+def geohash_filter(latitude, longitude, radius_km):
+    """Filter clause for hotels in the covering cells: index range scans over Hotel.geohash"""
+    # Bounds stay within the base32 alphabet, whose characters sort the same under
+    # any collation, so no bound relies on byte order
+    return db.or_(*[db.and_(Hotel.geohash >= low, *([Hotel.geohash < high] if high else []))
+                    for low, high in geohash_ranges(covering_prefixes(latitude, longitude, radius_km))])
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distances from one point to arrays of points, all in degrees"""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((latitudes - lat) / 2) ** 2 + math.cos(lat) * np.cos(latitudes) * np.sin((longitudes - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+class GeoIndex:
+    """Hotel coordinates bucketed into a CELL_DEGREES grid.
+
+    A lookup reads only the cells overlapping the search box and measures
+    exact great-circle distances within them, vectorized with numpy.
+    """
+
+    def __init__(self, ids, latitudes, longitudes, cell_degrees=CELL_DEGREES):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.cell_degrees = cell_degrees
+        self.rows, self.cols = math.ceil(180 / cell_degrees), math.ceil(360 / cell_degrees)
+
+        keys = self._row(self.latitudes) * self.cols + self._col(self.longitudes)
+        order = np.argsort(keys, kind='stable')
+        unique, starts = np.unique(keys[order], return_index=True)
+        self.cells = dict(zip(unique.tolist(), np.split(order, starts[1:]))) if len(order) else {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, latitudes):
+        return np.clip(np.floor((latitudes + 90) / self.cell_degrees).astype(np.int64), 0, self.rows - 1)
+
+    def _col(self, longitudes):
+        return np.floor((longitudes + 180) / self.cell_degrees).astype(np.int64) % self.cols
+
+    def within(self, latitude, longitude, radius_km):
+        """(ids, distances) of the points within radius_km, nearest first (ties by id)"""
+        min_lat, max_lat, min_lon, max_lon = _bounding_box(latitude, longitude, radius_km)
+        rows = _grid_span(min_lat, max_lat, self.cell_degrees, 90, self.rows, wrap=False)
+        cols = [col % self.cols for col in _grid_span(min_lon, max_lon, self.cell_degrees, 180, self.cols, wrap=True)]
+        if len(rows) * len(cols) > len(self.cells):
+            # Wide searches over a sparse grid: walk the occupied cells instead
+            wanted_cols = set(cols)
+            keys = [key for key in self.cells if key // self.cols in rows and key % self.cols in wanted_cols]
+        else:
+            keys = [row * self.cols + col for row in rows for col in cols]
+        buckets = [self.cells[key] for key in keys if key in self.cells]
+        if not buckets:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        positions = np.concatenate(buckets)
+        distances = haversine_km(latitude, longitude, self.latitudes[positions], self.longitudes[positions])
+        inside = distances <= radius_km
+        positions, distances = positions[inside], distances[inside]
+        order = np.lexsort((self.ids[positions], distances))
+        return self.ids[positions][order], distances[order]
+
+def nearest_first(within, latitude, longitude, max_km, start_km=DEFAULT_RADIUS_KM):
+    """Yield (hotel_id, distance_km) nearest first up to max_km, widening the search in rings"""
+    previous = -1.0
+    radius = min(start_km, max_km)
+    while True:
+        ids, distances = within(latitude, longitude, radius)
+        fresh = distances > previous
+        yield from zip(ids[fresh].tolist(), distances[fresh].tolist())
+        if radius >= max_km:
+            return
+        previous, radius = radius, min(radius * 4, max_km)
+
+def database_within(latitude, longitude, radius_km):
+    """GeoIndex.within answered from the geohash column instead of memory"""
+    # Inactive hotels are dropped here rather than in SQL, so no planner picks the
+    # is_active index over the geohash ranges
+    rows = [row[:3] for row in db.session.execute(
+        db.select(Hotel.id, Hotel.latitude, Hotel.longitude, Hotel.is_active)
+        .where(geohash_filter(latitude, longitude, radius_km))
+    ) if row[3]]
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    ids, latitudes, longitudes = zip(*rows)
+    return GeoIndex(ids, latitudes, longitudes).within(latitude, longitude, radius_km)
+
+class HotelGeoIndex:
+    """Process-wide GeoIndex of active hotels, rebuilt after hotel commits or every GEO_INDEX_TTL seconds.
+
+    With GEO_INDEX_BACKEND=database lookups read the geohash column instead.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.ttl = DEFAULT_TTL
+        self._index = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.setdefault('GEO_INDEX_BACKEND', 'memory') == 'memory'
+        self.ttl = app.config.setdefault('GEO_INDEX_TTL', DEFAULT_TTL)
+
+    def invalidate(self):
+        self._index = None
+
+    def _stale(self):
+        return self._index is None or time.monotonic() - self._built_at > self.ttl
+
+    def index(self):
+        index = self._index
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    rows = db.session.execute(
+                        db.select(Hotel.id, Hotel.latitude, Hotel.longitude)
+                        .where(Hotel.is_active == True, Hotel.latitude.isnot(None), Hotel.longitude.isnot(None))
+                    ).all()
+                    ids, latitudes, longitudes = zip(*rows) if rows else ((), (), ())
+                    self._index = GeoIndex(ids, latitudes, longitudes)
+                    self._built_at = time.monotonic()
+                index = self._index
+        return index
+
+    def within(self, latitude, longitude, radius_km):
+        if not self.enabled:
+            return database_within(latitude, longitude, radius_km)
+        return self.index().within(latitude, longitude, radius_km)
+
+    def stats(self):
+        index = self._index
+        return {'backend': 'memory' if self.enabled else 'database',
+                'hotels': len(index) if index is not None else 0,
+                'cells': len(index.cells) if index is not None else 0,
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if index is not None else None}
+
+geo_index = HotelGeoIndex()
+
+def parse_near(args):
+    """(latitude, longitude, radius_km, nearest) from ?lat=&lon=&radius_km=&nearest=, or None"""
+    try:
+        latitude, longitude = float(args.get('lat')), float(args.get('lon'))
+        radius = float(args['radius_km']) if args.get('radius_km') else None
+        nearest = int(args['nearest']) if args.get('nearest') else None
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    if radius is None:
+        radius = MAX_RADIUS_KM if nearest else DEFAULT_RADIUS_KM
+    radius = min(max(radius, 0.01), MAX_RADIUS_KM)
+    if nearest is not None:
+        nearest = min(max(nearest, 1), MAX_NEAREST)
+    return latitude, longitude, radius, nearest
+
+# Cursor of a distance-ordered page: the last (distance, id) and how many hotels came before it
+_CURSOR_COLUMNS = (column('distance', Float), column('id', Integer), column('rank', Integer))
+
+def nearby_page(query, near, cursor=None, per_page=20):
+    """Page a Hotel query nearest first; items are (hotel, distance_km) pairs.
+
+    Candidates stream out of the geo index in distance order and are checked
+    against the query's filters (city, amenities, availability) in batches, so
+    a page costs a few primary-key lookups however large the radius.
+    """
+    latitude, longitude, radius, nearest = near
+    after = decode_cursor(cursor, _CURSOR_COLUMNS)
+    rank = after[2] if after else 0
+    wanted = per_page + 1 if nearest is None else min(per_page + 1, nearest - rank)
+
+    candidates = nearest_first(geo_index.within, latitude, longitude, radius)
+    if after:
+        candidates = (item for item in candidates if (item[1], item[0]) > (after[0], after[1]))
+    items, exhausted, size = [], False, max(wanted, 1)
+    while len(items) < wanted and not exhausted:
+        # Start with just enough candidates, so nearest-first rings widen only as far as needed
+        batch = []
+        for item in candidates:
+            batch.append(item)
+            if len(batch) == size:
+                break
+        exhausted = len(batch) < size
+        size = min(size * 2, CANDIDATE_BATCH)
+        if batch:
+            hotels = {hotel.id: hotel for hotel in
+                      query.filter(Hotel.id.in_([hotel_id for hotel_id, distance in batch]))}
+            items.extend((hotels[hotel_id], distance) for hotel_id, distance in batch if hotel_id in hotels)
+
+    items = items[:max(wanted, 0)]
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        hotel, distance = items[-1]
+        next_cursor = encode_cursor([distance, hotel.id, rank + per_page])
+    return KeysetPage(items, per_page, next_cursor=next_cursor, cursor=cursor if after else None,
+                      page=rank // per_page + 1)
+
+# The geohash is derived from the coordinates on write, like amenity masks
+
+def _sync_geohash(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.latitude.history.has_changes() or state.attrs.longitude.history.has_changes() \
+            or (target.geohash is None and target.latitude is not None):
+        has_point = target.latitude is not None and target.longitude is not None
+        target.geohash = encode_geohash(target.latitude, target.longitude) if has_point else None
+
+event.listen(Hotel, 'before_insert', _sync_geohash)
+event.listen(Hotel, 'before_update', _sync_geohash)
+
+def _mark_changed(target):
+    # The in-memory index is rebuilt once the change commits
+    session = object_session(target)
+    if session is not None:
+        session.info['geo_changed'] = True
+
+@event.listens_for(Hotel, 'after_update')
+def _hotel_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in ('latitude', 'longitude', 'is_active')):
+        _mark_changed(target)
+
+event.listen(Hotel, 'after_insert', lambda mapper, connection, target: _mark_changed(target))
+event.listen(Hotel, 'after_delete', lambda mapper, connection, target: _mark_changed(target))
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    if session.info.pop('geo_changed', None):
+        geo_index.invalidate()
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    session.info.pop('geo_changed', None)
+
+def rebuild_geohashes(batch_size=1000):
+    """Recompute every hotel's geohash from its coordinates"""
+    updated = 0
+    batch = []
+    rows = db.session.execute(db.select(Hotel.id, Hotel.latitude, Hotel.longitude)
+                              .execution_options(yield_per=batch_size))
+    for hotel_id, latitude, longitude in rows:
+        has_point = latitude is not None and longitude is not None
+        batch.append({'id': hotel_id, 'geohash': encode_geohash(latitude, longitude) if has_point else None})
+        if len(batch) >= batch_size:
+            db.session.execute(db.update(Hotel), batch)
+            updated += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(db.update(Hotel), batch)
+        updated += len(batch)
+    db.session.commit()
+    return updated
+
+@click.command('rebuild-geohashes')
+@with_appcontext
+def rebuild_geohashes_command():
+    """Recompute hotel geohashes from their latitude and longitude"""
+    count = rebuild_geohashes()
+    click.echo(f'Rebuilt geohashes for {count} hotels.')
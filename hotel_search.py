@@ -0,0 +1,137 @@
+from models import Hotel, db
+from sqlalchemy import event, DDL, text, literal, Float, Integer
+from flask.cli import with_appcontext
+import click
+import difflib
+import re
+
+# Relative bm25 weights of the indexed columns: name, city, description
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+# Expressions shared by the PostgreSQL indexes and the queries that must match them
+PG_DOCUMENT = "to_tsvector('simple', name || ' ' || city || ' ' || description)"
+PG_TITLE = "(name || ' ' || city)"
+
+# SQLite: external-content FTS5 table over hotel, kept in sync by triggers
+_sqlite_ddl = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS hotel_fts USING fts5("
+    "name, city, description, content='hotel', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS hotel_fts_vocab USING fts5vocab(hotel_fts, 'row')",
+    "CREATE TRIGGER IF NOT EXISTS hotel_fts_ai AFTER INSERT ON hotel BEGIN "
+    "INSERT INTO hotel_fts(rowid, name, city, description) VALUES (new.id, new.name, new.city, new.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS hotel_fts_ad AFTER DELETE ON hotel BEGIN "
+    "INSERT INTO hotel_fts(hotel_fts, rowid, name, city, description) "
+    "VALUES ('delete', old.id, old.name, old.city, old.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS hotel_fts_au AFTER UPDATE OF name, city, description ON hotel BEGIN "
+    "INSERT INTO hotel_fts(hotel_fts, rowid, name, city, description) "
+    "VALUES ('delete', old.id, old.name, old.city, old.description); "
+    "INSERT INTO hotel_fts(rowid, name, city, description) VALUES (new.id, new.name, new.city, new.description); "
+    "END",
+    "INSERT INTO hotel_fts(hotel_fts) VALUES ('rebuild')",
+]
+
+# PostgreSQL: expression indexes, maintained by the database on every write
+_postgresql_ddl = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS ix_hotel_search_tsv ON hotel USING gin ({PG_DOCUMENT})',
+    f'CREATE INDEX IF NOT EXISTS ix_hotel_search_trgm ON hotel USING gin ({PG_TITLE} gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_hotel_city_trgm ON hotel USING gin (city gin_trgm_ops)',
+]
+
+for statement in _sqlite_ddl:
+    event.listen(Hotel.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in ('DROP TABLE IF EXISTS hotel_fts_vocab', 'DROP TABLE IF EXISTS hotel_fts'):
+    event.listen(Hotel.__table__, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+for statement in _postgresql_ddl:
+    event.listen(Hotel.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())
+
+def _correct_term(term):
+    """Replace a term absent from the index with its closest indexed spelling"""
+    upper = term + '\uffff'
+    # Declared as textual SELECTs so db_routing can send them to a read replica
+    if db.session.execute(
+        text('SELECT 1 FROM hotel_fts_vocab WHERE term >= :term AND term < :upper LIMIT 1').columns(),
+        {'term': term, 'upper': upper}
+    ).first():
+        return term
+
+    # Only compare against terms sharing the first letter to keep the candidate set small
+    candidates = db.session.execute(
+        text('SELECT term FROM hotel_fts_vocab WHERE term >= :first AND term < :upper').columns(),
+        {'first': term[0], 'upper': term[0] + '\uffff'}
+    ).scalars().all()
+    matches = difflib.get_close_matches(term, candidates, n=1, cutoff=0.75)
+    return matches[0] if matches else term
+
+def _fts_expression(terms, column=None):
+    prefix = f'{column} : ' if column else ''
+    return ' '.join(f'{prefix}"{_correct_term(term)}"*' for term in terms)
+
+def ranked_matches(query):
+    """Return a (id, score) subquery of hotels matching the query, higher score first, or None"""
+    terms = _terms(query)
+    if not terms:
+        return None
+
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        return text(
+            f'SELECT rowid AS id, -bm25(hotel_fts, {weights}) AS score '
+            'FROM hotel_fts WHERE hotel_fts MATCH :match'
+        ).bindparams(match=_fts_expression(terms)).columns(id=Integer, score=Float).subquery('matches')
+
+    if dialect == 'postgresql':
+        # Full-text rank plus trigram word similarity, so misspelt names still match
+        return text(
+            f"SELECT id, ts_rank({PG_DOCUMENT}, plainto_tsquery('simple', :query)) * 2 "
+            f'+ word_similarity(:query, {PG_TITLE}) AS score FROM hotel '
+            f"WHERE {PG_DOCUMENT} @@ plainto_tsquery('simple', :query) OR :query <% {PG_TITLE}"
+        ).bindparams(query=query).columns(id=Integer, score=Float).subquery('matches')
+
+    return db.select(Hotel.id, literal(1.0).label('score')).where(
+        db.or_(
+            Hotel.name.ilike(f'%{query}%'),
+            Hotel.city.ilike(f'%{query}%'),
+            Hotel.description.ilike(f'%{query}%')
+        )
+    ).subquery('matches')
+
+def city_filter(city):
+    """Filter clause matching hotels whose city contains the given text"""
+    terms = _terms(city)
+    if terms and _dialect() == 'sqlite':
+        return Hotel.id.in_(
+            text('SELECT rowid FROM hotel_fts WHERE hotel_fts MATCH :match')
+            .bindparams(match=_fts_expression(terms, column='city'))
+            .columns(rowid=Integer)
+        )
+    # PostgreSQL serves this from the ix_hotel_city_trgm index
+    return Hotel.city.ilike(f'%{city}%')
+
+def rebuild_search_index():
+    """Recreate the search structures and reindex every hotel"""
+    dialect = _dialect()
+    statements = _sqlite_ddl if dialect == 'sqlite' else _postgresql_ddl if dialect == 'postgresql' else []
+    for statement in statements:
+        db.session.execute(text(statement))
+    if dialect == 'postgresql':
+        db.session.execute(text('REINDEX INDEX ix_hotel_search_tsv'))
+        db.session.execute(text('REINDEX INDEX ix_hotel_search_trgm'))
+    db.session.commit()
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuild the hotel full-text search index"""
+    rebuild_search_index()
+    click.echo('Hotel search index rebuilt.')
@@ -0,0 +1,236 @@
+from models import Room, Booking, RoomInventory, BLOCKING_STATUSES, db
+from analytics import expand_nights
+from sqlalchemy import event, inspect, func
+from sqlalchemy.orm import Session, object_session
+from flask.cli import with_appcontext
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+import click
+
+DEFAULT_HORIZON_DAYS = 365
+
+# room_inventory holds one row per (hotel, room type, night): how many rooms
+# of that type the hotel sells and how many are held by blocking bookings.
+# Booking and room writes adjust it inside the same flush, so it commits or
+# rolls back together with the change that caused it.
+
+def _segment_total(connection, hotel_id, room_type):
+    return connection.execute(
+        db.select(func.count(Room.id)).where(Room.hotel_id == hotel_id, Room.room_type == room_type,
+                                             Room.is_available == True)
+    ).scalar()
+
+def _stay_nights(check_in, check_out):
+    if check_in is None or check_out is None:
+        return []
+    return [check_in + timedelta(days=offset) for offset in range((check_out - check_in).days)]
+
+def _apply(connection, hotel_id, room_type, deltas):
+    """Add {night: delta} to the sold counts of one segment, creating missing rows"""
+    if not deltas:
+        return
+    total = _segment_total(connection, hotel_id, room_type)
+    rows = [{'hotel_id': hotel_id, 'room_type': room_type, 'night': night, 'total': total, 'sold': delta}
+            for night, delta in deltas.items()]
+
+    table = RoomInventory.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.hotel_id, table.c.room_type, table.c.night],
+            set_={'sold': table.c.sold + statement.excluded.sold}
+        ), rows)
+        return
+
+    for row in rows:
+        updated = connection.execute(table.update().where(
+            table.c.hotel_id == hotel_id, table.c.room_type == room_type, table.c.night == row['night']
+        ).values(sold=table.c.sold + row['sold']))
+        if not updated.rowcount:
+            connection.execute(table.insert().values(**row))
+
+def _apply_rooms(connection, deltas_by_room):
+    """Apply {room_id: {night: delta}}, one upsert per segment however many rooms it covers"""
+    by_segment = defaultdict(Counter)
+    for room_id, hotel_id, room_type in connection.execute(
+        db.select(Room.id, Room.hotel_id, Room.room_type).where(Room.id.in_(list(deltas_by_room)))
+    ):
+        by_segment[(hotel_id, room_type)].update(deltas_by_room[room_id])
+    for (hotel_id, room_type), nights in by_segment.items():
+        _apply(connection, hotel_id, room_type, {night: delta for night, delta in nights.items() if delta})
+
+def _adjust(booking, room_id, check_in, check_out, delta):
+    """Queue delta for every night of a stay; the flush applies them together"""
+    session = object_session(booking)
+    if session is not None and room_id is not None:
+        pending = session.info.setdefault('inventory_deltas', defaultdict(Counter))
+        pending[room_id].update({night: delta for night in _stay_nights(check_in, check_out)})
+
+def _refresh_totals(connection, hotel_id, room_type):
+    """Re-count the rooms of a segment on every night it has a row for.
+
+    Past nights included: like rebuild_inventory and verify_inventory, totals
+    always reflect the rooms as they are now.
+    """
+    table = RoomInventory.__table__
+    connection.execute(table.update().where(
+        table.c.hotel_id == hotel_id, table.c.room_type == room_type
+    ).values(total=_segment_total(connection, hotel_id, room_type)))
+
+def release_bookings(connection, booking_ids):
+    """Return the nights of bookings that left a blocking status through a bulk UPDATE"""
+    released = defaultdict(Counter)
+    for hotel_id, room_type, check_in, check_out in connection.execute(
+        db.select(Room.hotel_id, Room.room_type, Booking.check_in_date, Booking.check_out_date)
+        .join(Room, Room.id == Booking.room_id).where(Booking.id.in_(booking_ids))
+    ):
+        released[(hotel_id, room_type)].update(_stay_nights(check_in, check_out))
+    for (hotel_id, room_type), nights in released.items():
+        _apply(connection, hotel_id, room_type, {night: -count for night, count in nights.items()})
+
+def _previous(state, key):
+    history = state.attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(state.object, key)
+
+def _load_old_value(target, value, oldvalue, initiator):
+    pass
+
+# Setting an attribute of an expired object (e.g. after a commit) records no old value,
+# so an update could not tell which nights to release; active history loads it first
+for _key in ('status', 'room_id', 'check_in_date', 'check_out_date'):
+    event.listen(getattr(Booking, _key), 'set', _load_old_value, active_history=True)
+for _key in ('hotel_id', 'room_type'):
+    event.listen(getattr(Room, _key), 'set', _load_old_value, active_history=True)
+
+@event.listens_for(Booking, 'after_insert')
+def _booking_inserted(mapper, connection, booking):
+    if booking.status in BLOCKING_STATUSES:
+        _adjust(booking, booking.room_id, booking.check_in_date, booking.check_out_date, 1)
+
+@event.listens_for(Booking, 'after_update')
+def _booking_updated(mapper, connection, booking):
+    state = inspect(booking)
+    keys = ('status', 'room_id', 'check_in_date', 'check_out_date')
+    if not any(state.attrs[key].history.has_changes() for key in keys):
+        return
+    if _previous(state, 'status') in BLOCKING_STATUSES:
+        _adjust(booking, _previous(state, 'room_id'), _previous(state, 'check_in_date'),
+                _previous(state, 'check_out_date'), -1)
+    if booking.status in BLOCKING_STATUSES:
+        _adjust(booking, booking.room_id, booking.check_in_date, booking.check_out_date, 1)
+
+@event.listens_for(Booking, 'after_delete')
+def _booking_deleted(mapper, connection, booking):
+    if _previous(inspect(booking), 'status') in BLOCKING_STATUSES:
+        _adjust(booking, booking.room_id, booking.check_in_date, booking.check_out_date, -1)
+
+@event.listens_for(Session, 'after_flush')
+def _session_flushed(session, flush_context):
+    # Still inside the flush transaction, so the counts commit or roll back with the bookings
+    pending = session.info.pop('inventory_deltas', None)
+    if pending:
+        _apply_rooms(session.connection(), pending)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    session.info.pop('inventory_deltas', None)
+
+def _room_changed(mapper, connection, room):
+    state = inspect(room)
+    segments = {(room.hotel_id, room.room_type), (_previous(state, 'hotel_id'), _previous(state, 'room_type'))}
+    for hotel_id, room_type in segments:
+        _refresh_totals(connection, hotel_id, room_type)
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Room, _event, _room_changed)
+
+# Lookups: indexed reads of the primary key, one row per night
+
+def calendar_selects(hotel_id, start, end, room_type=None):
+    """(inventory rows, rooms per type) statements behind inventory_calendar"""
+    by_type = [RoomInventory.room_type == room_type] if room_type else []
+    rows = db.select(RoomInventory.room_type, RoomInventory.night, RoomInventory.total, RoomInventory.sold).where(
+        RoomInventory.hotel_id == hotel_id, RoomInventory.night >= start, RoomInventory.night < end, *by_type)
+    by_type = [Room.room_type == room_type] if room_type else []
+    totals = db.select(Room.room_type, func.count(Room.id)).where(
+        Room.hotel_id == hotel_id, Room.is_available == True, *by_type).group_by(Room.room_type)
+    return rows, totals
+
+def inventory_calendar(hotel_id, start, end, room_type=None):
+    """{room_type: [{'night', 'total', 'sold', 'remaining'}, ...]} for every night in [start, end)"""
+    rows, totals = calendar_selects(hotel_id, start, end, room_type)
+    return build_calendar(db.session.execute(rows).all(), db.session.execute(totals).all(), start, end)
+
+def build_calendar(rows, room_counts, start, end):
+    stored = {(segment_type, night): (total, sold) for segment_type, night, total, sold in rows}
+    # Nights without a row have nothing sold yet
+    totals = dict(room_counts)
+    calendar = {}
+    for segment_type in sorted(set(totals) | {key[0] for key in stored}):
+        nights = []
+        for offset in range((end - start).days):
+            night = start + timedelta(days=offset)
+            total, sold = stored.get((segment_type, night), (totals.get(segment_type, 0), 0))
+            nights.append({'night': night.isoformat(), 'total': total, 'sold': sold,
+                           'remaining': max(total - sold, 0)})
+        calendar[segment_type] = nights
+    return calendar
+
+def _expected(start, end):
+    """(hotel_id, room_type, night) -> (total, sold) recomputed from rooms and bookings"""
+    segments, available, sold, _ = expand_nights(start, end, statuses=BLOCKING_STATUSES)
+    expected = {}
+    for position, (hotel_id, room_type) in enumerate(segments):
+        for offset in range((end - start).days):
+            expected[(hotel_id, room_type, start + timedelta(days=offset))] = (int(available[position]),
+                                                                               int(sold[position, offset]))
+    return expected
+
+def rebuild_inventory(start=None, days=DEFAULT_HORIZON_DAYS):
+    """Recompute inventory rows for [start, start + days) from rooms and bookings"""
+    start = start or date.today()
+    end = start + timedelta(days=days)
+    expected = _expected(start, end)
+    db.session.execute(db.delete(RoomInventory).where(RoomInventory.night >= start, RoomInventory.night < end))
+    rows = [{'hotel_id': hotel_id, 'room_type': room_type, 'night': night, 'total': total, 'sold': sold}
+            for (hotel_id, room_type, night), (total, sold) in expected.items()]
+    for offset in range(0, len(rows), 10000):
+        db.session.execute(db.insert(RoomInventory), rows[offset:offset + 10000])
+    db.session.commit()
+    return len(rows)
+
+def verify_inventory(start=None, days=DEFAULT_HORIZON_DAYS):
+    """Rows that disagree with rooms and bookings, as (key, stored, expected) (total, sold) tuples"""
+    start = start or date.today()
+    end = start + timedelta(days=days)
+    expected = _expected(start, end)
+    mismatches = []
+    stored = {(row.hotel_id, row.room_type, row.night): row for row in
+              RoomInventory.query.filter(RoomInventory.night >= start, RoomInventory.night < end)}
+    for key in sorted(set(expected) | set(stored)):
+        wanted = expected.get(key, (0, 0))
+        found = (stored[key].total, stored[key].sold) if key in stored else (wanted[0], 0)
+        if found != wanted:
+            mismatches.append((key, found, wanted))
+    return mismatches
+
+@click.command('rebuild-inventory')
+@click.option('--days', type=int, default=DEFAULT_HORIZON_DAYS, help='nights from today to cover')
+@click.option('--verify', is_flag=True, help='only compare the table with the bookings')
+@with_appcontext
+def rebuild_inventory_command(days, verify):
+    """Rebuild, or verify, the per-night room inventory from rooms and bookings"""
+    if verify:
+        mismatches = verify_inventory(days=days)
+        for (hotel_id, room_type, night), stored, expected in mismatches[:20]:
+            click.echo(f'hotel {hotel_id} {room_type} {night}: stored {stored[1]}/{stored[0]} sold, '
+                       f'expected {expected[1]}/{expected[0]}')
+        click.echo(f'{len(mismatches)} inventory rows out of date.')
+        raise SystemExit(1 if mismatches else 0)
+    count = rebuild_inventory(days=days)
+    click.echo(f'Rebuilt {count} inventory rows.')
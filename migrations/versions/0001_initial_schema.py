@@ -0,0 +1,251 @@
+"""initial schema
+
+Tables as created by db.create_all, without secondary indexes (those follow
+in 0002). `flask db upgrade` also adopts a database created by db.create_all
+before migrations existed: existing tables get the columns they lack, the
+PostgreSQL overlap constraint is added when missing (it fails if stored
+bookings already overlap), and the SQLite search index is rebuilt from the
+hotels. Derived values in the new columns start at zero; fill them with
+`flask rebuild-amenities`, `flask rebuild-ratings`, `flask rebuild-inventory`
+and `flask rebuild-daily-stats`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 03:41:22.435332
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Copied from hotel_search.py and models.py as of this revision
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS hotel_fts USING fts5("
+    "name, city, description, content='hotel', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS hotel_fts_vocab USING fts5vocab(hotel_fts, 'row')",
+    "CREATE TRIGGER IF NOT EXISTS hotel_fts_ai AFTER INSERT ON hotel BEGIN "
+    "INSERT INTO hotel_fts(rowid, name, city, description) VALUES (new.id, new.name, new.city, new.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS hotel_fts_ad AFTER DELETE ON hotel BEGIN "
+    "INSERT INTO hotel_fts(hotel_fts, rowid, name, city, description) "
+    "VALUES ('delete', old.id, old.name, old.city, old.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS hotel_fts_au AFTER UPDATE OF name, city, description ON hotel BEGIN "
+    "INSERT INTO hotel_fts(hotel_fts, rowid, name, city, description) "
+    "VALUES ('delete', old.id, old.name, old.city, old.description); "
+    "INSERT INTO hotel_fts(rowid, name, city, description) VALUES (new.id, new.name, new.city, new.description); "
+    "END",
+]
+
+POSTGRESQL_DDL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS btree_gist',
+    "CREATE INDEX IF NOT EXISTS ix_hotel_search_tsv ON hotel "
+    "USING gin (to_tsvector('simple', name || ' ' || city || ' ' || description))",
+    "CREATE INDEX IF NOT EXISTS ix_hotel_search_trgm ON hotel USING gin ((name || ' ' || city) gin_trgm_ops)",
+    'CREATE INDEX IF NOT EXISTS ix_hotel_city_trgm ON hotel USING gin (city gin_trgm_ops)',
+    'ALTER TABLE booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist '
+    '(room_id WITH =, daterange(check_in_date, check_out_date) WITH &&) '
+    "WHERE (status IN ('pending', 'confirmed', 'completed'))",
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    def create_table(name, *elements):
+        if name not in existing:
+            op.create_table(name, *elements)
+            return
+        # Adopted table: add the columns added to the models since it was created
+        present = {column['name'] for column in inspector.get_columns(name)}
+        for element in elements:
+            if isinstance(element, sa.Column) and element.name not in present:
+                op.add_column(name, element)
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    create_table('daily_booking_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('bookings_created', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('bookings_confirmed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('bookings_cancelled', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('confirmed_revenue', sa.Float(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    create_table('hotel',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('address', sa.String(length=200), nullable=False),
+    sa.Column('city', sa.String(length=50), nullable=False),
+    sa.Column('state', sa.String(length=50), nullable=False),
+    sa.Column('country', sa.String(length=50), nullable=False),
+    sa.Column('zip_code', sa.String(length=10), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('website', sa.String(length=200), nullable=True),
+    sa.Column('star_rating', sa.Integer(), nullable=True),
+    sa.Column('amenities', sa.Text(), nullable=True),
+    sa.Column('amenity_mask', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('images', sa.Text(), nullable=True),
+    sa.Column('is_featured', sa.Boolean(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_1', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_2', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_3', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_4', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_5', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('password_hash', sa.String(length=256), nullable=False),
+    sa.Column('first_name', sa.String(length=50), nullable=False),
+    sa.Column('last_name', sa.String(length=50), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('is_admin', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+    create_table('daily_occupancy_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('hotel_id', sa.Integer(), nullable=False),
+    sa.Column('room_type', sa.String(length=50), nullable=False),
+    sa.Column('rooms_available', sa.Integer(), nullable=False),
+    sa.Column('rooms_sold', sa.Integer(), nullable=False),
+    sa.Column('room_revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hotel.id'], ),
+    sa.PrimaryKeyConstraint('day', 'hotel_id', 'room_type')
+    )
+    create_table('rate_rule',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('hotel_id', sa.Integer(), nullable=True),
+    sa.Column('room_type', sa.String(length=50), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('days_of_week', sa.Integer(), nullable=True),
+    sa.Column('min_nights', sa.Integer(), nullable=True),
+    sa.Column('min_occupancy', sa.Float(), nullable=True),
+    sa.Column('nightly_rate', sa.Float(), nullable=True),
+    sa.Column('multiplier', sa.Float(), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hotel.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('review',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('hotel_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('comment', sa.Text(), nullable=False),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hotel.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('room',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('hotel_id', sa.Integer(), nullable=False),
+    sa.Column('room_number', sa.String(length=10), nullable=False),
+    sa.Column('room_type', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('max_occupancy', sa.Integer(), nullable=False),
+    sa.Column('price_per_night', sa.Float(), nullable=False),
+    sa.Column('amenities', sa.Text(), nullable=True),
+    sa.Column('amenity_mask', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('images', sa.Text(), nullable=True),
+    sa.Column('is_available', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hotel.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('room_inventory',
+    sa.Column('hotel_id', sa.Integer(), nullable=False),
+    sa.Column('room_type', sa.String(length=50), nullable=False),
+    sa.Column('night', sa.Date(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('sold', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['hotel_id'], ['hotel.id'], ),
+    sa.PrimaryKeyConstraint('hotel_id', 'room_type', 'night')
+    )
+    create_table('booking',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('room_id', sa.Integer(), nullable=False),
+    sa.Column('check_in_date', sa.Date(), nullable=False),
+    sa.Column('check_out_date', sa.Date(), nullable=False),
+    sa.Column('num_guests', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('special_requests', sa.Text(), nullable=True),
+    sa.Column('payment_status', sa.String(length=20), nullable=True),
+    sa.Column('payment_method', sa.String(length=50), nullable=True),
+    sa.Column('payment_reference', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['room_id'], ['room.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # ### end Alembic commands ###
+
+    # DDL the models attach through after_create events, which op.create_table does not fire
+    dialect = op.get_bind().dialect.name
+
+    # Older databases declare 120-character password hashes (SQLite needs a table rebuild to change it)
+    if 'user' in existing:
+        with op.batch_alter_table('user') as batch_op:
+            batch_op.alter_column('password_hash', type_=sa.String(length=256),
+                                  existing_type=sa.String(length=120), existing_nullable=False)
+    if dialect == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+        # External-content FTS only indexes rows written after its triggers; index existing hotels
+        op.execute("INSERT INTO hotel_fts(hotel_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        has_overlap_constraint = op.get_bind().execute(
+            sa.text("SELECT 1 FROM pg_constraint WHERE conname = 'booking_no_overlap'")).first()
+        for statement in POSTGRESQL_DDL:
+            if 'booking_no_overlap' not in statement or not has_overlap_constraint:
+                op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS hotel_fts_vocab')
+        op.execute('DROP TABLE IF EXISTS hotel_fts')
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_table('booking')
+    op.drop_table('room_inventory')
+    op.drop_table('room')
+    op.drop_table('review')
+    op.drop_table('rate_rule')
+    op.drop_table('daily_occupancy_stats')
+    op.drop_table('user')
+    op.drop_table('hotel')
+    op.drop_table('daily_booking_stats')
+    # ### end Alembic commands ###
@@ -0,0 +1,49 @@
+"""hot query indexes
+
+Every secondary index declared in models.py. They are created IF NOT EXISTS,
+so a database built by db.create_all at any earlier point can be stamped at
+0001 and upgraded to pick up whichever indexes it is missing.
+benchmarks/query_plans.py checks that the hot route queries use them.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 04:02:10.118204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (table, index name, columns)
+INDEXES = [
+    # Home page featured hotels and the keyset-paginated hotel list
+    ('hotel', 'ix_hotel_featured', ['is_featured', 'is_active']),
+    ('hotel', 'ix_hotel_active_created', ['is_active', 'created_at', 'id']),
+    # Rooms of a hotel for detail pages, availability and inventory totals
+    ('room', 'ix_room_hotel_type', ['hotel_id', 'room_type', 'is_available']),
+    ('rate_rule', 'ix_rate_rule_hotel', ['hotel_id', 'is_active']),
+    # Availability overlap checks, booking lists and lifecycle transitions
+    ('booking', 'ix_booking_room_dates', ['room_id', 'check_in_date', 'check_out_date']),
+    ('booking', 'ix_booking_created', ['created_at', 'id']),
+    ('booking', 'ix_booking_user_created', ['user_id', 'created_at', 'id']),
+    ('booking', 'ix_booking_status_created', ['status', 'created_at']),
+    ('booking', 'ix_booking_status_checkout', ['status', 'check_out_date']),
+    ('daily_occupancy_stats', 'ix_daily_occupancy_hotel_day', ['hotel_id', 'day']),
+    # Latest verified reviews of a hotel
+    ('review', 'ix_review_hotel_verified_created', ['hotel_id', 'is_verified', 'created_at']),
+]
+
+
+def upgrade():
+    for table, name, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,42 @@
+"""hotel location
+
+Latitude, longitude and the derived geohash used by proximity search, with
+an index on the geohash so each covering cell is one range scan. Columns that
+already exist (a database built by db.create_all) are left alone. Run
+`flask rebuild-geohashes` after loading coordinates outside the ORM.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 05:12:40.512377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.Column('geohash', sa.String(length=12), nullable=True),
+]
+
+
+def upgrade():
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('hotel')}
+    for column in COLUMNS:
+        if column.name not in existing:
+            op.add_column('hotel', column)
+    op.create_index('ix_hotel_geohash', 'hotel', ['geohash'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_hotel_geohash', table_name='hotel', if_exists=True)
+    with op.batch_alter_table('hotel') as batch_op:
+        for column in reversed(COLUMNS):
+            batch_op.drop_column(column.name)
@@ -0,0 +1,36 @@
+"""created_at not null
+
+Hotel and booking lists page by (created_at, id); a NULL created_at never
+compares in the seek predicate, so such rows fell out of every page after
+the first. Backfills them from updated_at (or now) and makes the columns
+NOT NULL.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:20:51.306482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+TABLES = ['hotel', 'booking']
+
+
+def upgrade():
+    for table in TABLES:
+        op.execute(f'UPDATE {table} SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL')
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
@@ -1,15 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_hashing import password_hasher
+from db_routing import RoutingSession
+from sqlalchemy import event, DDL
 
-db = SQLAlchemy()
+# Reads of replica-routed views go to the 'replica' bind when one is configured (see db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     phone = db.Column(db.String(20))
@@ -20,11 +23,15 @@ class User(UserMixin, db.Model):
     bookings = db.relationship('Booking', backref='user', lazy=True)
     reviews = db.relationship('Review', backref='user', lazy=True)
 
+    # Hashing runs in the bounded pool of password_hashing.py and may raise PasswordHasherBusy
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -43,16 +50,63 @@ class Hotel(db.Model):
     website = db.Column(db.String(200))
     star_rating = db.Column(db.Integer, default=5)
     amenities = db.Column(db.Text)  # JSON string of amenities
+    amenity_mask = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')  # bits of amenities.AMENITIES
     images = db.Column(db.Text)  # JSON string of image URLs
     is_featured = db.Column(db.Boolean, default=False)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination key
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Location; the geohash is derived from the coordinates by geo.py
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12))
+    
+    # Verified review aggregates, maintained by ratings.py
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     rooms = db.relationship('Room', backref='hotel', lazy=True)
     reviews = db.relationship('Review', backref='hotel', lazy=True)
 
+    __table_args__ = (
+        # Home page featured hotels and the keyset-paginated hotel list
+        db.Index('ix_hotel_featured', 'is_featured', 'is_active'),
+        db.Index('ix_hotel_active_created', 'is_active', 'created_at', 'id'),
+        # Proximity search: each geohash prefix is one index range
+        db.Index('ix_hotel_geohash', 'geohash'),
+    )
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+
+    @property
+    def rating_histogram(self):
+        return {1: self.rating_1, 2: self.rating_2, 3: self.rating_3, 4: self.rating_4, 5: self.rating_5}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'city': self.city,
+            'state': self.state,
+            'country': self.country,
+            'star_rating': self.star_rating,
+            'is_featured': self.is_featured,
+            'average_rating': round(self.average_rating, 2),
+            'rating_count': self.rating_count,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
     def __repr__(self):
         return f'<Hotel {self.name}>'
 
@@ -65,16 +119,51 @@ class Room(db.Model):
     max_occupancy = db.Column(db.Integer, nullable=False)
     price_per_night = db.Column(db.Float, nullable=False)
     amenities = db.Column(db.Text)  # JSON string of room amenities
+    amenity_mask = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')  # bits of amenities.AMENITIES
     images = db.Column(db.Text)  # JSON string of image URLs
     is_available = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     bookings = db.relationship('Booking', backref='room', lazy=True)
 
+    __table_args__ = (
+        # Rooms of a hotel, optionally of one type, for detail pages, availability and inventory totals
+        db.Index('ix_room_hotel_type', 'hotel_id', 'room_type', 'is_available'),
+    )
+
     def __repr__(self):
         return f'<Room {self.room_number} - {self.room_type}>'
 
+class RateRule(db.Model):
+    """Pricing rule applied by pricing.py on top of a room's base price_per_night"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    hotel_id = db.Column(db.Integer, db.ForeignKey('hotel.id'))  # None applies to every hotel
+    room_type = db.Column(db.String(50))  # None applies to every room type
+    start_date = db.Column(db.Date)  # first night covered, None for open-ended
+    end_date = db.Column(db.Date)  # last night covered (inclusive), None for open-ended
+    days_of_week = db.Column(db.Integer)  # bitmask of nights covered, Monday = bit 0
+    min_nights = db.Column(db.Integer)  # length-of-stay threshold
+    min_occupancy = db.Column(db.Float)  # share of the hotel's rooms sold that night, 0-1
+    nightly_rate = db.Column(db.Float)  # price calendar entry: replaces the nightly rate outright
+    multiplier = db.Column(db.Float, nullable=False, default=1.0)
+    priority = db.Column(db.Integer, nullable=False, default=0)  # higher priorities apply later
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_rate_rule_hotel', 'hotel_id', 'is_active'),
+    )
+
+    def __repr__(self):
+        return f'<RateRule {self.name}>'
+
+# Booking statuses that keep a room occupied for their date range
+BLOCKING_STATUSES = ('pending', 'confirmed', 'completed')
+
 class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -82,27 +171,121 @@ class Booking(db.Model):
     check_in_date = db.Column(db.Date, nullable=False)
     check_out_date = db.Column(db.Date, nullable=False)
     num_guests = db.Column(db.Integer, nullable=False)
-    total_amount = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending, confirmed, cancelled, completed
+    # active_history keeps the previous values available to the maintained statistics
+    total_amount = db.column_property(db.Column(db.Float, nullable=False), active_history=True)
+    status = db.column_property(db.Column(db.String(20), default='pending'), active_history=True)  # pending, confirmed, cancelled, completed, expired
     special_requests = db.Column(db.Text)
     payment_status = db.Column(db.String(20), default='pending')  # pending, paid, refunded
     payment_method = db.Column(db.String(50))
     payment_reference = db.Column(db.String(100))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination key
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves date-range overlap checks in availability.py
+        db.Index('ix_booking_room_dates', 'room_id', 'check_in_date', 'check_out_date'),
+        # Keyset pagination of the admin and per-user booking lists
+        db.Index('ix_booking_created', 'created_at', 'id'),
+        db.Index('ix_booking_user_created', 'user_id', 'created_at', 'id'),
+        # Batched lifecycle transitions in booking_lifecycle.py
+        db.Index('ix_booking_status_created', 'status', 'created_at'),
+        db.Index('ix_booking_status_checkout', 'status', 'check_out_date'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'room_id': self.room_id,
+            'check_in_date': self.check_in_date.isoformat(),
+            'check_out_date': self.check_out_date.isoformat(),
+            'num_guests': self.num_guests,
+            'total_amount': self.total_amount,
+            'status': self.status,
+            'payment_status': self.payment_status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __repr__(self):
+        return f'<Booking {self.id} - user {self.user_id}>'
+
+# PostgreSQL rejects overlapping stays for the same room at the database level
+event.listen(Booking.__table__, 'after_create', DDL(
+    'CREATE EXTENSION IF NOT EXISTS btree_gist'
+).execute_if(dialect='postgresql'))
+event.listen(Booking.__table__, 'after_create', DDL(
+    'ALTER TABLE booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist '
+    '(room_id WITH =, daterange(check_in_date, check_out_date) WITH &&) '
+    "WHERE (status IN ('pending', 'confirmed', 'completed'))"
+).execute_if(dialect='postgresql'))
+
+class DailyBookingStats(db.Model):
+    """Per-day booking activity rollup, maintained by dashboard_stats.py"""
+    day = db.Column(db.Date, primary_key=True)
+    bookings_created = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bookings_confirmed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bookings_cancelled = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    confirmed_revenue = db.Column(db.Float, nullable=False, default=0, server_default='0')
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'bookings_created': self.bookings_created,
+            'bookings_confirmed': self.bookings_confirmed,
+            'bookings_cancelled': self.bookings_cancelled,
+            'confirmed_revenue': self.confirmed_revenue,
+        }
+
     def __repr__(self):
-        return f'<Booking {self.id} - {self.user.username}>'
+        return f'<DailyBookingStats {self.day}>'
+
+class RoomInventory(db.Model):
+    """Rooms of one type at a hotel for one night, and how many are held by bookings; maintained by inventory.py"""
+    hotel_id = db.Column(db.Integer, db.ForeignKey('hotel.id'), primary_key=True)
+    room_type = db.Column(db.String(50), primary_key=True)
+    night = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    sold = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def remaining(self):
+        return max(self.total - self.sold, 0)
+
+    def __repr__(self):
+        return f'<RoomInventory hotel {self.hotel_id} {self.room_type} {self.night}: {self.sold}/{self.total}>'
+
+class DailyOccupancyStats(db.Model):
+    """Room nights sold and room revenue per hotel, room type and closed day, cached by analytics.py"""
+    day = db.Column(db.Date, primary_key=True)
+    hotel_id = db.Column(db.Integer, db.ForeignKey('hotel.id'), primary_key=True)
+    room_type = db.Column(db.String(50), primary_key=True)
+    rooms_available = db.Column(db.Integer, nullable=False, default=0)
+    rooms_sold = db.Column(db.Integer, nullable=False, default=0)
+    room_revenue = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_daily_occupancy_hotel_day', 'hotel_id', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<DailyOccupancyStats {self.day} hotel {self.hotel_id} {self.room_type}>'
 
 class Review(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    hotel_id = db.Column(db.Integer, db.ForeignKey('hotel.id'), nullable=False)
-    rating = db.Column(db.Integer, nullable=False)  # 1-5 stars
+    # active_history loads the previous values on change so ratings.py can
+    # move a review's contribution between hotel rating aggregates
+    hotel_id = db.column_property(db.Column(db.Integer, db.ForeignKey('hotel.id'), nullable=False), active_history=True)
+    rating = db.column_property(db.Column(db.Integer, nullable=False), active_history=True)  # 1-5 stars
     title = db.Column(db.String(100), nullable=False)
     comment = db.Column(db.Text, nullable=False)
-    is_verified = db.Column(db.Boolean, default=False)
+    is_verified = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Latest verified reviews of a hotel
+        db.Index('ix_review_hotel_verified_created', 'hotel_id', 'is_verified', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<Review {self.id} - {self.rating} stars>'
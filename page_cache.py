@@ -0,0 +1,277 @@
+from models import Hotel, Room, Review
+from flask import request, session, make_response
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from collections import OrderedDict, Counter
+from functools import wraps
+import pickle
+import random
+import threading
+import time
+
+DEFAULT_TIMEOUT = 300
+DEFAULT_MAX_ENTRIES = 2048
+
+class MemoryCache:
+    """Size-bounded in-process LRU cache, also used as the test stand-in for Redis"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Tag versions are tiny and must never be evicted, or stale pages could resurface
+        self._versions = {}
+        # Versions start from a random origin so they never repeat across processes or restarts,
+        # which lets them serve as HTTP validators too
+        self._origin = random.getrandbits(48)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, self._origin) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, self._origin) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisCache:
+    """Cache shared between workers through the Redis service in docker-compose.yml"""
+
+    def __init__(self, url, prefix='hms:page:'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._redis.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, timeout):
+        self._redis.setex(self.prefix + key, int(timeout), pickle.dumps(value))
+
+    def delete(self, key):
+        self._redis.delete(self.prefix + key)
+
+    def versions(self, tags):
+        values = self._redis.mget([self.prefix + 'tag:' + tag for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def bump(self, tags):
+        pipe = self._redis.pipeline()
+        for tag in tags:
+            pipe.incr(self.prefix + 'tag:' + tag)
+        pipe.execute()
+
+    def clear(self):
+        for key in self._redis.scan_iter(self.prefix + '*'):
+            self._redis.delete(key)
+
+class PageCache:
+    def __init__(self):
+        self.backend = MemoryCache()
+        self.timeout = DEFAULT_TIMEOUT
+        self.enabled = True
+        self.metrics = Counter()
+        self._metrics_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Pick the backend from PAGE_CACHE_BACKEND: memory (default, single process only), redis or null"""
+        backend = app.config.setdefault('PAGE_CACHE_BACKEND', 'memory')
+        self.timeout = app.config.setdefault('PAGE_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+        self.enabled = backend != 'null'
+        if backend == 'redis':
+            try:
+                self.backend = RedisCache(app.config.get('REDIS_URL', 'redis://localhost:6379/0'))
+            except ImportError:
+                # An in-process cache would miss other workers' invalidations; better not to cache at all
+                app.logger.warning('redis is not installed; the page cache is disabled')
+                self.enabled = False
+        else:
+            self.backend = MemoryCache(app.config.get('PAGE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+
+    def count(self, name, endpoint):
+        with self._metrics_lock:
+            self.metrics[(name, endpoint)] += 1
+
+    def key(self, tags, *parts):
+        """Build a cache key that changes whenever any of its tags is invalidated"""
+        versions = self.backend.versions(tags)
+        stamp = ','.join(f'{tag}={version}' for tag, version in zip(tags, versions))
+        return '|'.join(str(part) for part in parts) + '|' + stamp
+
+    def version(self, tag):
+        """Current version of one tag; it changes whenever the tag is invalidated.
+
+        None while the cache is off: the backend then stays in-process, and its
+        versions would differ between workers.
+        """
+        if not self.enabled:
+            return None
+        return self.backend.versions([tag])[0]
+
+    def get_or_set(self, name, tags, builder, timeout=None):
+        """Fragment cache: return the cached value for name, building and storing it on a miss"""
+        key = self.key(tags, 'fragment', name)
+        value = self.backend.get(key)
+        if value is not None:
+            self.count('hit', name)
+            return value
+        self.count('miss', name)
+        value = builder()
+        self.backend.set(key, value, timeout or self.timeout)
+        return value
+
+    def invalidate(self, tags):
+        if tags:
+            self.backend.bump(sorted(tags))
+            for tag in tags:
+                self.count('invalidation', tag.split(':')[0])
+
+    def stats(self):
+        with self._metrics_lock:
+            endpoints = {}
+            invalidations = {}
+            for (name, endpoint), value in self.metrics.items():
+                if name == 'invalidation':
+                    invalidations[endpoint] = value
+                else:
+                    endpoints.setdefault(endpoint, Counter())[name] += value
+        lookups = {}
+        for endpoint, counts in sorted(endpoints.items()):
+            total = counts['hit'] + counts['miss']
+            lookups[endpoint] = {'hit': counts['hit'], 'miss': counts['miss'],
+                                 'hit_rate': counts['hit'] / total if total else 0.0}
+        return {'lookups': lookups, 'invalidations': invalidations}
+
+    def prometheus_text(self):
+        lines = ['# HELP hms_page_cache_events_total Page cache hits, misses and tag invalidations.',
+                 '# TYPE hms_page_cache_events_total counter']
+        with self._metrics_lock:
+            for (name, endpoint), value in sorted(self.metrics.items()):
+                lines.append(f'hms_page_cache_events_total{{event="{name}",endpoint="{endpoint}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+page_cache = PageCache()
+
+def cached_page(tags, timeout=None, skip_args=()):
+    """Cache a public GET view's response for anonymous visitors.
+
+    ``tags`` maps the view arguments to the invalidation tags of the data the
+    page shows. Requests carrying any of ``skip_args`` (e.g. booking dates,
+    whose results depend on live availability) are never cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if (not page_cache.enabled or request.method != 'GET' or current_user.is_authenticated
+                    or session.get('_flashes') or any(arg in request.args for arg in skip_args)):
+                return view(*args, **kwargs)
+
+            view_tags = tags(**kwargs)
+            args_key = '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)))
+            # Listing views negotiate HTML or JSON on the Accept header
+            accept = request.accept_mimetypes.best_match(['text/html', 'application/json'])
+            key = page_cache.key(view_tags, 'page', request.endpoint, sorted(kwargs.items()), args_key, accept)
+            cached = page_cache.backend.get(key)
+            if cached is not None:
+                page_cache.count('hit', request.endpoint)
+                body, status, content_type = cached
+                response = make_response(body, status)
+                response.content_type = content_type
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            page_cache.count('miss', request.endpoint)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                page_cache.backend.set(key, (response.get_data(), response.status_code, response.content_type),
+                                       timeout or page_cache.timeout)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapped
+    return decorator
+
+def catalog_tags(**kwargs):
+    return ['catalog']
+
+def hotel_tags(hotel_id, **kwargs):
+    return [f'hotel:{hotel_id}']
+
+# Write-driven invalidation: tags touched by a flush are invalidated once the
+# transaction commits, so readers never re-cache the pre-commit state
+
+def _queue(target, *tags):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('page_cache_tags', set()).update(tags)
+
+def _previous(target, key):
+    history = inspect(target).attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(target, key)
+
+def _hotel_changed(mapper, connection, hotel):
+    _queue(hotel, 'catalog', f'hotel:{hotel.id}')
+
+def _room_changed(mapper, connection, room):
+    # Rooms appear on their hotel's detail page, and listings filter on room amenities and free rooms
+    _queue(room, 'catalog', f'hotel:{room.hotel_id}', f'hotel:{_previous(room, "hotel_id")}')
+
+def _room_updated(mapper, connection, room):
+    state = inspect(room)
+    if any(state.attrs[key].history.has_changes()
+           for key in ('amenity_mask', 'is_available', 'max_occupancy', 'hotel_id')):
+        _room_changed(mapper, connection, room)
+    else:
+        # Price, description and the like only show on the hotel's detail page
+        _queue(room, f'hotel:{room.hotel_id}')
+
+def _review_changed(mapper, connection, review):
+    # Review writes also move the hotel's rating aggregates shown in listings
+    _queue(review, 'catalog', f'hotel:{review.hotel_id}', f'hotel:{_previous(review, "hotel_id")}')
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Hotel, _event, _hotel_changed)
+    event.listen(Room, _event, _room_updated if _event == 'after_update' else _room_changed)
+    event.listen(Review, _event, _review_changed)
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    tags = session.info.pop('page_cache_tags', None)
+    if tags:
+        page_cache.invalidate(tags)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    session.info.pop('page_cache_tags', None)
@@ -0,0 +1,152 @@
+from models import db
+from sqlalchemy import column, Integer
+from datetime import datetime, date
+import base64
+import json
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+# Cursors carry the number of the page they lead to after the sort key
+_PAGE_COLUMN = column('page', Integer)
+
+class InvalidCursor(ValueError):
+    """A cursor that is not one this app issued for the list being paged"""
+
+class KeysetPage:
+    """One page of results plus the cursor that continues after its last row.
+
+    Offers the page-number side of Flask-SQLAlchemy's Pagination (page,
+    has_prev, prev_num, next_num, iter_pages) for templates written against
+    paginate(); the total is never counted, so pages and total are absent.
+    """
+
+    def __init__(self, items, per_page, next_cursor=None, cursor=None, page=1):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+        self.page = page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def is_first(self):
+        return self.page == 1
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    def iter_pages(self, left_edge=2, left_current=2):
+        """Page numbers for a pager, None marking a gap; it ends at the next page, as the total is unknown"""
+        last = self.next_num or self.page
+        yield from range(1, min(left_edge, last) + 1)
+        start = max(left_edge + 1, self.page - left_current)
+        if start > left_edge + 1:
+            yield None
+        yield from range(start, last + 1)
+
+    def to_dict(self, serialize):
+        return {
+            'items': [serialize(item) for item in self.items],
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+        }
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _python_value(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(values):
+    """Encode the sort key of a row as an opaque URL-safe cursor"""
+    raw = json.dumps([_json_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor back into typed sort key values, or None if it is missing.
+
+    Raises InvalidCursor for a malformed one: silently starting over from the
+    first page would make a client re-read rows it already has.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns) or None in values:
+            raise InvalidCursor('Invalid cursor')
+        return [_python_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor') from None
+
+def per_page_arg(args, default=DEFAULT_PER_PAGE):
+    """Read a per_page request argument clamped to 1..MAX_PER_PAGE"""
+    per_page = args.get('per_page', default, type=int) or default
+    return max(1, min(per_page, MAX_PER_PAGE))
+
+def page_arg(args):
+    """Read a page number request argument, 1 when missing or invalid"""
+    return max(args.get('page', 1, type=int) or 1, 1)
+
+def keyset_paginate(query, columns, cursor=None, per_page=DEFAULT_PER_PAGE, descending=True, page=1):
+    """Page a query by a unique sort key instead of OFFSET.
+
+    ``columns`` must end in a unique column (normally the primary key) and
+    be NOT NULL, so the key is a total order; each page seeks directly past
+    the previous page's last row, so deep pages cost the same as the first.
+    A ``page`` number without a cursor (a numbered pager link) is served by
+    OFFSET as paginate() would. Raises InvalidCursor for a malformed cursor.
+    """
+    query = query.order_by(None).order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+    after = decode_cursor(cursor, (*columns, _PAGE_COLUMN))
+    if after is not None:
+        *after, page = after
+        if page < 2:
+            raise InvalidCursor('Invalid cursor')
+        key = db.tuple_(*columns)
+        query = query.filter(key < db.tuple_(*after) if descending else key > db.tuple_(*after))
+    else:
+        cursor = None
+        page = max(page or 1, 1)
+        if page > 1:
+            query = query.offset((page - 1) * per_page)
+
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor([*(_row_value(last, column) for column in columns), page + 1])
+    return KeysetPage(items, per_page, next_cursor=next_cursor, cursor=cursor, page=page)
+
+def _row_value(row, column):
+    # Model attributes resolve on the entity; extra selected columns (such as a
+    # relevance score) resolve on the result row by their label
+    if hasattr(row, '_mapping'):
+        if column in row._mapping:
+            return row._mapping[column]
+        return getattr(row[0], column.key)
+    return getattr(row, column.key)
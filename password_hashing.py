@@ -0,0 +1,82 @@
+from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+import os
+import threading
+import time
+
+# Matches werkzeug 2.3's default; stronger settings only need PASSWORD_HASH_METHOD
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+DEFAULT_QUEUE_TIMEOUT = 10.0
+
+class PasswordHasherBusy(Exception):
+    """Raised when no hashing slot frees up within PASSWORD_HASH_QUEUE_TIMEOUT"""
+
+class PasswordHasher:
+    """Runs password hashing and verification in a bounded worker pool.
+
+    Hashes are deliberately expensive. Capping how many run at once keeps a
+    burst of logins from taking every core, so other requests still get CPU
+    time. Requests beyond the cap wait up to a timeout for a free slot and
+    then fail fast instead of piling up.
+    """
+
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.workers = max(1, (os.cpu_count() or 2) // 2)
+        self.queue_timeout = DEFAULT_QUEUE_TIMEOUT
+        self._executor = None
+        self._slots = None
+        self._prefix = None
+        self._lock = threading.Lock()
+        self.metrics = Counter()
+
+    def init_app(self, app):
+        """Configure from PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS and PASSWORD_HASH_QUEUE_TIMEOUT"""
+        self.method = app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        self.workers = app.config.setdefault('PASSWORD_HASH_WORKERS', self.workers)
+        self.queue_timeout = app.config.setdefault('PASSWORD_HASH_QUEUE_TIMEOUT', DEFAULT_QUEUE_TIMEOUT)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._prefix = None
+
+    def _run(self, function, *args):
+        # PASSWORD_HASH_WORKERS=0 hashes inline in the request thread, unbounded
+        if not self.workers:
+            return function(*args)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                self._slots = threading.BoundedSemaphore(self.workers)
+            executor, slots = self._executor, self._slots
+        started = time.perf_counter()
+        if not slots.acquire(timeout=self.queue_timeout):
+            self.metrics['rejected'] += 1
+            raise PasswordHasherBusy('Password hashing is saturated, try again shortly')
+        self.metrics['wait_ms'] += int((time.perf_counter() - started) * 1000)
+        try:
+            return executor.submit(function, *args).result()
+        finally:
+            slots.release()
+
+    def hash(self, password):
+        self.metrics['hashed'] += 1
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        self.metrics['verified'] += 1
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with other parameters than the configured method"""
+        if self._prefix is None:
+            # werkzeug expands shorthand methods ('scrypt', 'pbkdf2') to their full parameters
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+    def stats(self):
+        return dict(self.metrics, workers=self.workers, method=self.method)
+
+password_hasher = PasswordHasher()
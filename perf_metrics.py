@@ -0,0 +1,162 @@
+from flask import request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import deque
+from datetime import datetime
+import random
+import threading
+import time
+
+LATENCY_WINDOW = 1000
+SLOW_QUERY_SAMPLES = 50
+PERCENTILES = (0.5, 0.95, 0.99)
+
+_local = threading.local()
+_lock = threading.Lock()
+
+class EndpointStats:
+    """Rolling request and SQL figures for one endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def percentiles(self):
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return {quantile: 0.0 for quantile in PERCENTILES}
+        return {quantile: ordered[min(len(ordered) - 1, int(quantile * len(ordered)))] for quantile in PERCENTILES}
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'mean_ms': self.total_seconds / self.requests * 1000 if self.requests else 0.0,
+            'percentiles_ms': {f'p{int(q * 100)}': value * 1000 for q, value in self.percentiles().items()},
+            'sql_statements_per_request': self.sql_statements / self.requests if self.requests else 0.0,
+            'sql_ms_per_request': self.sql_seconds / self.requests * 1000 if self.requests else 0.0,
+        }
+
+_endpoints = {}
+_slow_queries = deque(maxlen=SLOW_QUERY_SAMPLES)
+
+class _RequestSample:
+    def __init__(self, endpoint, slow_query_seconds):
+        self.endpoint = endpoint
+        self.slow_query_seconds = slow_query_seconds
+        self.started = time.perf_counter()
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_statement(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'sample', None) is not None:
+        conn.info.setdefault('hms_statement_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_statement(conn, cursor, statement, parameters, context, executemany):
+    sample = getattr(_local, 'sample', None)
+    started = conn.info.get('hms_statement_started')
+    if sample is None or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    sample.sql_statements += 1
+    sample.sql_seconds += elapsed
+    if elapsed >= sample.slow_query_seconds:
+        with _lock:
+            _slow_queries.append({
+                'endpoint': sample.endpoint,
+                'statement': statement,
+                'parameters': repr(parameters)[:500],
+                'duration_ms': elapsed * 1000,
+                'at': datetime.utcnow().isoformat(),
+            })
+
+def _record(sample, failed):
+    elapsed = time.perf_counter() - sample.started
+    with _lock:
+        stats = _endpoints.setdefault(sample.endpoint, EndpointStats())
+        stats.requests += 1
+        stats.errors += 1 if failed else 0
+        stats.total_seconds += elapsed
+        stats.sql_statements += sample.sql_statements
+        stats.sql_seconds += sample.sql_seconds
+        stats.latencies.append(elapsed)
+
+def init_perf_metrics(app):
+    """Record latency and SQL figures for a sampled fraction of requests.
+
+    PERF_SAMPLE_RATE (0-1) sets the sampled fraction; unsampled requests only
+    pay for one random() call. Statements slower than PERF_SLOW_QUERY_MS are
+    kept with their parameters.
+    """
+    app.config.setdefault('PERF_SAMPLE_RATE', 1.0)
+    app.config.setdefault('PERF_SLOW_QUERY_MS', 100)
+
+    @app.before_request
+    def _start_sample():
+        rate = current_app.config['PERF_SAMPLE_RATE']
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            _local.sample = None
+            return
+        _local.sample = _RequestSample(request.endpoint or 'unknown',
+                                       current_app.config['PERF_SLOW_QUERY_MS'] / 1000)
+
+    @app.after_request
+    def _finish_sample(response):
+        sample = getattr(_local, 'sample', None)
+        if sample is not None:
+            _record(sample, response.status_code >= 500)
+            _local.sample = None
+        return response
+
+    @app.teardown_request
+    def _abandon_sample(exc):
+        sample = getattr(_local, 'sample', None)
+        if sample is not None:
+            # Only reached when the view raised before a response was built
+            _record(sample, True)
+            _local.sample = None
+
+def snapshot():
+    """Return a JSON-serializable copy of the collected metrics"""
+    with _lock:
+        return {
+            'endpoints': {endpoint: stats.to_dict() for endpoint, stats in sorted(_endpoints.items())},
+            'slow_queries': list(reversed(_slow_queries)),
+        }
+
+def reset():
+    with _lock:
+        _endpoints.clear()
+        _slow_queries.clear()
+
+def prometheus_text():
+    """Render the collected metrics in the Prometheus text exposition format"""
+    lines = [
+        '# HELP hms_request_duration_seconds Request latency of sampled requests.',
+        '# TYPE hms_request_duration_seconds summary',
+    ]
+    with _lock:
+        endpoints = sorted(_endpoints.items())
+        for endpoint, stats in endpoints:
+            for quantile, value in stats.percentiles().items():
+                lines.append(f'hms_request_duration_seconds{{endpoint="{endpoint}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'hms_request_duration_seconds_sum{{endpoint="{endpoint}"}} {stats.total_seconds:.6f}')
+            lines.append(f'hms_request_duration_seconds_count{{endpoint="{endpoint}"}} {stats.requests}')
+        lines += ['# HELP hms_request_errors_total Sampled requests that failed with a 5xx.',
+                  '# TYPE hms_request_errors_total counter']
+        lines += [f'hms_request_errors_total{{endpoint="{endpoint}"}} {stats.errors}' for endpoint, stats in endpoints]
+        lines += ['# HELP hms_sql_statements_total SQL statements issued by sampled requests.',
+                  '# TYPE hms_sql_statements_total counter']
+        lines += [f'hms_sql_statements_total{{endpoint="{endpoint}"}} {stats.sql_statements}'
+                  for endpoint, stats in endpoints]
+        lines += ['# HELP hms_sql_duration_seconds_total Time spent in SQL by sampled requests.',
+                  '# TYPE hms_sql_duration_seconds_total counter']
+        lines += [f'hms_sql_duration_seconds_total{{endpoint="{endpoint}"}} {stats.sql_seconds:.6f}'
+                  for endpoint, stats in endpoints]
+    return '\n'.join(lines) + '\n'
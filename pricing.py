@@ -0,0 +1,125 @@
+from models import Room, Booking, RateRule, BLOCKING_STATUSES, db
+import numpy as np
+
+# Stay prices are computed as a rooms x nights matrix: every rule is applied to
+# the whole matrix at once through boolean masks, never per room or per night
+
+def _nights(check_in, check_out):
+    return np.arange(np.datetime64(check_in, 'D'), np.datetime64(check_out, 'D'))
+
+def _weekdays(nights):
+    # The epoch, 1970-01-01, was a Thursday (weekday 3)
+    return (nights.astype('int64') + 3) % 7
+
+# Statements are built separately from their execution so the async API
+# (asgi.py) can run them concurrently and price with the same code
+
+def active_rules_select(hotel_ids, check_in, check_out):
+    return db.select(RateRule).where(
+        RateRule.is_active == True,
+        db.or_(RateRule.hotel_id.is_(None), RateRule.hotel_id.in_(hotel_ids)),
+        db.or_(RateRule.start_date.is_(None), RateRule.start_date < check_out),
+        db.or_(RateRule.end_date.is_(None), RateRule.end_date >= check_in)
+    )
+
+def active_rules(hotel_ids, check_in, check_out):
+    """Active rules that can touch any night of the stay at any of the hotels"""
+    return db.session.scalars(active_rules_select(hotel_ids, check_in, check_out)).all()
+
+def occupancy_selects(hotel_ids, check_in, check_out):
+    """(rooms per hotel, overlapping stays) statements behind hotel_occupancy"""
+    totals = db.select(Room.hotel_id, db.func.count(Room.id)).where(
+        Room.hotel_id.in_(hotel_ids), Room.is_available == True).group_by(Room.hotel_id)
+    stays = db.select(Room.hotel_id, Booking.check_in_date, Booking.check_out_date) \
+        .join(Room, Room.id == Booking.room_id).where(
+            Room.hotel_id.in_(hotel_ids),
+            Booking.status.in_(BLOCKING_STATUSES),
+            Booking.check_in_date < check_out,
+            Booking.check_out_date > check_in
+        )
+    return totals, stays
+
+def hotel_occupancy(hotel_ids, check_in, check_out):
+    """Share of each hotel's rooms sold per night, as a len(hotel_ids) x nights array"""
+    totals, stays = occupancy_selects(hotel_ids, check_in, check_out)
+    return occupancy_from_rows(hotel_ids, check_in, check_out, db.session.execute(totals).all(),
+                               db.session.execute(stays).all())
+
+def occupancy_from_rows(hotel_ids, check_in, check_out, room_counts, stays):
+    nights = (check_out - check_in).days
+    index = {hotel_id: position for position, hotel_id in enumerate(hotel_ids)}
+    totals = np.zeros(len(hotel_ids))
+    for hotel_id, count in room_counts:
+        totals[index[hotel_id]] = count
+
+    sold = np.zeros((len(hotel_ids), nights + 1))
+    if stays:
+        rows = np.array([index[hotel_id] for hotel_id, _, _ in stays])
+        start = np.datetime64(check_in, 'D')
+        first = (np.array([stay[1] for stay in stays], dtype='datetime64[D]') - start).astype('int64')
+        last = (np.array([stay[2] for stay in stays], dtype='datetime64[D]') - start).astype('int64')
+        # Difference array: +1 on the first night inside the window, -1 after the last
+        np.add.at(sold, (rows, np.clip(first, 0, nights)), 1)
+        np.add.at(sold, (rows, np.clip(last, 0, nights)), -1)
+    sold = np.cumsum(sold, axis=1)[:, :nights]
+    return sold / np.maximum(totals, 1)[:, None]
+
+def nightly_rates(rooms, check_in, check_out, rules=None, occupancy=None):
+    """Price of every night of the stay for each room, as a len(rooms) x nights array.
+
+    rules and occupancy (hotel ids, hotel_occupancy array) are looked up
+    when not given.
+    """
+    nights = _nights(check_in, check_out)
+    if not rooms or not len(nights):
+        return np.zeros((len(rooms), len(nights)))
+    hotel_ids = sorted({room.hotel_id for room in rooms})
+    if rules is None:
+        rules = active_rules(hotel_ids, check_in, check_out)
+
+    rates = np.repeat(np.array([room.price_per_night for room in rooms], dtype=float)[:, None], len(nights), axis=1)
+    room_hotels = np.array([room.hotel_id for room in rooms])
+    room_types = np.array([room.room_type for room in rooms], dtype=object)
+    weekdays = _weekdays(nights)
+
+    room_occupancy = None
+    if any(rule.min_occupancy is not None for rule in rules):
+        if occupancy is None:
+            occupancy = (hotel_ids, hotel_occupancy(hotel_ids, check_in, check_out))
+        occupancy_hotels, by_hotel = occupancy
+        room_occupancy = by_hotel[np.searchsorted(occupancy_hotels, room_hotels)]
+
+    # Calendar rates first, so multipliers adjust the calendar rather than being overwritten
+    for rule in sorted(rules, key=lambda rule: (rule.nightly_rate is None, rule.priority, rule.id or 0)):
+        if rule.min_nights and len(nights) < rule.min_nights:
+            continue
+        room_mask = np.ones(len(rooms), dtype=bool)
+        if rule.hotel_id is not None:
+            room_mask &= room_hotels == rule.hotel_id
+        if rule.room_type is not None:
+            room_mask &= room_types == rule.room_type
+        night_mask = np.ones(len(nights), dtype=bool)
+        if rule.start_date is not None:
+            night_mask &= nights >= np.datetime64(rule.start_date, 'D')
+        if rule.end_date is not None:
+            night_mask &= nights <= np.datetime64(rule.end_date, 'D')
+        if rule.days_of_week is not None:
+            night_mask &= ((rule.days_of_week >> weekdays) & 1).astype(bool)
+
+        mask = room_mask[:, None] & night_mask[None, :]
+        if rule.min_occupancy is not None:
+            mask &= room_occupancy >= rule.min_occupancy
+        if rule.nightly_rate is not None:
+            rates[mask] = rule.nightly_rate
+        else:
+            rates[mask] *= rule.multiplier
+    return np.round(rates, 2)
+
+def quote_totals(rooms, check_in, check_out, rules=None, occupancy=None):
+    """Stay total per room id for many rooms at once (a hotel, or a whole result set)"""
+    rates = nightly_rates(rooms, check_in, check_out, rules, occupancy)
+    return {room.id: round(float(total), 2) for room, total in zip(rooms, rates.sum(axis=1))}
+
+def quote_room(room, check_in, check_out):
+    """Stay total for a single room; the price stored on new bookings"""
+    return quote_totals([room], check_in, check_out)[room.id]
@@ -0,0 +1,80 @@
+from flask import request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextlib import contextmanager
+from functools import wraps
+import threading
+
+_local = threading.local()
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a view issues more SQL statements than its declared budget"""
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+def _active_counters():
+    if not hasattr(_local, 'counters'):
+        _local.counters = []
+    return _local.counters
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active_counters():
+        counter.count += 1
+        counter.statements.append(statement)
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed on this thread inside the block"""
+    counter = QueryCounter()
+    counters = _active_counters()
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+def query_budget(limit):
+    """Declare the maximum number of SQL statements a view may issue per request"""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            return view(*args, **kwargs)
+        wrapped.query_budget = limit
+        return wrapped
+    return decorator
+
+def init_query_budgets(app):
+    """Count statements per request and check them against each view's budget.
+
+    Over-budget requests raise QueryBudgetExceeded when QUERY_BUDGET_ENFORCE is
+    set (the default under testing, see tests/test_query_budgets.py) and are
+    logged otherwise.
+    """
+    @app.before_request
+    def _start_counting():
+        counter = QueryCounter()
+        _active_counters().append(counter)
+        request.environ['hms.query_counter'] = counter
+
+    @app.after_request
+    def _check_budget(response):
+        counter = request.environ.get('hms.query_counter')
+        view = current_app.view_functions.get(request.endpoint)
+        limit = getattr(view, 'query_budget', None)
+        if counter is not None and limit is not None and counter.count > limit:
+            message = f'{request.endpoint} issued {counter.count} SQL statements (budget {limit})'
+            enforce = current_app.config.get('QUERY_BUDGET_ENFORCE', current_app.testing)
+            if enforce:
+                raise QueryBudgetExceeded(message + ':\n' + '\n'.join(counter.statements))
+            current_app.logger.warning(message)
+        return response
+
+    @app.teardown_request
+    def _stop_counting(exc):
+        counter = request.environ.pop('hms.query_counter', None)
+        if counter is not None and counter in _active_counters():
+            _active_counters().remove(counter)
@@ -0,0 +1,77 @@
+from models import Hotel, Review, db
+from sqlalchemy import event, inspect, case
+from flask.cli import with_appcontext
+import click
+
+# Hotel rating aggregates cover verified reviews only, matching what hotel pages display
+RATING_STARS = range(1, 6)
+
+def _apply(connection, hotel_id, rating, is_verified, sign):
+    """Add (sign=1) or remove (sign=-1) one review's contribution to its hotel's aggregates"""
+    if not is_verified or hotel_id is None or rating not in RATING_STARS:
+        return
+    hotel = Hotel.__table__
+    star_column = hotel.c[f'rating_{rating}']
+    # Relative increments keep concurrent review writes from overwriting each other
+    connection.execute(
+        hotel.update().where(hotel.c.id == hotel_id).values({
+            hotel.c.rating_count: hotel.c.rating_count + sign,
+            hotel.c.rating_sum: hotel.c.rating_sum + sign * rating,
+            star_column: star_column + sign,
+        })
+    )
+
+def _previous(state, key):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, key)
+
+@event.listens_for(Review, 'after_insert')
+def _review_inserted(mapper, connection, review):
+    _apply(connection, review.hotel_id, review.rating, review.is_verified, 1)
+
+@event.listens_for(Review, 'after_delete')
+def _review_deleted(mapper, connection, review):
+    state = inspect(review)
+    _apply(connection, _previous(state, 'hotel_id'), _previous(state, 'rating'),
+           _previous(state, 'is_verified'), -1)
+
+@event.listens_for(Review, 'after_update')
+def _review_updated(mapper, connection, review):
+    state = inspect(review)
+    if not any(state.attrs[key].history.has_changes() for key in ('hotel_id', 'rating', 'is_verified')):
+        return
+    _apply(connection, _previous(state, 'hotel_id'), _previous(state, 'rating'),
+           _previous(state, 'is_verified'), -1)
+    _apply(connection, review.hotel_id, review.rating, review.is_verified, 1)
+
+def rebuild_ratings():
+    """Recompute every hotel's rating aggregates from the reviews table in one pass"""
+    zeroed = {'rating_count': 0, 'rating_sum': 0}
+    zeroed.update({f'rating_{stars}': 0 for stars in RATING_STARS})
+    db.session.execute(db.update(Hotel).values(**zeroed))
+
+    rows = db.session.query(
+        Review.hotel_id,
+        db.func.count(Review.id),
+        db.func.sum(Review.rating),
+        *[db.func.sum(case((Review.rating == stars, 1), else_=0)) for stars in RATING_STARS]
+    ).filter(Review.is_verified == True).group_by(Review.hotel_id).all()
+
+    updates = []
+    for hotel_id, count, total, *histogram in rows:
+        values = {'id': hotel_id, 'rating_count': count, 'rating_sum': total or 0}
+        values.update({f'rating_{stars}': n for stars, n in zip(RATING_STARS, histogram)})
+        updates.append(values)
+    if updates:
+        db.session.execute(db.update(Hotel), updates)
+    db.session.commit()
+    return len(updates)
+
+@click.command('rebuild-ratings')
+@with_appcontext
+def rebuild_ratings_command():
+    """Recompute hotel rating aggregates from reviews"""
+    count = rebuild_ratings()
+    click.echo(f'Rebuilt rating aggregates for {count} reviewed hotels.')
@@ -0,0 +1,150 @@
+from models import Room, Booking, db
+from availability import is_room_available, free_room_criteria
+from pricing import quote_room, quote_totals
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+
+# SQLSTATE raised by the PostgreSQL booking_no_overlap exclusion constraint
+EXCLUSION_VIOLATION = '23P01'
+
+# Largest block a single group booking may hold
+MAX_GROUP_ROOMS = 200
+
+class RoomUnavailableError(Exception):
+    """Raised when a room already has a booking overlapping the requested stay"""
+
+def lock_pending_booking(booking):
+    """Write-lock a booking until commit if it is still pending; returns whether it is.
+
+    A conditional UPDATE rather than SELECT ... FOR UPDATE, which SQLite
+    ignores: it locks the row (the whole database on SQLite) only while the
+    status is still 'pending', so the lifecycle worker cannot expire the
+    booking before the caller's status change commits. The booking is then
+    reloaded, and the caller changes it through the ORM as usual.
+    """
+    locked = db.session.execute(
+        db.update(Booking).where(Booking.id == booking.id, Booking.status == 'pending')
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.refresh(booking)
+    if not locked:
+        db.session.rollback()
+    return bool(locked)
+
+def _lock_sqlite_writes():
+    """Take SQLite's database write lock now, before the availability check.
+
+    SQLite has no row locks, and a deferred transaction only asks for the
+    write lock at its first INSERT, after the check has run. BEGIN IMMEDIATE
+    makes writers in every process, not just this one, queue until commit.
+    """
+    driver = db.session.connection().connection.driver_connection
+    # A transaction that has already written holds the lock until it ends
+    if not driver.in_transaction:
+        driver.execute('BEGIN IMMEDIATE')
+
+def create_booking(user_id, room_id, check_in, check_out, num_guests, total_amount=None, special_requests=None):
+    """Insert and commit a booking only if the room is still free for the whole stay.
+
+    The total is quoted by the pricing engine inside the booking transaction
+    unless one is given explicitly.
+    """
+    booking = Booking(
+        user_id=user_id,
+        room_id=room_id,
+        check_in_date=check_in,
+        check_out_date=check_out,
+        num_guests=num_guests,
+        total_amount=total_amount,
+        special_requests=special_requests
+    )
+
+    _commit_booking(booking)
+    return booking
+
+def _commit_booking(booking):
+    try:
+        if db.session.get_bind().dialect.name == 'sqlite':
+            _lock_sqlite_writes()
+        else:
+            # Row lock on the room serializes bookings of the same room only,
+            # so bookings for different rooms still commit in parallel
+            db.session.execute(db.select(Room.id).where(Room.id == booking.room_id).with_for_update())
+        if not is_room_available(booking.room_id, booking.check_in_date, booking.check_out_date):
+            raise RoomUnavailableError(f'Room {booking.room_id} is already booked for these dates')
+        if booking.total_amount is None:
+            booking.total_amount = quote_room(db.session.get(Room, booking.room_id),
+                                              booking.check_in_date, booking.check_out_date)
+        db.session.add(booking)
+        db.session.commit()
+    except RoomUnavailableError:
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        if getattr(e.orig, 'pgcode', None) == EXCLUSION_VIOLATION:
+            raise RoomUnavailableError(f'Room {booking.room_id} is already booked for these dates') from e
+        raise
+
+def create_group_booking(user_id, check_in, check_out, room_ids=None, hotel_id=None, room_type=None, count=None,
+                         guests_per_room=1, special_requests=None):
+    """Book several rooms for one stay in a single transaction: every room or none.
+
+    Rooms are given by id, or as `count` rooms of `room_type` at `hotel_id`
+    (the cheapest free ones). Availability is checked by one query, all stays
+    are quoted by one pricing call and the bookings go in as one batched INSERT.
+    Raises RoomUnavailableError when the block cannot be held in full.
+    """
+    if room_ids is not None:
+        room_ids = sorted(set(room_ids))
+        candidates = (Room.id.in_(room_ids),)
+        wanted = len(room_ids)
+    else:
+        candidates = (Room.hotel_id == hotel_id, Room.room_type == room_type)
+        wanted = count
+    if not wanted or wanted > MAX_GROUP_ROOMS:
+        raise ValueError(f'A group booking holds between 1 and {MAX_GROUP_ROOMS} rooms')
+
+    return _commit_group(user_id, check_in, check_out, candidates, wanted, room_ids, guests_per_room,
+                         special_requests)
+
+def _commit_group(user_id, check_in, check_out, candidates, wanted, room_ids, guests_per_room, special_requests):
+    try:
+        if db.session.get_bind().dialect.name == 'sqlite':
+            _lock_sqlite_writes()
+        else:
+            # Locked in id order, so overlapping blocks queue up instead of deadlocking
+            db.session.execute(db.select(Room.id).where(*candidates).order_by(Room.id).with_for_update())
+        rooms = Room.query.filter(*candidates, *free_room_criteria(check_in, check_out, guests_per_room)) \
+            .order_by(Room.price_per_night, Room.id).limit(wanted).all()
+        if len(rooms) < wanted:
+            if room_ids is not None:
+                taken = sorted(set(room_ids) - {room.id for room in rooms})
+                raise RoomUnavailableError(f'Rooms {taken} are not available for these dates')
+            raise RoomUnavailableError(f'Only {len(rooms)} of {wanted} rooms are available for these dates')
+
+        quotes = quote_totals(rooms, check_in, check_out)
+        bookings = [
+            Booking(
+                user_id=user_id,
+                room_id=room.id,
+                check_in_date=check_in,
+                check_out_date=check_out,
+                num_guests=guests_per_room,
+                total_amount=quotes[room.id],
+                special_requests=special_requests
+            )
+            for room in rooms
+        ]
+        db.session.add_all(bookings)
+        db.session.commit()
+    except RoomUnavailableError:
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        if getattr(e.orig, 'pgcode', None) == EXCLUSION_VIOLATION:
+            raise RoomUnavailableError('Some of these rooms were booked for these dates meanwhile') from e
+        raise
+    return bookings
@@ -1,8 +1,27 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user, login_user, logout_user
+from werkzeug.exceptions import BadRequest
 from models import User, Hotel, Room, Booking, Review, db
 from forms import LoginForm, RegisterForm, BookingForm, ReviewForm
-from datetime import datetime, date
+from availability import available_rooms, has_free_room, parse_stay, parse_date
+from pricing import quote_totals
+from reservations import create_booking, lock_pending_booking, RoomUnavailableError
+from hotel_search import ranked_matches, city_filter
+from pagination import keyset_paginate, per_page_arg, page_arg, InvalidCursor
+from dashboard_stats import get_dashboard_stats, booking_trend
+from analytics import occupancy_report, report_summary, REPORT_GROUPS
+from password_hashing import PasswordHasherBusy, password_hasher
+from db_routing import reads_from_replica
+import db_routing
+from user_cache import user_cache
+from exports import booking_export_query, review_export_query, stream_rows, parse_statuses, EXPORT_FORMATS
+from query_budget import query_budget
+import perf_metrics
+from page_cache import page_cache, cached_page, catalog_tags, hotel_tags
+from amenities import filter_by_amenities
+from geo import parse_near, nearby_page, geo_index
+from sqlalchemy.orm import joinedload
+from datetime import datetime, date, timedelta
 import json
 
 # Blueprints
@@ -11,6 +30,26 @@ hotel_bp = Blueprint('hotel', __name__)
 booking_bp = Blueprint('booking', __name__)
 admin_bp = Blueprint('admin', __name__)
 
+# Eager loads for booking pages, which show each booking's room, hotel and guest.
+# Built per call because the backref attributes only exist once mappers are configured.
+def booking_with_room():
+    return joinedload(Booking.room).joinedload(Room.hotel)
+
+def booking_with_guest():
+    return joinedload(Booking.user)
+
+def wants_json():
+    """Whether the client asked for the JSON form of a listing page"""
+    if request.args.get('format') == 'json':
+        return True
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+@hotel_bp.app_errorhandler(InvalidCursor)
+def invalid_cursor(error):
+    if wants_json():
+        return jsonify({'error': str(error)}), 400
+    return BadRequest(str(error))
+
 # Authentication Routes
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -20,7 +59,20 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
-        if user and user.check_password(form.password.data):
+        # Hand the pooled connection back before the slow hash, so queued sign-ins
+        # cannot starve other requests of connections; the detached user keeps its columns
+        db.session.close()
+        try:
+            valid = user is not None and user.check_password(form.password.data)
+            # Upgrade hashes made with older parameters while the password is at hand
+            if valid and user.password_needs_rehash():
+                user.set_password(form.password.data)
+                db.session.add(user)
+                db.session.commit()
+        except PasswordHasherBusy:
+            flash('We are handling a lot of sign-ins right now. Please try again in a moment.', 'error')
+            return render_template('auth/login.html', form=form), 503
+        if valid:
             login_user(user, remember=form.remember_me.data)
             next_page = request.args.get('next')
             return redirect(next_page) if next_page else redirect(url_for('index'))
@@ -41,7 +93,12 @@ def register():
             last_name=form.last_name.data,
             phone=form.phone.data
         )
-        user.set_password(form.password.data)
+        db.session.close()  # as in login, hold no connection while hashing
+        try:
+            user.set_password(form.password.data)
+        except PasswordHasherBusy:
+            flash('We are handling a lot of registrations right now. Please try again in a moment.', 'error')
+            return render_template('auth/register.html', form=form), 503
         db.session.add(user)
         db.session.commit()
         flash('Registration successful! Please log in.', 'success')
@@ -56,59 +113,129 @@ def logout():
 
 # Hotel Routes
 @hotel_bp.route('/hotels')
+@cached_page(catalog_tags)
+@reads_from_replica
 def hotels():
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     city = request.args.get('city', '')
     star_rating = request.args.get('star_rating', '')
+    amenities = request.args.get('amenities', '')
+    room_amenities = request.args.get('room_amenities', '')
     
     query = Hotel.query.filter_by(is_active=True)
     
     if city:
-        query = query.filter(Hotel.city.ilike(f'%{city}%'))
+        query = query.filter(city_filter(city))
     if star_rating:
         query = query.filter(Hotel.star_rating == int(star_rating))
+    status = 200
+    try:
+        query = filter_by_amenities(query, amenities, room_amenities)
+    except ValueError as e:
+        if wants_json():
+            return jsonify({'error': str(e)}), 400
+        flash(str(e), 'error')
+        query, status = query.filter(db.false()), 400
     
-    hotels = query.paginate(page=page, per_page=12, error_out=False)
-    return render_template('hotels/list.html', hotels=hotels, city=city, star_rating=star_rating)
+    hotels = keyset_paginate(query, (Hotel.id,), cursor, per_page_arg(request.args, 12), descending=False,
+                             page=page_arg(request.args))
+    if wants_json():
+        return jsonify(hotels.to_dict(Hotel.to_dict))
+    return render_template('hotels/list.html', hotels=hotels, city=city, star_rating=star_rating,
+                         amenities=amenities, room_amenities=room_amenities), status
 
 @hotel_bp.route('/hotel/<int:hotel_id>')
+@cached_page(hotel_tags, skip_args=('check_in', 'check_out'))
+@reads_from_replica
 def hotel_detail(hotel_id):
     hotel = Hotel.query.get_or_404(hotel_id)
-    rooms = Room.query.filter_by(hotel_id=hotel_id, is_available=True).all()
+    check_in, check_out = parse_stay(request.args.get('check_in'), request.args.get('check_out'))
+    guests = request.args.get('guests', 1, type=int)
+    
+    quotes = {}
+    if check_in:
+        rooms = available_rooms(check_in, check_out, guests, hotel_ids=[hotel_id]).get(hotel_id, [])
+        quotes = quote_totals(rooms, check_in, check_out)
+    else:
+        rooms = Room.query.filter_by(hotel_id=hotel_id, is_available=True).all()
     reviews = Review.query.filter_by(hotel_id=hotel_id, is_verified=True).order_by(Review.created_at.desc()).limit(10).all()
     
-    # Calculate average rating
-    avg_rating = db.session.query(db.func.avg(Review.rating)).filter_by(hotel_id=hotel_id, is_verified=True).scalar() or 0
+    # Average rating is maintained on the hotel row as reviews change
+    avg_rating = hotel.average_rating
     
-    return render_template('hotels/detail.html', hotel=hotel, rooms=rooms, reviews=reviews, avg_rating=avg_rating)
+    return render_template('hotels/detail.html', hotel=hotel, rooms=rooms, reviews=reviews, avg_rating=avg_rating,
+                         rating_histogram=hotel.rating_histogram, check_in=check_in, check_out=check_out, guests=guests,
+                         quotes=quotes)
 
 @hotel_bp.route('/search')
+@reads_from_replica
 def search():
     query = request.args.get('q', '')
     city = request.args.get('city', '')
     check_in = request.args.get('check_in', '')
     check_out = request.args.get('check_out', '')
     guests = request.args.get('guests', 1, type=int)
+    cursor = request.args.get('cursor')
+    amenities = request.args.get('amenities', '')
+    room_amenities = request.args.get('room_amenities', '')
     
     hotels = Hotel.query.filter_by(is_active=True)
     
-    if query:
-        hotels = hotels.filter(
-            db.or_(
-                Hotel.name.ilike(f'%{query}%'),
-                Hotel.city.ilike(f'%{query}%'),
-                Hotel.description.ilike(f'%{query}%')
-            )
-        )
-    
     if city:
-        hotels = hotels.filter(Hotel.city.ilike(f'%{city}%'))
+        hotels = hotels.filter(city_filter(city))
+    status = 200
+    try:
+        hotels = filter_by_amenities(hotels, amenities, room_amenities)
+    except ValueError as e:
+        if wants_json():
+            return jsonify({'error': str(e)}), 400
+        flash(str(e), 'error')
+        hotels, status = hotels.filter(db.false()), 400
+    
+    # Restrict to hotels with a free room for the whole stay and party size
+    stay_check_in, stay_check_out = parse_stay(check_in, check_out)
+    if stay_check_in:
+        hotels = hotels.filter(has_free_room(stay_check_in, stay_check_out, guests))
+    
+    # Ranked full-text match, most relevant hotels first
+    matches = ranked_matches(query) if query else None
+    # ?lat=&lon= with radius_km and/or nearest: closest hotels first, within the other filters
+    near = parse_near(request.args)
+    distances = {}
+    if near:
+        if matches is not None:
+            hotels = hotels.join(matches, Hotel.id == matches.c.id)
+        page = nearby_page(hotels, near, cursor, per_page_arg(request.args))
+        distances = {hotel.id: round(distance, 2) for hotel, distance in page.items}
+        page.items = [hotel for hotel, distance in page.items]
+    elif matches is not None:
+        hotels = hotels.join(matches, Hotel.id == matches.c.id).add_columns(matches.c.score)
+        page = keyset_paginate(hotels, (matches.c.score, Hotel.id), cursor, per_page_arg(request.args),
+                               page=page_arg(request.args))
+        page.items = [hotel for hotel, score in page.items]
+    else:
+        page = keyset_paginate(hotels, (Hotel.created_at, Hotel.id), cursor, per_page_arg(request.args),
+                               page=page_arg(request.args))
     
-    hotels = hotels.all()
+    # {hotel_id: (free_rooms, lowest stay total)}, quoted for the whole page in one batch
+    availability = {}
+    if stay_check_in:
+        rooms_by_hotel = available_rooms(stay_check_in, stay_check_out, guests,
+                                         hotel_ids=[hotel.id for hotel in page.items])
+        quotes = quote_totals([room for rooms in rooms_by_hotel.values() for room in rooms],
+                              stay_check_in, stay_check_out)
+        availability = {hotel_id: (len(rooms), min(quotes[room.id] for room in rooms))
+                        for hotel_id, rooms in rooms_by_hotel.items() if rooms}
     
+    if wants_json():
+        if near:
+            return jsonify(page.to_dict(lambda hotel: dict(hotel.to_dict(), distance_km=distances[hotel.id])))
+        return jsonify(page.to_dict(Hotel.to_dict))
     return render_template('hotels/search_results.html', 
-                         hotels=hotels, query=query, city=city, 
-                         check_in=check_in, check_out=check_out, guests=guests)
+                         hotels=page.items, page=page, query=query, city=city, 
+                         check_in=check_in, check_out=check_out, guests=guests,
+                         amenities=amenities, room_amenities=room_amenities, availability=availability,
+                         distances=distances), status
 
 # Booking Routes
 @booking_bp.route('/book/<int:room_id>', methods=['GET', 'POST'])
@@ -118,24 +245,19 @@ def book_room(room_id):
     form = BookingForm()
     
     if form.validate_on_submit():
-        # Calculate total amount
-        check_in = form.check_in_date.data
-        check_out = form.check_out_date.data
-        nights = (check_out - check_in).days
-        total_amount = room.price_per_night * nights
-        
-        booking = Booking(
-            user_id=current_user.id,
-            room_id=room_id,
-            check_in_date=check_in,
-            check_out_date=check_out,
-            num_guests=form.num_guests.data,
-            total_amount=total_amount,
-            special_requests=form.special_requests.data
-        )
-        
-        db.session.add(booking)
-        db.session.commit()
+        # Total amount is quoted by the pricing engine as the booking commits
+        try:
+            booking = create_booking(
+                user_id=current_user.id,
+                room_id=room_id,
+                check_in=form.check_in_date.data,
+                check_out=form.check_out_date.data,
+                num_guests=form.num_guests.data,
+                special_requests=form.special_requests.data
+            )
+        except RoomUnavailableError:
+            flash('This room is no longer available for the selected dates.', 'error')
+            return render_template('booking/book.html', room=room, form=form)
         
         flash('Booking created successfully! Please complete payment.', 'success')
         return redirect(url_for('booking.booking_detail', booking_id=booking.id))
@@ -144,8 +266,9 @@ def book_room(room_id):
 
 @booking_bp.route('/booking/<int:booking_id>')
 @login_required
+@query_budget(3)
 def booking_detail(booking_id):
-    booking = Booking.query.get_or_404(booking_id)
+    booking = Booking.query.options(booking_with_room(), booking_with_guest()).filter_by(id=booking_id).first_or_404()
     if booking.user_id != current_user.id and not current_user.is_admin:
         flash('Access denied', 'error')
         return redirect(url_for('index'))
@@ -154,9 +277,14 @@ def booking_detail(booking_id):
 
 @booking_bp.route('/my-bookings')
 @login_required
+@query_budget(3)
 def my_bookings():
-    bookings = Booking.query.filter_by(user_id=current_user.id).order_by(Booking.created_at.desc()).all()
-    return render_template('booking/my_bookings.html', bookings=bookings)
+    query = Booking.query.options(booking_with_room()).filter_by(user_id=current_user.id)
+    page = keyset_paginate(query, (Booking.created_at, Booking.id), request.args.get('cursor'),
+                           per_page_arg(request.args), page=page_arg(request.args))
+    if wants_json():
+        return jsonify(page.to_dict(Booking.to_dict))
+    return render_template('booking/my_bookings.html', bookings=page.items, page=page)
 
 @booking_bp.route('/cancel-booking/<int:booking_id>')
 @login_required
@@ -166,7 +294,8 @@ def cancel_booking(booking_id):
         flash('Access denied', 'error')
         return redirect(url_for('index'))
     
-    if booking.status == 'pending':
+    # Only while still pending: the lifecycle worker may expire it at any moment
+    if lock_pending_booking(booking):
         booking.status = 'cancelled'
         db.session.commit()
         flash('Booking cancelled successfully', 'success')
@@ -178,24 +307,21 @@ def cancel_booking(booking_id):
 # Admin Routes
 @admin_bp.route('/admin')
 @login_required
+@query_budget(5)
 def admin_dashboard():
     if not current_user.is_admin:
         flash('Access denied', 'error')
         return redirect(url_for('index'))
     
-    stats = {
-        'total_hotels': Hotel.query.count(),
-        'total_rooms': Room.query.count(),
-        'total_bookings': Booking.query.count(),
-        'total_users': User.query.count(),
-        'pending_bookings': Booking.query.filter_by(status='pending').count(),
-        'revenue': db.session.query(db.func.sum(Booking.total_amount)).filter_by(status='confirmed').scalar() or 0
-    }
+    stats = get_dashboard_stats()
+    trend = booking_trend()
     
-    recent_bookings = Booking.query.order_by(Booking.created_at.desc()).limit(10).all()
+    recent_bookings = Booking.query.options(booking_with_room(), booking_with_guest()) \
+        .order_by(Booking.created_at.desc()).limit(10).all()
     current_date = datetime.now()
     
-    return render_template('admin/dashboard.html', stats=stats, recent_bookings=recent_bookings, current_date=current_date)
+    return render_template('admin/dashboard.html', stats=stats, trend=trend, recent_bookings=recent_bookings,
+                         current_date=current_date)
 
 @admin_bp.route('/admin/hotels')
 @login_required
@@ -209,13 +335,18 @@ def admin_hotels():
 
 @admin_bp.route('/admin/bookings')
 @login_required
+@query_budget(3)
 def admin_bookings():
     if not current_user.is_admin:
         flash('Access denied', 'error')
         return redirect(url_for('index'))
     
-    bookings = Booking.query.order_by(Booking.created_at.desc()).all()
-    return render_template('admin/bookings.html', bookings=bookings)
+    query = Booking.query.options(booking_with_room(), booking_with_guest())
+    page = keyset_paginate(query, (Booking.created_at, Booking.id), request.args.get('cursor'),
+                           per_page_arg(request.args, 50), page=page_arg(request.args))
+    if wants_json():
+        return jsonify(page.to_dict(Booking.to_dict))
+    return render_template('admin/bookings.html', bookings=page.items, page=page)
 
 @admin_bp.route('/admin/confirm-booking/<int:booking_id>')
 @login_required
@@ -225,7 +356,107 @@ def confirm_booking(booking_id):
         return redirect(url_for('index'))
     
     booking = Booking.query.get_or_404(booking_id)
-    booking.status = 'confirmed'
-    db.session.commit()
-    flash('Booking confirmed successfully', 'success')
+    # Expired or cancelled bookings have released their room and may have been rebooked
+    if lock_pending_booking(booking):
+        booking.status = 'confirmed'
+        db.session.commit()
+        flash('Booking confirmed successfully', 'success')
+    else:
+        flash('Only pending bookings can be confirmed', 'error')
     return redirect(url_for('admin.admin_bookings'))
+
+@admin_bp.route('/admin/reports/occupancy')
+@reads_from_replica
+@login_required
+def admin_occupancy_report():
+    if not current_user.is_admin:
+        flash('Access denied', 'error')
+        return redirect(url_for('index'))
+    
+    # Defaults to the last 30 nights plus the next 30 nights on the books
+    start = parse_date(request.args.get('start')) or date.today() - timedelta(days=30)
+    end = parse_date(request.args.get('end')) or date.today() + timedelta(days=30)
+    hotel_id = request.args.get('hotel_id', type=int)
+    by = request.args.get('by', 'hotel')
+    if by not in REPORT_GROUPS or end <= start:
+        by, end = 'hotel', max(end, start + timedelta(days=1))
+    
+    rows = occupancy_report(start, end, hotel_id=hotel_id, by=by)
+    summary = report_summary(rows)
+    if wants_json():
+        return jsonify({'start': start.isoformat(), 'end': end.isoformat(), 'by': by, 'hotel_id': hotel_id,
+                        'summary': summary, 'rows': rows})
+    hotels = {}
+    if by != 'day':
+        hotels = {hotel.id: hotel for hotel in Hotel.query.filter(Hotel.id.in_({row['hotel_id'] for row in rows}))}
+    return render_template('admin/occupancy.html', rows=rows, summary=summary, start=start, end=end, by=by,
+                         hotel_id=hotel_id, hotels=hotels)
+
+def _export_response(query, name):
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'csv'
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f"{name}-{date.today().isoformat()}.{export_format}"
+    return Response(stream_with_context(stream_rows(query, export_format)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@admin_bp.route('/admin/export/bookings')
+@reads_from_replica
+@login_required
+def admin_export_bookings():
+    if not current_user.is_admin:
+        flash('Access denied', 'error')
+        return redirect(url_for('index'))
+    
+    query = booking_export_query(
+        start=parse_date(request.args.get('start')),
+        end=parse_date(request.args.get('end')),
+        statuses=parse_statuses(request.args.get('status')),
+        date_field=request.args.get('date_field', 'check_in')
+    )
+    return _export_response(query, 'bookings')
+
+@admin_bp.route('/admin/export/reviews')
+@reads_from_replica
+@login_required
+def admin_export_reviews():
+    if not current_user.is_admin:
+        flash('Access denied', 'error')
+        return redirect(url_for('index'))
+    
+    verified = {'true': True, 'false': False}.get(request.args.get('verified', '').lower())
+    query = review_export_query(
+        start=parse_date(request.args.get('start')),
+        end=parse_date(request.args.get('end')),
+        verified=verified,
+        hotel_id=request.args.get('hotel_id', type=int)
+    )
+    return _export_response(query, 'reviews')
+
+@admin_bp.route('/admin/perf')
+@login_required
+def admin_perf():
+    if not current_user.is_admin:
+        flash('Access denied', 'error')
+        return redirect(url_for('index'))
+    
+    metrics = perf_metrics.snapshot()
+    metrics['page_cache'] = page_cache.stats()
+    metrics['password_hashing'] = password_hasher.stats()
+    metrics['user_cache'] = user_cache.stats()
+    metrics['db_routing'] = db_routing.stats()
+    metrics['geo_index'] = geo_index.stats()
+    if wants_json():
+        return jsonify(metrics)
+    return render_template('admin/perf.html', endpoints=metrics['endpoints'], slow_queries=metrics['slow_queries'],
+                         page_cache=metrics['page_cache'])
+
+@admin_bp.route('/admin/perf/metrics')
+@login_required
+def admin_perf_metrics():
+    if not current_user.is_admin:
+        return Response('Access denied\n', status=403, mimetype='text/plain')
+    
+    return Response(perf_metrics.prometheus_text() + page_cache.prometheus_text() + user_cache.prometheus_text(),
+                    mimetype='text/plain; version=0.0.4')
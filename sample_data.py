@@ -5,10 +5,12 @@ Run this script to populate the database with sample data
 """
 
 from app import app, db
-from models import User, Hotel, Room, Booking, Review
+from models import User, Hotel, Room, Booking, Review, RateRule
+from pricing import quote_room
 from werkzeug.security import generate_password_hash
 from datetime import datetime, date, timedelta
 import random
+import json
 
 def create_sample_data():
     """Create sample data for the hotel management system"""
@@ -58,6 +60,8 @@ def create_sample_data():
                 'email': 'mumbai@luxuryhotels.com',
                 'website': 'https://www.luxuryhotels.com/mumbai/grand-palace',
                 'star_rating': 5,
+                'latitude': 18.9217,
+                'longitude': 72.833,
                 'is_featured': True
             },
             {
@@ -72,6 +76,8 @@ def create_sample_data():
                 'email': 'udaipur@luxuryhotels.com',
                 'website': 'https://www.luxuryhotels.com/udaipur/lakeview-palace',
                 'star_rating': 5,
+                'latitude': 24.5754,
+                'longitude': 73.68,
                 'is_featured': True
             },
             {
@@ -86,6 +92,8 @@ def create_sample_data():
                 'email': 'hyderabad@luxuryhotels.com',
                 'website': 'https://www.luxuryhotels.com/hyderabad/royal-heights-palace',
                 'star_rating': 5,
+                'latitude': 17.3315,
+                'longitude': 78.4676,
                 'is_featured': True
             },
             {
@@ -99,6 +107,8 @@ def create_sample_data():
                 'phone': '+91 22 6668 1234',
                 'email': 'oceanview@luxuryhotels.com',
                 'star_rating': 5,
+                'latitude': 19.0596,
+                'longitude': 72.8295,
                 'is_featured': False
             },
             {
@@ -112,6 +122,8 @@ def create_sample_data():
                 'phone': '+91 80 6660 5660',
                 'email': 'bangalore@luxuryhotels.com',
                 'star_rating': 5,
+                'latitude': 12.9857,
+                'longitude': 77.5854,
                 'is_featured': False
             },
             {
@@ -125,13 +137,19 @@ def create_sample_data():
                 'phone': '+91 44 6600 0000',
                 'email': 'chennai@luxuryhotels.com',
                 'star_rating': 5,
+                'latitude': 13.0604,
+                'longitude': 80.2496,
                 'is_featured': False
             }
         ]
         
+        hotel_amenities = ['Free Wi-Fi', 'Swimming Pool', 'Spa', 'Fitness Centre', 'Restaurant', 'Bar',
+                           'Room Service', 'Concierge', 'Airport Shuttle', 'Business Centre', 'Parking']
+        room_amenities = ['Air Conditioning', 'Minibar', 'Television', 'In-room Safe', 'Balcony', 'Bathtub']
+        
         hotels = []
         for hotel_data in hotels_data:
-            hotel = Hotel(**hotel_data)
+            hotel = Hotel(**hotel_data, amenities=json.dumps(random.sample(hotel_amenities, 6)))
             hotels.append(hotel)
             db.session.add(hotel)
         
@@ -159,12 +177,29 @@ def create_sample_data():
                         description=f"Luxurious {room_type['type'].lower()} with modern amenities and elegant decor.",
                         max_occupancy=room_type['max_occupancy'],
                         price_per_night=room_type['base_price'] + random.randint(-2000, 5000),
+                        amenities=json.dumps(random.sample(room_amenities, 4)),
                         is_available=random.choice([True, True, True, False])  # 75% available
                     )
                     db.session.add(room)
         
         db.session.commit()
         
+        # Create sample pricing rules
+        today = date.today()
+        rate_rules = [
+            RateRule(name='Weekend nights', days_of_week=0b0110000, multiplier=1.2),  # Friday and Saturday
+            RateRule(name='Festive season', start_date=date(today.year, 12, 15), end_date=date(today.year + 1, 1, 5),
+                     multiplier=1.35, priority=1),
+            RateRule(name='Monsoon offer', start_date=date(today.year, 7, 1), end_date=date(today.year, 8, 31),
+                     multiplier=0.85, priority=1),
+            RateRule(name='Week-long stay', min_nights=7, multiplier=0.9, priority=2),
+            RateRule(name='High occupancy', min_occupancy=0.8, multiplier=1.15, priority=3),
+            RateRule(name='Presidential Suite peak rate', room_type='Presidential Suite',
+                     start_date=date(today.year, 12, 24), end_date=date(today.year, 12, 31), nightly_rate=85000),
+        ]
+        db.session.add_all(rate_rules)
+        db.session.commit()
+        
         # Create sample bookings
         rooms = Room.query.all()
         booking_statuses = ['pending', 'confirmed', 'cancelled', 'completed']
@@ -181,7 +216,7 @@ def create_sample_data():
                 check_in_date=check_in,
                 check_out_date=check_out,
                 num_guests=random.randint(1, room.max_occupancy),
-                total_amount=room.price_per_night * (check_out - check_in).days,
+                total_amount=quote_room(room, check_in, check_out),
                 status=random.choice(booking_statuses),
                 special_requests=random.choice([
                     None, 
@@ -237,6 +272,7 @@ def create_sample_data():
         print(f"- 5 regular users")
         print(f"- {len(hotels)} hotels")
         print(f"- {len(rooms)} rooms")
+        print(f"- {len(rate_rules)} pricing rules")
         print(f"- 20 bookings")
         print(f"- 15 reviews")
 
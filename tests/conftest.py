@@ -0,0 +1,101 @@
+import os
+import sys
+import tempfile
+import pytest
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+# The app reads its configuration on import, so point it at a throwaway
+# database (or TEST_DATABASE_URL) with the caches off before any test imports it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = (os.environ.get('TEST_DATABASE_URL')
+                              or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db'))
+os.environ['PAGE_CACHE_BACKEND'] = 'null'
+os.environ['USER_CACHE_BACKEND'] = 'null'
+os.environ['GEO_INDEX_BACKEND'] = 'database'
+
+# Fixtures import the app lazily, after the configuration above
+
+@pytest.fixture
+def database():
+    """An empty schema with the in-process caches dropped, inside an app context"""
+    from app import app
+    from models import db
+    from dashboard_stats import invalidate_dashboard_stats
+    from geo import geo_index
+    from benchmarks.page_templates import install_page_templates
+
+    install_page_templates(app)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        invalidate_dashboard_stats()
+        geo_index.invalidate()
+        yield db
+        db.session.remove()
+
+@pytest.fixture
+def catalog(database):
+    """Two hotels with a few rooms each, an admin and two guests"""
+    from models import Hotel, Room, User
+
+    def user(name, is_admin=False):
+        # Tests log in through the session, so the hash is never checked
+        return User(username=name, email=f'{name}@example.com', password_hash='unused', first_name=name.title(),
+                    last_name='Test', is_admin=is_admin)
+
+    def hotel(name, city, latitude, longitude, amenities):
+        return Hotel(name=name, description=f'{name} in {city}', address='1 Main Road', city=city, state='State',
+                     country='India', zip_code='400001', phone='+91 22 0000 0000', email='stay@example.com',
+                     latitude=latitude, longitude=longitude, amenities=amenities)
+
+    admin, guest, other = user('admin', is_admin=True), user('guest'), user('other')
+    seaside = hotel('Seaside Palace', 'Mumbai', 18.92, 72.83, '["pool", "wifi"]')
+    hillside = hotel('Hillside Retreat', 'Shimla', 31.10, 77.17, '["spa"]')
+    rooms = [
+        Room(hotel=seaside, room_number='101', room_type='Deluxe', max_occupancy=2, price_per_night=100.0,
+             amenities='["minibar"]'),
+        Room(hotel=seaside, room_number='102', room_type='Deluxe', max_occupancy=2, price_per_night=120.0),
+        Room(hotel=seaside, room_number='201', room_type='Suite', max_occupancy=4, price_per_night=300.0),
+        Room(hotel=hillside, room_number='1', room_type='Deluxe', max_occupancy=2, price_per_night=80.0),
+    ]
+    database.session.add_all([admin, guest, other, seaside, hillside, *rooms])
+    database.session.commit()
+    return SimpleNamespace(admin=admin, guest=guest, other=other, seaside=seaside, hillside=hillside, rooms=rooms)
+
+@pytest.fixture
+def stay():
+    """(check_in, check_out) of a three-night stay a month out"""
+    check_in = date.today() + timedelta(days=30)
+    return check_in, check_in + timedelta(days=3)
+
+@pytest.fixture
+def page_cache_on(monkeypatch):
+    """The page cache on, in a fresh in-process backend (the tests run in one process)"""
+    from page_cache import page_cache, MemoryCache
+
+    monkeypatch.setattr(page_cache, 'enabled', True)
+    monkeypatch.setattr(page_cache, 'backend', MemoryCache())
+    return page_cache
+
+@pytest.fixture
+def login():
+    """login(user) -> a test client signed in as that user; login(None) is an anonymous visitor"""
+    from app import app
+    from flask.testing import FlaskClient
+
+    class Client(FlaskClient):
+        def open(self, *args, **kwargs):
+            # A request would otherwise reuse the test's app context, and with it g (the
+            # logged-in user) and the database session; give it its own as in production
+            with self.application.app_context():
+                return super().open(*args, **kwargs)
+
+    def client_for(user):
+        client = Client(app, app.response_class, use_cookies=True)
+        if user is not None:
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user.id)
+                session['_fresh'] = True
+        return client
+    return client_for
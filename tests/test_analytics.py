@@ -0,0 +1,28 @@
+"""Occupancy report: read-only on requests, closed days cached by the worker"""
+
+from datetime import date, timedelta
+from models import DailyOccupancyStats
+from analytics import occupancy_report, cache_recent_days
+from reservations import create_booking
+
+def test_report_reads_only_and_matches_the_cache(catalog, database):
+    start = date.today() - timedelta(days=10)
+    booking = create_booking(catalog.guest.id, catalog.rooms[0].id, start + timedelta(days=2),
+                             start + timedelta(days=4), num_guests=2)
+    booking.status = 'confirmed'
+    database.session.commit()
+
+    live = occupancy_report(start, date.today(), by='room_type')
+    live_by_day = occupancy_report(start, date.today(), by='day')
+    assert DailyOccupancyStats.query.count() == 0
+    seaside_deluxe = next(row for row in live if row['hotel_id'] == catalog.seaside.id
+                          and row['room_type'] == 'Deluxe')
+    assert (seaside_deluxe['rooms_sold'], seaside_deluxe['rooms_available']) == (2, 20)
+    assert seaside_deluxe['room_revenue'] == booking.total_amount
+
+    # Quiet days and segments are cached as zero rows, so they are not recomputed on every report
+    assert cache_recent_days(10) == 10
+    assert DailyOccupancyStats.query.count() == 10 * 3
+    assert cache_recent_days(10) == 0
+    assert occupancy_report(start, date.today(), by='room_type') == live
+    assert occupancy_report(start, date.today(), by='day') == live_by_day
@@ -0,0 +1,52 @@
+"""Catalog API: search validators and the bookable-room checks"""
+
+from models import db
+
+def test_search_etag_follows_catalog_changes(catalog, login, page_cache_on):
+    client = login(catalog.guest)
+    first = client.get('/api/v1/hotels?city=Mumbai')
+    assert first.status_code == 200 and first.headers['ETag']
+    assert [hotel['id'] for hotel in first.get_json()['items']] == [catalog.seaside.id]
+
+    repeat = client.get('/api/v1/hotels?city=Mumbai', headers={'If-None-Match': first.headers['ETag']})
+    assert repeat.status_code == 304
+
+    # Room-only writes change what the listing may show, so they must move the validator too
+    catalog.rooms[0].is_available = False
+    db.session.commit()
+    changed = client.get('/api/v1/hotels?city=Mumbai', headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != first.headers['ETag']
+
+def test_search_etag_follows_bookings_for_dated_searches(catalog, stay, login, page_cache_on):
+    client = login(catalog.guest)
+    path = f'/api/v1/hotels?city=Shimla&check_in={stay[0]}&check_out={stay[1]}'
+    first = client.get(path)
+    assert [hotel['id'] for hotel in first.get_json()['items']] == [catalog.hillside.id]
+
+    booked = client.post('/api/v1/bookings', json={'room_id': catalog.rooms[3].id, 'check_in': stay[0].isoformat(),
+                                                   'check_out': stay[1].isoformat()})
+    assert booked.status_code == 201
+    sold_out = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+    assert sold_out.status_code == 200
+    assert sold_out.get_json()['items'] == []
+
+def test_search_sends_no_validators_while_the_page_cache_is_off(catalog, login):
+    response = login(catalog.guest).get('/api/v1/hotels?city=Mumbai')
+    assert response.status_code == 200 and 'ETag' not in response.headers
+
+def test_booking_api_rejects_unbookable_rooms(catalog, stay, login):
+    client = login(catalog.guest)
+    payload = {'check_in': stay[0].isoformat(), 'check_out': stay[1].isoformat()}
+
+    catalog.rooms[0].is_available = False
+    catalog.hillside.is_active = False
+    db.session.commit()
+    assert client.post('/api/v1/bookings', json=dict(payload, room_id=catalog.rooms[0].id)).status_code == 404
+    assert client.post('/api/v1/bookings', json=dict(payload, room_id=catalog.rooms[3].id)).status_code == 404
+    assert client.post('/api/v1/bookings/group',
+                       json=dict(payload, room_ids=[catalog.rooms[1].id, catalog.rooms[3].id])).status_code == 404
+
+    created = client.post('/api/v1/bookings', json=dict(payload, room_id=catalog.rooms[1].id))
+    assert created.status_code == 201
+    assert created.get_json()['room_id'] == catalog.rooms[1].id
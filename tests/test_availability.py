@@ -0,0 +1,36 @@
+"""Free-room searches: booked, cancelled and back-to-back stays"""
+
+from datetime import timedelta
+from models import Hotel
+from availability import available_rooms, has_free_room, is_room_available
+from reservations import create_booking
+
+def free_room_ids(check_in, check_out, guests=1, hotel_ids=None):
+    return {hotel_id: [room.id for room in rooms]
+            for hotel_id, rooms in available_rooms(check_in, check_out, guests, hotel_ids).items()}
+
+def test_booked_rooms_drop_out_until_cancelled(catalog, stay, database):
+    seaside, hillside = catalog.seaside.id, catalog.hillside.id
+    room_ids = [room.id for room in catalog.rooms]
+    assert free_room_ids(*stay) == {seaside: room_ids[:3], hillside: room_ids[3:]}
+    assert free_room_ids(*stay, guests=3) == {seaside: [room_ids[2]]}
+    assert free_room_ids(*stay, hotel_ids=[]) == {}
+
+    booking = create_booking(catalog.guest.id, catalog.rooms[3].id, *stay, num_guests=1)
+    # Any overlapping night holds the room; a stay ending as this one starts does not
+    assert free_room_ids(stay[1] - timedelta(days=1), stay[1] + timedelta(days=2)) == {seaside: room_ids[:3]}
+    assert not is_room_available(room_ids[3], *stay)
+    assert is_room_available(room_ids[3], *stay, exclude_booking_id=booking.id)
+    assert is_room_available(room_ids[3], stay[1], stay[1] + timedelta(days=2))
+    hotels_with_rooms = Hotel.query.filter(has_free_room(*stay)).all()
+    assert [hotel.id for hotel in hotels_with_rooms] == [seaside]
+
+    booking.status = 'cancelled'
+    database.session.commit()
+    assert free_room_ids(*stay, hotel_ids=[hillside]) == {hillside: room_ids[3:]}
+
+def test_unavailable_rooms_are_never_offered(catalog, stay, database):
+    catalog.rooms[3].is_available = False
+    database.session.commit()
+    assert catalog.hillside.id not in free_room_ids(*stay)
+    assert Hotel.query.filter(has_free_room(*stay)).count() == 1
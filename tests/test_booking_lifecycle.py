@@ -0,0 +1,86 @@
+"""Booking status transitions: the lifecycle worker, confirm and cancel"""
+
+from datetime import datetime, date, timedelta
+from models import Booking
+from booking_lifecycle import expire_pending_bookings, complete_past_bookings
+from inventory import verify_inventory, release_bookings
+from reservations import create_booking, lock_pending_booking
+from models import db
+
+def held_booking(catalog, stay, hours_old=48):
+    """A pending booking created hours_old hours ago"""
+    booking = create_booking(catalog.guest.id, catalog.rooms[0].id, *stay, num_guests=1)
+    booking.created_at = datetime.utcnow() - timedelta(hours=hours_old)
+    db.session.commit()
+    return booking
+
+def expire_elsewhere(booking_id):
+    """The lifecycle worker's expiry of one booking, committed on another connection"""
+    with db.engine.begin() as connection:
+        connection.execute(db.update(Booking).where(Booking.id == booking_id).values(status='expired'))
+        release_bookings(connection, [booking_id])
+
+def test_expire_pending_bookings_releases_inventory(catalog, stay, database):
+    stale = held_booking(catalog, stay)
+    fresh = create_booking(catalog.guest.id, catalog.rooms[1].id, *stay, num_guests=1)
+    paid = held_booking(catalog, (stay[0] + timedelta(days=5), stay[1] + timedelta(days=5)))
+    paid.payment_status = 'paid'
+    database.session.commit()
+
+    assert expire_pending_bookings(hold_minutes=60) == 1
+    database.session.expire_all()
+    assert (stale.status, fresh.status, paid.status) == ('expired', 'pending', 'pending')
+    assert verify_inventory() == []
+
+def test_complete_past_bookings(catalog, database):
+    past = create_booking(catalog.guest.id, catalog.rooms[0].id, date.today() - timedelta(days=4),
+                          date.today() - timedelta(days=1), num_guests=1)
+    current = create_booking(catalog.guest.id, catalog.rooms[1].id, date.today() - timedelta(days=1),
+                             date.today() + timedelta(days=2), num_guests=1)
+    past.status = current.status = 'confirmed'
+    database.session.commit()
+
+    assert complete_past_bookings() == 1
+    database.session.expire_all()
+    assert (past.status, current.status) == ('completed', 'confirmed')
+
+def test_confirm_only_pending(catalog, stay, database, login):
+    booking = held_booking(catalog, stay)
+    expire_pending_bookings(hold_minutes=60)
+    # The released room is rebooked for the same nights
+    rebooked = create_booking(catalog.other.id, catalog.rooms[0].id, *stay, num_guests=1)
+
+    client = login(catalog.admin)
+    client.get(f'/admin/confirm-booking/{booking.id}')
+    database.session.expire_all()
+    assert booking.status == 'expired'
+    with client.session_transaction() as session:
+        assert ('error', 'Only pending bookings can be confirmed') in session['_flashes']
+
+    client.get(f'/admin/confirm-booking/{rebooked.id}')
+    database.session.expire_all()
+    assert rebooked.status == 'confirmed'
+    assert verify_inventory() == []
+
+def test_cancel_after_concurrent_expiry(catalog, stay, database):
+    booking = held_booking(catalog, stay)
+    # Loaded as pending by the request, then expired by the worker before the cancel writes
+    assert booking.status == 'pending'
+    expire_elsewhere(booking.id)
+
+    assert not lock_pending_booking(booking)
+    assert booking.status == 'expired'
+    assert verify_inventory() == []
+
+def test_cancel_pending_booking(catalog, stay, database, login):
+    booking = create_booking(catalog.guest.id, catalog.rooms[0].id, *stay, num_guests=1)
+    login(catalog.other).get(f'/cancel-booking/{booking.id}')
+    database.session.expire_all()
+    assert booking.status == 'pending'
+
+    login(catalog.guest).get(f'/cancel-booking/{booking.id}')
+    database.session.expire_all()
+    assert booking.status == 'cancelled'
+    # Cancelling twice changes nothing and gives back no nights twice
+    login(catalog.guest).get(f'/cancel-booking/{booking.id}')
+    assert verify_inventory() == []
@@ -0,0 +1,48 @@
+"""Admin dashboard figures: cached once, then moved by committed deltas"""
+
+from datetime import datetime
+import dashboard_stats
+from dashboard_stats import get_dashboard_stats, booking_trend
+from reservations import create_booking
+
+def test_commits_move_the_cached_figures(catalog, stay, database):
+    before = get_dashboard_stats()
+    assert (before['total_hotels'], before['total_rooms'], before['total_users']) == (2, 4, 3)
+
+    booking = create_booking(catalog.guest.id, catalog.rooms[0].id, *stay, num_guests=1)
+    assert get_dashboard_stats()['pending_bookings'] == 1
+    booking.status = 'confirmed'
+    database.session.commit()
+    booking.total_amount = 250.0
+    database.session.commit()
+    stats = get_dashboard_stats()
+    assert (stats['total_bookings'], stats['pending_bookings'], stats['revenue']) == (1, 0, 250.0)
+    # The same figures as a fresh computation
+    assert stats == dashboard_stats._compute_stats()
+
+    database.session.rollback()
+    booking.status = 'cancelled'
+    database.session.rollback()
+    assert get_dashboard_stats()['revenue'] == 250.0
+
+def test_commit_during_computation_is_not_lost(catalog, stay, database, monkeypatch):
+    compute = dashboard_stats._compute_stats
+
+    def racing_compute():
+        stats = compute()
+        # Another request commits a booking after the figures were read
+        create_booking(catalog.other.id, catalog.rooms[3].id, *stay, num_guests=1)
+        return stats
+
+    monkeypatch.setattr(dashboard_stats, '_compute_stats', racing_compute)
+    assert get_dashboard_stats()['total_bookings'] == 0
+    monkeypatch.setattr(dashboard_stats, '_compute_stats', compute)
+    assert get_dashboard_stats()['total_bookings'] == 1
+
+def test_rollup_counts_on_utc_days(catalog, stay, database):
+    booking = create_booking(catalog.guest.id, catalog.rooms[0].id, *stay, num_guests=1)
+    booking.status = 'confirmed'
+    database.session.commit()
+    today = booking_trend(days=1)[0]
+    assert today['day'] == datetime.utcnow().date().isoformat()
+    assert (today['bookings_created'], today['bookings_confirmed']) == (1, 1)
@@ -0,0 +1,27 @@
+"""Booking and review exports: date bounds and streamed formats"""
+
+import json
+from datetime import datetime, timedelta
+from models import Review
+from exports import booking_export_query, review_export_query, stream_rows
+from reservations import create_booking
+
+def test_end_dates_include_the_whole_last_day(catalog, database):
+    day = datetime(2026, 3, 14)
+    for created_at in (day, day.replace(hour=23, minute=59, second=59, microsecond=999999), day + timedelta(days=1)):
+        database.session.add(Review(user_id=catalog.guest.id, hotel_id=catalog.seaside.id, rating=4, title='Good',
+                                    comment='Nice stay', created_at=created_at))
+    database.session.commit()
+    rows = database.session.execute(review_export_query(start=day.date(), end=day.date())).all()
+    assert [row.created_at for row in rows] == [day, day.replace(hour=23, minute=59, second=59, microsecond=999999)]
+
+def test_bookings_stream_as_ndjson(catalog, stay, database):
+    booking = create_booking(catalog.guest.id, catalog.rooms[0].id, *stay, num_guests=2)
+    today = booking.created_at.date()
+    lines = ''.join(stream_rows(booking_export_query(start=today, end=today, date_field='created'),
+                                'ndjson')).splitlines()
+    assert [json.loads(line)['booking_id'] for line in lines] == [booking.id]
+    # Nothing created by yesterday: a CSV export is just its header
+    csv_lines = ''.join(stream_rows(booking_export_query(end=today - timedelta(days=1), date_field='created'),
+                                    'csv')).splitlines()
+    assert csv_lines == [','.join(booking_export_query().selected_columns.keys())]
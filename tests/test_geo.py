@@ -0,0 +1,48 @@
+"""Proximity search: geohash ranges, radius filtering and nearest-first paging"""
+
+import random
+from geo import encode_geohash, covering_prefixes, geohash_ranges, _BASE32
+
+def test_geohash_ranges_hold_exactly_their_cells():
+    rng = random.Random(7)
+    for _ in range(200):
+        latitude, longitude, radius = rng.uniform(-89, 89), rng.uniform(-180, 180), rng.choice([1, 10, 80, 400])
+        prefixes = covering_prefixes(latitude, longitude, radius)
+        ranges = geohash_ranges(prefixes)
+        for low, high in ranges:
+            # Bounds use only base32 characters, so they sort the same under any collation
+            assert set(low) <= set(_BASE32) and (high is None or set(high) <= set(_BASE32))
+        for _ in range(20):
+            point = encode_geohash(rng.uniform(-90, 90), rng.uniform(-180, 180))
+            in_ranges = any(low <= point and (high is None or point < high) for low, high in ranges)
+            assert in_ranges == point.startswith(tuple(prefixes))
+        assert encode_geohash(latitude, longitude).startswith(tuple(prefixes))
+
+def test_adjacent_cells_merge_into_one_range():
+    assert geohash_ranges(['ts7', 'ts5', 'ts6', 'tsz', 'tt0', 'tse']) == [('ts5', 'ts8'), ('tse', 'tsf'),
+                                                                          ('tsz', 'tt1')]
+    assert geohash_ranges(['zz']) == [('zz', None)]
+
+def test_radius_search_keeps_nearby_hotels_only(catalog, login):
+    client = login(catalog.guest)
+    near_mumbai = client.get('/api/v1/hotels?lat=18.93&lon=72.83&radius_km=10').get_json()
+    assert [hotel['id'] for hotel in near_mumbai['items']] == [catalog.seaside.id]
+    assert near_mumbai['items'][0]['distance_km'] < 2
+
+    assert client.get('/api/v1/hotels?lat=0&lon=0&radius_km=50').get_json()['items'] == []
+    assert client.get('/api/v1/hotels?lat=91&lon=0').status_code == 400
+
+def test_nearest_first_pages(catalog, login, database):
+    # Moved next door (Chandigarh); the geohash follows the new coordinates
+    catalog.seaside.latitude, catalog.seaside.longitude = 30.73, 76.78
+    database.session.commit()
+    client = login(catalog.guest)
+    path = '/api/v1/hotels?lat=30.9&lon=77.1&nearest=2&per_page=1'
+    first = client.get(path).get_json()
+    assert [hotel['id'] for hotel in first['items']] == [catalog.hillside.id]
+    assert first['next_cursor']
+
+    second = client.get(f"{path}&cursor={first['next_cursor']}").get_json()
+    assert [hotel['id'] for hotel in second['items']] == [catalog.seaside.id]
+    assert second['items'][0]['distance_km'] > first['items'][0]['distance_km']
+    assert second['next_cursor'] is None
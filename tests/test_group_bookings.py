@@ -0,0 +1,42 @@
+"""Group bookings hold every room of the block or none"""
+
+import pytest
+from datetime import timedelta
+from models import Booking
+from reservations import create_booking, create_group_booking, RoomUnavailableError
+from inventory import verify_inventory
+
+def test_one_taken_room_fails_the_whole_block(catalog, stay, database):
+    first, second, suite = catalog.rooms[:3]
+    create_booking(catalog.other.id, second.id, stay[0] + timedelta(days=2), stay[1], num_guests=1)
+
+    with pytest.raises(RoomUnavailableError, match=rf'\[{second.id}\]'):
+        create_group_booking(catalog.guest.id, *stay, room_ids=[first.id, second.id, suite.id])
+    assert Booking.query.filter_by(user_id=catalog.guest.id).count() == 0
+
+    bookings = create_group_booking(catalog.guest.id, *stay, room_ids=[suite.id, first.id])
+    assert sorted(booking.room_id for booking in bookings) == [first.id, suite.id]
+    assert verify_inventory() == []
+
+def test_blocks_by_room_type_take_the_cheapest_free_rooms(catalog, stay, database):
+    with pytest.raises(RoomUnavailableError, match='Only 2 of 3'):
+        create_group_booking(catalog.guest.id, *stay, hotel_id=catalog.seaside.id, room_type='Deluxe', count=3)
+    assert Booking.query.count() == 0
+
+    create_booking(catalog.other.id, catalog.rooms[0].id, *stay, num_guests=1)
+    bookings = create_group_booking(catalog.guest.id, *stay, hotel_id=catalog.seaside.id, room_type='Deluxe', count=1)
+    assert [booking.room_id for booking in bookings] == [catalog.rooms[1].id]
+    assert bookings[0].total_amount == 3 * catalog.rooms[1].price_per_night
+
+def test_group_api_answers_conflicts_with_409(catalog, stay, login):
+    client = login(catalog.guest)
+    payload = {'check_in': stay[0].isoformat(), 'check_out': stay[1].isoformat(), 'guests': 2}
+    created = client.post('/api/v1/bookings/group', json=dict(payload, room_ids=[catalog.rooms[0].id,
+                                                                                 catalog.rooms[2].id]))
+    assert created.status_code == 201
+    assert created.get_json()['total'] == 3 * (100.0 + 300.0)
+
+    conflict = client.post('/api/v1/bookings/group', json=dict(payload, room_ids=[catalog.rooms[1].id,
+                                                                                  catalog.rooms[2].id]))
+    assert conflict.status_code == 409
+    assert Booking.query.filter_by(room_id=catalog.rooms[1].id).count() == 0
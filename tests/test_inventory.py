@@ -0,0 +1,45 @@
+"""Per-night room inventory stays in step with rooms and bookings"""
+
+from datetime import date, timedelta
+from models import RoomInventory
+from inventory import inventory_calendar, verify_inventory
+from reservations import create_booking
+
+def nights_sold(hotel_id, room_type, check_in, check_out):
+    return [night['sold'] for night in inventory_calendar(hotel_id, check_in, check_out)[room_type]]
+
+def test_booking_changes_move_the_sold_counts(catalog, stay, database):
+    seaside = catalog.seaside.id
+    first = create_booking(catalog.guest.id, catalog.rooms[0].id, *stay, num_guests=1)
+    create_booking(catalog.other.id, catalog.rooms[1].id, stay[0] + timedelta(days=1), stay[1], num_guests=1)
+    assert nights_sold(seaside, 'Deluxe', *stay) == [1, 2, 2]
+    assert inventory_calendar(seaside, *stay)['Deluxe'][1]['remaining'] == 0
+
+    # Moving a stay takes its old nights back and holds the new ones
+    first.check_in_date, first.check_out_date = stay[0] + timedelta(days=2), stay[1] + timedelta(days=1)
+    database.session.commit()
+    assert nights_sold(seaside, 'Deluxe', stay[0], stay[1] + timedelta(days=1)) == [0, 1, 2, 1]
+
+    first.status = 'cancelled'
+    database.session.commit()
+    assert nights_sold(seaside, 'Deluxe', stay[0], stay[1] + timedelta(days=1)) == [0, 1, 1, 0]
+    assert verify_inventory() == []
+
+def test_rolled_back_bookings_leave_no_trace(catalog, stay, database):
+    booking = create_booking(catalog.guest.id, catalog.rooms[3].id, *stay, num_guests=1)
+    booking.status = 'cancelled'
+    database.session.flush()
+    database.session.rollback()
+    assert nights_sold(catalog.hillside.id, 'Deluxe', *stay) == [1, 1, 1]
+    assert verify_inventory() == []
+
+def test_room_changes_recount_past_and_future_nights(catalog, stay, database):
+    past = (date.today() - timedelta(days=20), date.today() - timedelta(days=17))
+    create_booking(catalog.guest.id, catalog.rooms[0].id, *past, num_guests=1)
+    create_booking(catalog.guest.id, catalog.rooms[1].id, *stay, num_guests=1)
+
+    catalog.rooms[1].is_available = False
+    database.session.commit()
+    totals = {row.total for row in RoomInventory.query.filter_by(hotel_id=catalog.seaside.id, room_type='Deluxe')}
+    assert totals == {1}
+    assert verify_inventory(start=past[0]) == []
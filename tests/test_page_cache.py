@@ -0,0 +1,38 @@
+"""Public page cache: served to anonymous visitors, evicted by committed catalog writes"""
+
+from models import Review
+
+def cache_status(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.headers.get('X-Cache')
+
+def test_committed_writes_evict_the_pages_that_show_them(catalog, login, database, page_cache_on):
+    visitor = login(None)
+    seaside, hillside = f'/hotel/{catalog.seaside.id}', f'/hotel/{catalog.hillside.id}'
+    for path in ('/hotels', seaside, hillside):
+        assert cache_status(visitor, path) == 'MISS'
+        assert cache_status(visitor, path) == 'HIT'
+
+    # A price only shows on its hotel's page
+    catalog.rooms[0].price_per_night = 90.0
+    database.session.commit()
+    assert [cache_status(visitor, path) for path in ('/hotels', seaside, hillside)] == ['HIT', 'MISS', 'HIT']
+
+    # A review moves the rating shown in listings too
+    database.session.add(Review(user_id=catalog.guest.id, hotel_id=catalog.hillside.id, rating=5, title='Lovely',
+                                comment='Quiet and warm'))
+    database.session.commit()
+    assert [cache_status(visitor, path) for path in ('/hotels', seaside, hillside)] == ['MISS', 'HIT', 'MISS']
+
+def test_rolled_back_writes_keep_the_cache(catalog, login, database, page_cache_on):
+    visitor = login(None)
+    assert cache_status(visitor, '/hotels') == 'MISS'
+    catalog.seaside.name = 'Renamed'
+    database.session.flush()
+    database.session.rollback()
+    assert cache_status(visitor, '/hotels') == 'HIT'
+
+def test_signed_in_users_are_never_served_cached_pages(catalog, login, page_cache_on):
+    assert cache_status(login(None), '/hotels') == 'MISS'
+    assert cache_status(login(catalog.guest), '/hotels') is None
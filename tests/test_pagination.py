@@ -0,0 +1,49 @@
+"""Keyset pagination: gap-free cursors, page numbers and malformed cursors"""
+
+from datetime import timedelta
+from models import Booking
+from pagination import keyset_paginate, KeysetPage
+from reservations import create_booking
+
+def book_five(catalog, stay):
+    for week in range(5):
+        check_in = stay[0] + timedelta(days=7 * week)
+        create_booking(catalog.guest.id, catalog.rooms[week % 2].id, check_in, check_in + timedelta(days=2), 1)
+    return [booking.id for booking in Booking.query.order_by(Booking.created_at.desc(), Booking.id.desc())]
+
+def test_cursors_walk_every_row_once(catalog, stay, login):
+    newest_first = book_five(catalog, stay)
+    client = login(catalog.guest)
+    seen, cursor = [], ''
+    for _ in range(3):
+        page = client.get(f'/my-bookings?format=json&per_page=2&cursor={cursor}').get_json()
+        seen += [booking['id'] for booking in page['items']]
+        cursor = page['next_cursor']
+    assert seen == newest_first
+    assert cursor is None
+
+def test_pages_are_numbered_like_paginate(catalog, stay, database):
+    newest_first = book_five(catalog, stay)
+    columns = (Booking.created_at, Booking.id)
+    first = keyset_paginate(Booking.query, columns, per_page=2)
+    second = keyset_paginate(Booking.query, columns, first.next_cursor, per_page=2)
+    assert (first.page, first.has_prev, first.prev_num, first.next_num) == (1, False, None, 2)
+    assert (second.page, second.prev_num, second.next_num) == (2, 1, 3)
+    assert list(second.iter_pages()) == [1, 2, 3]
+
+    # Numbered pager links carry no cursor; they land on the same rows
+    numbered = keyset_paginate(Booking.query, columns, per_page=2, page=3)
+    last = keyset_paginate(Booking.query, columns, second.next_cursor, per_page=2)
+    assert [booking.id for booking in numbered.items] == [booking.id for booking in last.items] == newest_first[4:]
+    assert (numbered.page, numbered.has_next, last.page, last.has_next) == (3, False, 3, False)
+    assert list(KeysetPage([], 2, next_cursor='next', page=6).iter_pages()) == [1, 2, None, 4, 5, 6, 7]
+
+def test_malformed_cursors_are_rejected(catalog, login):
+    client = login(catalog.guest)
+    # Not base64 JSON; a (created_at, id) key with no page number; a first page reached by cursor
+    for cursor in ('garbage', 'WzEsMl0', 'WyIyMDI2LTAxLTAxIiwxLDFd'):
+        response = client.get(f'/api/v1/hotels?cursor={cursor}')
+        assert response.status_code == 400 and response.get_json() == {'error': 'Invalid cursor'}
+        assert client.get(f'/my-bookings?format=json&cursor={cursor}').status_code == 400
+    assert client.get('/hotels?cursor=garbage').status_code == 400
+    assert client.get('/api/v1/hotels?lat=18.9&lon=72.8&nearest=5&cursor=garbage').status_code == 400
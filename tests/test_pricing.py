@@ -0,0 +1,45 @@
+"""Rule-based pricing: calendars, multipliers, stay length and occupancy"""
+
+from datetime import date, timedelta
+from models import RateRule
+from pricing import nightly_rates, quote_totals, quote_room
+from reservations import create_booking
+
+MONDAY = date(2027, 3, 1)
+FRIDAY_AND_SATURDAY = 1 << 4 | 1 << 5
+
+def rule(name, **fields):
+    return RateRule(name=name, **fields)
+
+def test_rules_stack_in_order(catalog, database):
+    seaside = catalog.seaside.id
+    database.session.add_all([
+        rule('Weekend', hotel_id=seaside, days_of_week=FRIDAY_AND_SATURDAY, multiplier=1.5, priority=1),
+        # Calendar rates apply before any multiplier, whatever their priority
+        rule('Festival', hotel_id=seaside, room_type='Deluxe', start_date=MONDAY + timedelta(days=4),
+             end_date=MONDAY + timedelta(days=4), nightly_rate=200.0, priority=5),
+        rule('Week long', min_nights=7, multiplier=0.9),
+        rule('Retired', multiplier=10.0, is_active=False),
+    ])
+    database.session.commit()
+    deluxe, suite = catalog.rooms[0], catalog.rooms[2]
+
+    rates = nightly_rates([deluxe, suite], MONDAY, MONDAY + timedelta(days=6))
+    assert rates.tolist() == [[100.0] * 4 + [300.0, 150.0], [300.0] * 4 + [450.0, 450.0]]
+    assert quote_totals([deluxe, suite], MONDAY, MONDAY + timedelta(days=6)) == {deluxe.id: 850.0,
+                                                                                  suite.id: 2100.0}
+    # A seventh night earns the long-stay discount on every night
+    assert quote_room(deluxe, MONDAY, MONDAY + timedelta(days=7)) == round((850.0 + 100.0) * 0.9, 2)
+    # Rules of other hotels leave the hillside alone
+    assert quote_room(catalog.rooms[3], MONDAY, MONDAY + timedelta(days=6)) == 480.0
+
+def test_occupancy_rules_follow_bookings(catalog, database):
+    hillside_room = catalog.rooms[3]
+    database.session.add(rule('Nearly full', hotel_id=catalog.hillside.id, min_occupancy=0.5, multiplier=2.0))
+    database.session.commit()
+    assert quote_room(hillside_room, MONDAY, MONDAY + timedelta(days=3)) == 240.0
+
+    # Its only room is sold on the second night; a stay across it pays double for that night
+    create_booking(catalog.guest.id, hillside_room.id, MONDAY + timedelta(days=1), MONDAY + timedelta(days=2), 1)
+    rates = nightly_rates([hillside_room], MONDAY, MONDAY + timedelta(days=3))
+    assert rates.tolist() == [[80.0, 160.0, 80.0]]
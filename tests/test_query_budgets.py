@@ -0,0 +1,61 @@
+"""SQL statement budgets of the booking and admin pages (see query_budget.py)"""
+
+import pytest
+from app import app, db
+from models import Booking, User
+from dataset_generator import generate_dataset
+from dashboard_stats import invalidate_dashboard_stats
+from query_budget import count_queries
+from benchmarks.page_templates import install_page_templates
+
+# (endpoint, login, path): every view carrying a @query_budget
+PAGES = [
+    ('booking.booking_detail', 'user', '/booking/{booking_id}'),
+    ('booking.my_bookings', 'user', '/my-bookings'),
+    ('booking.my_bookings', 'user', '/my-bookings?format=json'),
+    ('admin.admin_bookings', 'admin', '/admin/bookings'),
+    ('admin.admin_bookings', 'admin', '/admin/bookings?format=json'),
+    ('admin.admin_dashboard', 'admin', '/admin'),
+]
+
+@pytest.fixture(scope='module')
+def seeded():
+    generate_dataset(hotels=4, rooms_per_hotel=5, users=20, years=1, reviews_per_hotel=3, seed=7)
+    with app.app_context():
+        admin = User.query.filter_by(email='admin@luxuryhotels.com').one()
+        user = User.query.filter_by(email='user1@example.com').one()
+        # Enough bookings across several rooms that an N+1 would stand out
+        booking_ids = db.session.scalars(db.select(Booking.id).order_by(Booking.id).limit(25)).all()
+        db.session.execute(db.update(Booking).where(Booking.id.in_(booking_ids)).values(user_id=user.id))
+        db.session.commit()
+        ids = {'admin': admin.id, 'user': user.id, 'booking_id': booking_ids[0]}
+
+    # Stand-ins walk booking.room.hotel and booking.user like the real pages, so a lazy load costs a query per row
+    install_page_templates(app)
+    testing = app.testing
+    app.testing = True
+    yield ids
+    app.testing = testing
+
+def login_client(user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+def test_budgets_declared():
+    for endpoint in {endpoint for endpoint, login, path in PAGES}:
+        assert getattr(app.view_functions[endpoint], 'query_budget', None), f'{endpoint} has no @query_budget'
+
+@pytest.mark.parametrize('endpoint, login, path', PAGES)
+def test_query_budget(seeded, endpoint, login, path):
+    budget = app.view_functions[endpoint].query_budget
+    client = login_client(seeded[login])
+    # The dashboard statistics are cached between requests; count the cold path
+    invalidate_dashboard_stats()
+    with count_queries() as counter:
+        response = client.get(path.format(**seeded))
+    assert response.status_code == 200
+    assert counter.count <= budget, (f'{endpoint} issued {counter.count} SQL statements (budget {budget}):\n'
+                                     + '\n'.join(counter.statements))
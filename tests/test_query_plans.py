@@ -0,0 +1,10 @@
+"""Hot routes keep using indexes (see benchmarks/query_plans.py)"""
+
+import os
+from benchmarks import query_plans
+
+def test_no_full_scans_on_hot_routes():
+    # Same database as the rest of the suite, reseeded through the migrations; much smaller
+    # seeds let the planner prefer scanning a table of a few rows over an index
+    assert query_plans.main(['--hotels', '40', '--rooms-per-hotel', '6', '--users', '60',
+                             '--database-url', os.environ['DATABASE_URL']]) == 0
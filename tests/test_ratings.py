@@ -0,0 +1,36 @@
+"""Hotel rating aggregates follow verified review writes"""
+
+from models import Hotel, Review
+from ratings import rebuild_ratings
+
+def aggregates(hotel):
+    return hotel.rating_count, hotel.rating_sum, hotel.rating_histogram
+
+def test_review_writes_move_the_aggregates(catalog, database):
+    seaside, hillside = catalog.seaside, catalog.hillside
+    reviews = [Review(user_id=catalog.guest.id, hotel_id=seaside.id, rating=stars, title='Stay', comment='Fine',
+                      is_verified=verified) for stars, verified in ((5, True), (3, True), (1, False))]
+    database.session.add_all(reviews)
+    database.session.commit()
+    assert aggregates(seaside) == (2, 8, {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+    assert seaside.average_rating == 4
+
+    # Each change moves the review's contribution: new stars, another hotel, verification
+    reviews[1].rating = 4
+    database.session.commit()
+    reviews[0].hotel_id = hillside.id
+    database.session.commit()
+    reviews[2].is_verified = True
+    database.session.commit()
+    assert aggregates(seaside) == (2, 5, {1: 1, 2: 0, 3: 0, 4: 1, 5: 0})
+    assert aggregates(hillside) == (1, 5, {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+
+    database.session.delete(reviews[2])
+    database.session.commit()
+    assert aggregates(seaside) == (1, 4, {1: 0, 2: 0, 3: 0, 4: 1, 5: 0})
+
+    # A full rebuild agrees with the incremental figures
+    expected = {hotel.id: aggregates(hotel) for hotel in Hotel.query}
+    rebuild_ratings()
+    database.session.expire_all()
+    assert {hotel.id: aggregates(hotel) for hotel in Hotel.query} == expected
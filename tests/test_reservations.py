@@ -0,0 +1,40 @@
+"""Booking commits never double-book a room"""
+
+import pytest
+import threading
+from datetime import timedelta
+from models import Booking, db
+from reservations import create_booking, RoomUnavailableError
+from inventory import verify_inventory
+
+def test_overlapping_stays_are_refused(catalog, stay):
+    room = catalog.rooms[0]
+    create_booking(catalog.guest.id, room.id, *stay, num_guests=2)
+
+    with pytest.raises(RoomUnavailableError):
+        create_booking(catalog.other.id, room.id, stay[0] + timedelta(days=1), stay[1] + timedelta(days=1), 1)
+    # Checking out the morning the next guest checks in is not an overlap
+    create_booking(catalog.other.id, room.id, stay[1], stay[1] + timedelta(days=2), num_guests=1)
+
+    assert Booking.query.filter_by(room_id=room.id).count() == 2
+    assert verify_inventory() == []
+
+def test_sqlite_bookings_wait_for_writers_on_other_connections(catalog, stay, database):
+    if database.engine.dialect.name != 'sqlite':
+        pytest.skip('SQLite write locking')
+    room_id, guest_id = catalog.rooms[0].id, catalog.other.id
+
+    # Another process (here, another connection) is mid-way through booking the same room
+    other = database.engine.connect()
+    other.execute(db.insert(Booking).values(user_id=guest_id, room_id=room_id, check_in_date=stay[0],
+                                            check_out_date=stay[1], num_guests=1, total_amount=300.0))
+    committer = threading.Timer(0.5, other.commit)
+    committer.start()
+    try:
+        # Waits for that commit before checking, so it sees the booking instead of inserting a second one
+        with pytest.raises(RoomUnavailableError):
+            create_booking(catalog.guest.id, room_id, *stay, num_guests=1)
+    finally:
+        committer.join()
+        other.close()
+    assert Booking.query.filter_by(room_id=room_id).count() == 1
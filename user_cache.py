@@ -0,0 +1,109 @@
+from models import User, db
+from page_cache import MemoryCache, RedisCache
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session, make_transient_to_detached
+from collections import Counter
+import threading
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 10000
+
+# The password hash never leaves the database; it lazy-loads on the rare access
+_EXCLUDED = {'password_hash'}
+
+class UserCache:
+    """Short-lived cache of user rows behind Flask-Login's user_loader.
+
+    Entries hold plain column values. On a hit they are attached to the
+    request's session as a persistent instance without a SELECT, so
+    relationships and later updates still work as usual. Entries include
+    is_admin, so with several worker processes the backend must be shared
+    (redis): a memory backend only evicts in the process that made the change.
+    """
+
+    def __init__(self):
+        self.backend = MemoryCache(DEFAULT_MAX_ENTRIES)
+        self.ttl = DEFAULT_TTL
+        self.enabled = True
+        self.metrics = Counter()
+        self._metrics_lock = threading.Lock()
+        self._columns = [attr.key for attr in inspect(User).column_attrs if attr.key not in _EXCLUDED]
+
+    def init_app(self, app):
+        """Pick the backend from USER_CACHE_BACKEND: memory (default, single process only), redis or null"""
+        backend = app.config.setdefault('USER_CACHE_BACKEND', 'memory')
+        self.ttl = app.config.setdefault('USER_CACHE_TTL', DEFAULT_TTL)
+        self.enabled = backend != 'null'
+        if backend == 'redis':
+            try:
+                self.backend = RedisCache(app.config.get('REDIS_URL', 'redis://localhost:6379/0'), prefix='hms:user:')
+            except ImportError:
+                # An in-process cache would miss other workers' evictions; better not to cache at all
+                app.logger.warning('redis is not installed; the user cache is disabled')
+                self.enabled = False
+        else:
+            self.backend = MemoryCache(app.config.get('USER_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+
+    def count(self, name):
+        with self._metrics_lock:
+            self.metrics[name] += 1
+
+    def load(self, user_id):
+        """Return the user with this id, attached to the current session, or None"""
+        if not self.enabled:
+            return db.session.get(User, user_id)
+        key = str(user_id)
+        data = self.backend.get(key)
+        if data is None:
+            self.count('miss')
+            user = db.session.get(User, user_id)
+            if user is not None:
+                self.backend.set(key, {column: getattr(user, column) for column in self._columns}, self.ttl)
+            return user
+
+        self.count('hit')
+        user = User(**data)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    def invalidate(self, user_ids):
+        for user_id in user_ids:
+            self.backend.delete(str(user_id))
+            self.count('invalidation')
+
+    def stats(self):
+        with self._metrics_lock:
+            hits, misses, invalidations = self.metrics['hit'], self.metrics['miss'], self.metrics['invalidation']
+        total = hits + misses
+        return {'hit': hits, 'miss': misses, 'invalidation': invalidations,
+                'hit_rate': hits / total if total else 0.0}
+
+    def prometheus_text(self):
+        stats = self.stats()
+        lines = ['# HELP hms_user_cache_events_total User cache hits, misses and invalidations.',
+                 '# TYPE hms_user_cache_events_total counter']
+        for name in ('hit', 'miss', 'invalidation'):
+            lines.append(f'hms_user_cache_events_total{{event="{name}"}} {stats[name]}')
+        return '\n'.join(lines) + '\n'
+
+user_cache = UserCache()
+
+# Cached users are dropped once a transaction that changed them commits
+
+def _user_changed(mapper, connection, user):
+    session = object_session(user)
+    if session is not None:
+        session.info.setdefault('user_cache_ids', set()).add(user.id)
+
+event.listen(User, 'after_update', _user_changed)
+event.listen(User, 'after_delete', _user_changed)
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    user_ids = session.info.pop('user_cache_ids', None)
+    if user_ids:
+        user_cache.invalidate(user_ids)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    session.info.pop('user_cache_ids', None)